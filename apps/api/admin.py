@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import Company
+from .models import Company, CompanyTeardown
+from .teardown import schedule_teardown
 
 
 @admin.register(Company)
@@ -23,9 +24,42 @@ class CompanyAdmin(admin.ModelAdmin):
     add_fieldsets = fieldsets
 
     readonly_fields = ('created_at',)
+    actions = ['tear_down']
+
+    def has_delete_permission(self, request, obj=None):
+        # the regular delete (and its confirmation page) runs the deletion
+        # collector over the whole tenant; companies are torn down instead
+        return False
+
+    def has_tear_down_permission(self, request):
+        return super().has_delete_permission(request)
+
+    @admin.action(description='Tear down selected companies (deletes all their data in the background)',
+                  permissions=['tear_down'])
+    def tear_down(self, request, queryset):
+        queued = schedule_teardown(queryset)
+        self.message_user(request, f'{len(queued)} teardown(s) queued; run_teardowns deletes them.')
 
     def logo_preview(self, obj):
         if obj.logo:
             return format_html('<img src="{}" width="60" style="border-radius: 4px;" />', obj.logo.url)
         return "-"
     logo_preview.short_description = 'Logo'
+
+
+@admin.register(CompanyTeardown)
+class CompanyTeardownAdmin(admin.ModelAdmin):
+    list_display = ('company_name', 'company_pk', 'status', 'step', 'deleted', 'created_at', 'heartbeat_at', 'finished_at')
+    list_filter = ('status',)
+    search_fields = ('company_name',)
+    ordering = ('-created_at',)
+    readonly_fields = [field.name for field in CompanyTeardown._meta.fields]
+    actions = ['retry']
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description='Retry selected failed teardowns', permissions=['change'])
+    def retry(self, request, queryset):
+        retried = queryset.filter(status='failed').update(status='pending', error='', finished_at=None)
+        self.message_user(request, f'{retried} teardown(s) queued again.')
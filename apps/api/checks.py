@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS
+from django.core.checks import Error, Tags, register
+
+
+# Cache backends whose contents are private to one process
+PER_PROCESS_CACHES = frozenset({
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+})
+
+
+def uses_shared_cache(alias=DEFAULT_CACHE_ALIAS):
+    """Whether every process of the deployment sees the same cache."""
+    return settings.CACHES[alias]['BACKEND'] not in PER_PROCESS_CACHES
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Token revocation, login lockouts, cached capabilities and Idempotency-Key
+    locks live in the default cache: with several worker processes each would
+    keep its own copy, so a revoked token or a locked out account would still
+    be accepted by the other workers.
+    """
+    if uses_shared_cache():
+        return []
+    return [Error(
+        f"The default cache ({settings.CACHES[DEFAULT_CACHE_ALIAS]['BACKEND']}) is not shared between processes.",
+        hint='Set CACHE_BACKEND / CACHE_LOCATION to a shared cache such as '
+             'django.core.cache.backends.redis.RedisCache when running more than one worker process.',
+        id='api.E001',
+    )]
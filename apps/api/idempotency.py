@@ -0,0 +1,125 @@
+import hashlib
+import re
+
+import jwt
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import RequestDataTooBig
+from django.http import HttpResponse
+
+from apps.user.jwt_tokens import decode_token
+
+
+# Idempotency-Key support for mutating API requests, kept in the cache.
+# The first request with a key runs the view while holding a short lock; its
+# response is stored for IDEMPOTENCY_TTL and replayed to retries carrying the
+# same key, which never reach the view. Keys are scoped per caller (user or
+# session); anonymous callers get no idempotency, as nothing tells them apart,
+# and a key reused for a different request is refused.
+#
+# The lock and the stored responses are only shared by processes sharing the
+# cache: with a per-process cache (LocMemCache), duplicates reaching different
+# workers would both run. `check --deploy` requires a shared one (api.E001).
+
+KEY_RE = re.compile(r'^[\x21-\x7e]{1,255}$')  # printable ASCII, no spaces
+
+REPLAYED_HEADER = 'Idempotent-Replayed'
+
+# produced per response by outer middleware or the server; not replayed
+_SKIPPED_HEADERS = {'x-request-id', 'date', 'server', 'vary'}
+
+# client errors that a retry of the same request would get again; others
+# (401, 403, 404, 429, ...) depend on state that may change, so are not kept
+STORED_CLIENT_ERRORS = {400, 409}
+
+
+def _digest(*parts):
+    return hashlib.sha256(b'\0'.join(part if isinstance(part, bytes) else str(part).encode() for part in parts)).hexdigest()
+
+
+def _principal(request):
+    """Who is calling, before DRF authenticates: the token's user, else the session, else None."""
+    header = request.headers.get('Authorization', '').split()
+    token = header[1] if len(header) == 2 and header[0].lower() == 'bearer' else request.COOKIES.get('jwt')
+    if token:
+        try:
+            return f"user:{decode_token(token)['user_id']}"
+        except (jwt.InvalidTokenError, KeyError):
+            pass
+    session_key = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    return f'session:{session_key}' if session_key else None
+
+
+def fingerprint(request):
+    """Digest of what makes two requests the same: method, path and query, and body."""
+    body = None
+    if request.content_type != 'multipart/form-data':
+        try:
+            body = request.body
+        except RequestDataTooBig:
+            pass
+    if body is None:
+        # uploads are not read into memory here; their size stands in for them
+        body = f"{request.content_type}:{request.META.get('CONTENT_LENGTH', '')}"
+    return _digest(request.method, request.get_full_path(), body)
+
+
+def cache_keys(request, key):
+    """(response key, lock key) of the caller's `key`, or None for anonymous callers."""
+    principal = _principal(request)
+    if principal is None:
+        return None
+    scope = _digest(principal, key)
+    return f'idempotency:response:{scope}', f'idempotency:lock:{scope}'
+
+
+def begin(response_key, lock_key):
+    """
+    Returns (stored response, locked): the stored response when the key was
+    already answered, else locked is True once the caller holds the lock and
+    must run the view. (None, False) while a concurrent request with the same
+    key still runs: the caller answers 409 rather than waiting for it.
+    """
+    stored = cache.get(response_key)
+    if stored is not None:
+        return stored, False
+    if not cache.add(lock_key, 1, settings.IDEMPOTENCY_LOCK_TIMEOUT):
+        return None, False
+    stored = cache.get(response_key)  # stored and unlocked in between
+    if stored is None:
+        return None, True
+    cache.delete(lock_key)
+    return stored, False
+
+
+def finish(response_key, lock_key, request_fingerprint, response):
+    try:
+        store(response_key, request_fingerprint, response)
+    finally:
+        cache.delete(lock_key)
+
+
+def store(response_key, request_fingerprint, response):
+    """
+    Keep `response` for replay: successes and STORED_CLIENT_ERRORS only, so
+    that a retry after any other error can succeed. Neither are streamed or
+    oversized responses kept, nor responses setting cookies (tokens, sessions).
+    """
+    if not (200 <= response.status_code < 300 or response.status_code in STORED_CLIENT_ERRORS):
+        return
+    if response.streaming or response.cookies or len(response.content) > settings.IDEMPOTENCY_MAX_RESPONSE_BYTES:
+        return
+    cache.set(response_key, {
+        'fingerprint': request_fingerprint,
+        'status': response.status_code,
+        'headers': [(name, value) for name, value in response.items() if name.lower() not in _SKIPPED_HEADERS],
+        'content': response.content,
+    }, settings.IDEMPOTENCY_TTL)
+
+
+def replay(stored):
+    response = HttpResponse(stored['content'], status=stored['status'])
+    for name, value in stored['headers']:
+        response[name] = value
+    response[REPLAYED_HEADER] = 'true'
+    return response
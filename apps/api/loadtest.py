@@ -0,0 +1,48 @@
+import json
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Small HTTP load generator shared by the benchmark_* management commands,
+# meant for comparing servers/configurations against each other.
+
+def request(url, data=None, headers=None):
+    """Return (status, body); JSON bodies are decoded, others returned as bytes."""
+    body = json.dumps(data).encode() if data is not None else None
+    headers = {'Content-Type': 'application/json', **(headers or {})}
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data=body, headers=headers), timeout=30) as response:
+            content = response.read()
+            if response.headers.get_content_type() == 'application/json':
+                content = json.loads(content)
+            return response.status, content
+    except urllib.error.HTTPError as exc:
+        return exc.code, exc.read().decode(errors='replace')
+
+
+def measure(call, count, concurrency):
+    """
+    Run `call()` (returning (status, body)) `count` times from `concurrency`
+    threads; return a one-line summary with requests/s and latency percentiles.
+    """
+    def timed(_):
+        start = time.perf_counter()
+        status, _body = call()
+        return (time.perf_counter() - start) * 1000, status < 400
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(timed, range(count)))
+    elapsed = time.perf_counter() - start
+
+    latencies = [latency for latency, _ok in results]
+    errors = sum(not ok for _latency, ok in results)
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return (
+        f'{len(latencies) / elapsed:8.1f} req/s   '
+        f'p50 {quantiles[49]:7.1f} ms   p95 {quantiles[94]:7.1f} ms   p99 {quantiles[98]:7.1f} ms   '
+        f'errors {errors}'
+    )
@@ -0,0 +1,127 @@
+import atexit
+import contextvars
+import datetime
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener, WatchedFileHandler
+
+from django.utils.functional import SimpleLazyObject, empty
+
+
+# Set by RequestLoggingMiddleware for the duration of a request
+request_context = contextvars.ContextVar('request_context', default=None)
+
+# LogRecord attributes that are not user-supplied `extra` fields
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+
+def _resolved_user(request):
+    """The request's user if authentication already ran; never triggers a lookup itself."""
+    user = getattr(request, 'user', None)
+    if isinstance(user, SimpleLazyObject):
+        user = user._wrapped
+        if user is empty:
+            return None
+    return user if getattr(user, 'is_authenticated', False) else None
+
+
+class RequestContextFilter(logging.Filter):
+    """Adds request_id, user_id and company_id of the current request to every record."""
+
+    def filter(self, record):
+        context = request_context.get()
+        record.request_id = record.user_id = record.company_id = None
+        if context is not None:
+            record.request_id = context['request_id']
+            user = _resolved_user(context['request'])
+            if user is not None:
+                record.user_id, record.company_id = user.pk, user.company_id
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps only a fraction of high-frequency events, e.g.
+    `logger.warning('Login failed', extra={'event': 'auth_failure'})` with
+    rates={'auth_failure': 0.1} keeps about one in ten. Other records pass.
+    """
+
+    def __init__(self, rates=None):
+        super().__init__()
+        self.rates = rates or {}
+
+    def filter(self, record):
+        rate = self.rates.get(getattr(record, 'event', None))
+        if rate is None:
+            return True
+        record.sample_rate = rate
+        return random.random() < rate
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any `extra` fields."""
+
+    def format(self, record):
+        data = {
+            'timestamp': datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        data.update({key: value for key, value in vars(record).items() if key not in _RECORD_ATTRS})
+        if record.exc_info:
+            data['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str)
+
+
+class QueueListenerHandler(QueueHandler):
+    """
+    Puts records on an in-memory queue and returns immediately; a background
+    listener thread formats them as JSON and writes to stderr (and `filename`).
+
+    The listener starts on first use in each process, so it also runs in
+    pre-forked server workers. When the queue is full, records are dropped
+    and counted instead of blocking the request.
+    """
+
+    def __init__(self, filename=None, maxsize=10000):
+        super().__init__(queue.Queue(maxsize))
+        self.filename = filename
+        self.dropped = 0
+        self._listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def _start(self):
+        formatter = JsonFormatter()
+        targets = [logging.StreamHandler(sys.stderr)]
+        if self.filename:
+            targets.append(WatchedFileHandler(self.filename))
+        for target in targets:
+            target.setFormatter(formatter)
+
+        self._listener = QueueListener(self.queue, *targets, respect_handler_level=True)
+        self._listener.start()
+        self._pid = os.getpid()
+        atexit.register(self._listener.stop)
+
+    def prepare(self, record):
+        # Formatting happens in the listener thread; only resolve the message
+        # here so mutable arguments can't change before it's written.
+        record.msg, record.args = record.getMessage(), None
+        return record
+
+    def enqueue(self, record):
+        if self._pid != os.getpid():
+            with self._start_lock:
+                if self._pid != os.getpid():  # another thread may have started it meanwhile
+                    self._start()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
@@ -0,0 +1,52 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.api.loadtest import measure, request
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-test static and media delivery of a running server (run collectstatic first) '
+        'and report requests/s per asset, plain, compressed and as a byte range.'
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Server base URL.')
+        parser.add_argument(
+            '--static', action='append', dest='static_paths',
+            help='Static file to request, e.g. admin/css/base.css (repeatable). '
+                 'Defaults to the three largest files in the collectstatic manifest.',
+        )
+        parser.add_argument('--media', action='append', dest='media_paths', default=[],
+                            help='Media file, relative to MEDIA_ROOT (repeatable); served with DEBUG on only.')
+        parser.add_argument('--requests', type=int, default=500, help='Requests per asset and variant.')
+        parser.add_argument('--concurrency', type=int, default=8, help='Concurrent clients.')
+
+    def handle(self, *args, **options):
+        base = options['url'].rstrip('/')
+        urls = [f'{base}{settings.STATIC_URL}{path}' for path in options['static_paths'] or self.largest_static_files(3)]
+        urls += [f'{base}{settings.MEDIA_URL}{path}' for path in options['media_paths']]
+
+        variants = {
+            'plain': {},
+            'br/gzip': {'Accept-Encoding': 'br, gzip'},
+            'range': {'Range': 'bytes=0-1023'},
+        }
+        for url in urls:
+            self.stdout.write(url)
+            for name, headers in variants.items():
+                result = measure(lambda: request(url, headers=headers), options['requests'], options['concurrency'])
+                self.stdout.write(f'    {name:8} {result}')
+
+    def largest_static_files(self, count):
+        manifest = os.path.join(settings.STATIC_ROOT, 'staticfiles.json')
+        try:
+            with open(manifest) as f:
+                hashed = json.load(f)['paths'].values()
+        except FileNotFoundError:
+            raise CommandError('No staticfiles manifest; run `python manage.py collectstatic` or pass --static.')
+        return sorted(hashed, key=lambda path: os.path.getsize(os.path.join(settings.STATIC_ROOT, path)))[-count:]
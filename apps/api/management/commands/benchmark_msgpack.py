@@ -0,0 +1,55 @@
+import io
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from apps.api.parsers import MessagePackParser
+from apps.api.renderers import MessagePackRenderer
+from apps.user.serializers import UserSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare JSON and MessagePack on a page of --rows serialized users: '
+        'body size, render and parse time (ms, p50/p95 over --repeat runs).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        users = [
+            User(
+                id=n, first_name='First', last_name=f'Last {n}', email=f'user.{n}@example.com',
+                role='driver', company_id=1, is_active=n % 2 == 0,
+            )
+            for n in range(1, options['rows'] + 1)
+        ]
+        data = {'count': len(users), 'results': UserSerializer(users, many=True).data}
+
+        formats = {
+            'json': (JSONRenderer(), JSONParser()),
+            'msgpack': (MessagePackRenderer(), MessagePackParser()),
+        }
+        for name, (renderer, parser) in formats.items():
+            render, parse = [], []
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                body = renderer.render(data)
+                render.append((time.perf_counter() - start) * 1000)
+                start = time.perf_counter()
+                parser.parse(io.BytesIO(body))
+                parse.append((time.perf_counter() - start) * 1000)
+            self.stdout.write(
+                f'{name:8} {len(body):>9} bytes   render {self.summary(render)}   parse {self.summary(parse)}'
+            )
+
+    def summary(self, timings):
+        timings = sorted(timings)
+        return f'p50 {statistics.median(timings):.2f} ms, p95 {timings[int(len(timings) * 0.95) - 1]:.2f} ms'
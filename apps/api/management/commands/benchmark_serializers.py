@@ -0,0 +1,58 @@
+import statistics
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from apps.api.models import Company
+from apps.api.serializers import compile_serializer
+from apps.user.serializers import UserSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure listing --rows users (ms, p50/p95 over --repeat runs) through UserSerializer and through '
+        'its compiled form, over a throw-away company.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=10)
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        company = Company.objects.create(name=f'serializer-benchmark-{uuid.uuid4().hex[:12]}')
+        try:
+            User.objects.bulk_create(
+                [
+                    User(
+                        first_name='First', last_name=str(n), email=f'user.{n}@{company.pk}.example',
+                        role='driver', company=company, is_active=n % 2 == 0,
+                    )
+                    for n in range(options['rows'])
+                ],
+                batch_size=5000,
+            )
+            queryset = User.objects.filter(company=company).order_by('id')
+            compiled = compile_serializer(UserSerializer)
+
+            variants = {
+                'serializer': lambda: UserSerializer(queryset.all(), many=True).data,
+                'compiled rows': lambda: compiled.many_from_rows(queryset.values(*compiled.sources)),
+                'compiled objects': lambda: compiled.many_from_instances(queryset.all()),
+            }
+            for name, call in variants.items():
+                timings = []
+                for _ in range(options['repeat']):
+                    start = time.perf_counter()
+                    call()
+                    timings.append((time.perf_counter() - start) * 1000)
+                timings.sort()
+                self.stdout.write(
+                    f'{name:17} p50 {statistics.median(timings):.1f} ms, '
+                    f'p95 {timings[int(len(timings) * 0.95) - 1]:.1f} ms (query included)'
+                )
+        finally:
+            User.objects.filter(company=company).delete()
+            company.delete()
@@ -0,0 +1,80 @@
+import collections
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+# Run in a fresh interpreter: time django.setup() (and optionally loading the
+# URLconf, which a web worker does on its first request) and print it in ms.
+STARTUP_SCRIPT = '''
+import time
+start = time.perf_counter()
+import django
+django.setup()
+if {urls}:
+    from django.urls import get_resolver
+    get_resolver().url_patterns
+print((time.perf_counter() - start) * 1000)
+'''
+
+
+class Command(BaseCommand):
+    help = 'Measure cold start time (django.setup) per settings module and list the slowest imports (-X importtime).'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--settings-module', action='append', dest='settings_modules',
+            help='Settings module to measure (repeatable). Defaults to the current one and config.settings_lean.',
+        )
+        parser.add_argument('--runs', type=int, default=5, help='Interpreter starts per settings module.')
+        parser.add_argument('--urls', action='store_true', help='Also load the URLconf.')
+        parser.add_argument('--top', type=int, default=10, help='Top-level packages to list by import time.')
+        parser.add_argument(
+            '--target-ms', type=float, default=settings.STARTUP_TIME_TARGET_MS,
+            help='Fail when the fastest run exceeds this (default: STARTUP_TIME_TARGET_MS; 0 disables).',
+        )
+
+    def handle(self, *args, **options):
+        modules = options['settings_modules'] or [os.environ['DJANGO_SETTINGS_MODULE'], 'config.settings_lean']
+        script = STARTUP_SCRIPT.format(urls=options['urls'])
+        failed = []
+
+        for module in dict.fromkeys(modules):
+            env = {**os.environ, 'DJANGO_SETTINGS_MODULE': module}
+            timings = [float(self.run(script, env).stdout) for _ in range(options['runs'])]
+            median = statistics.median(timings)
+            self.stdout.write(f'{module}: median {median:.1f} ms, min {min(timings):.1f} ms over {len(timings)} runs')
+
+            for package, micros in self.import_profile(script, env).most_common(options['top']):
+                self.stdout.write(f'    {package:30} {micros / 1000:8.1f} ms')
+
+            # best of N: noise from other processes only ever adds time
+            if options['target_ms'] and min(timings) > options['target_ms']:
+                failed.append(module)
+
+        if failed:
+            raise CommandError(f'Startup above {options["target_ms"]} ms target: {", ".join(failed)}')
+
+    def run(self, script, env, *flags):
+        result = subprocess.run(
+            [sys.executable, *flags, '-c', script],
+            env=env, cwd=settings.BASE_DIR, capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(result.stderr.strip().splitlines()[-1])
+        return result
+
+    def import_profile(self, script, env):
+        """Self time of every imported module, summed per top-level package."""
+        totals = collections.Counter()
+        for line in self.run(script, env, '-X', 'importtime').stderr.splitlines():
+            if not line.startswith('import time:') or 'self [us]' in line:
+                continue
+            self_us, _, name = line[len('import time:'):].split('|')
+            totals[name.strip().split('.')[0]] += int(self_us)
+        return totals
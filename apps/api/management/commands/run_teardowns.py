@@ -0,0 +1,41 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.api.teardown import claim_teardown, run_teardown
+
+
+class Command(BaseCommand):
+    help = (
+        'Run queued company teardowns (see the "Tear down" action of the company admin), one at a time. '
+        'Also resumes teardowns whose worker died. With --loop, keeps polling for new ones.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep polling for queued teardowns.')
+        parser.add_argument('--poll-interval', type=float, default=10.0, help='Seconds between polls with --loop.')
+        parser.add_argument('--batch-size', type=int, default=settings.TEARDOWN_BATCH_SIZE,
+                            help='Rows deleted per transaction.')
+        parser.add_argument('--pause', type=float, default=settings.TEARDOWN_PAUSE,
+                            help='Seconds to sleep between batches.')
+
+    def handle(self, *args, **options):
+        while True:
+            job = claim_teardown()
+            if job is None:
+                if not options['loop']:
+                    return
+                time.sleep(options['poll_interval'])
+                continue
+
+            self.stdout.write(f'Tearing down {job.company_name} (company {job.company_pk})')
+            start, deleted_before = time.perf_counter(), job.deleted
+            run_teardown(job, options['batch_size'], options['pause'])
+            elapsed = time.perf_counter() - start
+            deleted = job.deleted - deleted_before
+            summary = f'{deleted} rows in {elapsed:.2f} s, {deleted / elapsed if elapsed else 0:.0f} rows/s'
+            if job.status == 'done':
+                self.stdout.write(self.style.SUCCESS(f'{job.company_name}: {summary}'))
+            else:
+                self.stderr.write(f'{job.company_name}: failed after {summary}: {job.error}')
@@ -0,0 +1,51 @@
+import os
+import runpy
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.api.checks import uses_shared_cache
+
+
+class Command(BaseCommand):
+    help = (
+        'Run the production server: pre-forked gunicorn workers with the app preloaded '
+        '(configuration in config/gunicorn.conf.py). Extra arguments are passed to gunicorn.'
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('gunicorn_args', nargs='*', help='Extra gunicorn arguments, after --.')
+
+    def handle(self, *args, **options):
+        try:
+            import gunicorn  # noqa: F401
+        except ImportError:
+            raise CommandError('gunicorn is not installed (pipenv install).')
+
+        conf = os.path.join(settings.BASE_DIR, 'config', 'gunicorn.conf.py')
+        workers = self.worker_count(conf, options['gunicorn_args'])
+        if workers > 1 and not uses_shared_cache():
+            raise CommandError(
+                f"{workers} workers would each keep their own {settings.CACHES['default']['BACKEND']}, "
+                'so revoked tokens and lockouts would not reach the other workers. Configure a shared '
+                'cache (CACHE_BACKEND / CACHE_LOCATION) or run a single worker (GUNICORN_WORKERS=1).'
+            )
+
+        # replace this process, so the gunicorn master gets signals (HUP, TERM) directly
+        os.execv(sys.executable, [
+            sys.executable, '-m', 'gunicorn',
+            '--config', conf,
+            *options['gunicorn_args'],
+            'config.wsgi:application',
+        ])
+
+    def worker_count(self, conf, gunicorn_args):
+        """Workers gunicorn will start: from the command line, else from the config file."""
+        from gunicorn.config import Config
+
+        cli = Config().parser().parse_args([*gunicorn_args, 'config.wsgi:application'])
+        if cli.workers is not None:
+            return cli.workers
+        return runpy.run_path(conf).get('workers', 1)
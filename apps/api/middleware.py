@@ -0,0 +1,151 @@
+import logging
+import os
+import random
+import re
+import time
+import uuid
+
+from django.conf import settings
+from django.http import JsonResponse
+from rest_framework.views import APIView
+
+from . import idempotency
+from .logs import request_context
+from .profiling import start_profiler
+from .tracing import trace_request
+
+
+logger = logging.getLogger('apps.request')
+
+# Accept upstream request ids (load balancer, frontend) only when they look sane
+_REQUEST_ID_RE = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+
+class RequestLoggingMiddleware:
+    """
+    Tags every log record emitted while handling a request with its request id,
+    user and company (see logs.RequestContextFilter), logs one summary line per
+    request with its latency, and echoes the id in the X-Request-ID header.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_id = request.headers.get('X-Request-ID', '')
+        if not _REQUEST_ID_RE.match(request_id):
+            request_id = uuid.uuid4().hex
+
+        token = request_context.set({'request_id': request_id, 'request': request})
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+            latency_ms = round((time.perf_counter() - start) * 1000, 2)
+            logger.info('%s %s %s', request.method, request.path, response.status_code, extra={
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'latency_ms': latency_ms,
+            })
+            response['X-Request-ID'] = request_id
+            return response
+        finally:
+            request_context.reset(token)
+
+
+class TracingMiddleware:
+    """
+    Opt-in tracing and profiling of individual requests.
+
+    A request is traced when TRACING_ENABLED (sampled by TRACING_SAMPLE_RATE)
+    or when it sends `X-Trace: 1`, and profiled when PROFILING_ENABLED or
+    when it sends `X-Profile: 1`. Profiles are written to PROFILING_DIR only
+    for requests slower than PROFILING_SLOW_REQUEST_MS, or always when asked
+    for by header. The headers are honoured only if TRACING_HEADERS_ENABLED.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        headers_enabled = settings.TRACING_HEADERS_ENABLED
+        profile_forced = headers_enabled and request.headers.get('X-Profile') == '1'
+        traced = (
+            (headers_enabled and request.headers.get('X-Trace') == '1')
+            or (settings.TRACING_ENABLED and random.random() < settings.TRACING_SAMPLE_RATE)
+        )
+        profiled = profile_forced or settings.PROFILING_ENABLED
+        if not (traced or profiled):
+            return self.get_response(request)
+
+        profiler = start_profiler() if profiled else None
+        start = time.perf_counter()
+        try:
+            if traced:
+                with trace_request(f'{request.method} {request.path}', **{
+                    'http.method': request.method,
+                    'http.target': request.path,
+                }):
+                    return self.get_response(request)
+            return self.get_response(request)
+        finally:
+            if profiler is not None:
+                profiler.stop()
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                if profile_forced or elapsed_ms >= settings.PROFILING_SLOW_REQUEST_MS:
+                    name = f'{time.strftime("%Y%m%d-%H%M%S")}-{int(elapsed_ms)}ms-{uuid.uuid4().hex[:8]}.folded'
+                    profiler.write(os.path.join(settings.PROFILING_DIR, name))
+
+
+class IdempotencyMiddleware:
+    """
+    Honours an `Idempotency-Key` header on authenticated mutating requests
+    to DRF views (see idempotency.py). A retry gets the first request's
+    response back, marked `Idempotent-Replayed: true`, without the view
+    running again; a retry arriving while the first request still runs gets
+    409 straight away. Views setting `idempotency_exempt` (login, tokens,
+    passwords) ignore the header.
+    """
+
+    MUTATING_METHODS = {'POST', 'PUT', 'PATCH', 'DELETE'}
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        pending = getattr(request, '_idempotency', None)
+        if pending is not None:
+            idempotency.finish(*pending, response)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        key = request.headers.get('Idempotency-Key')
+        view_class = getattr(view_func, 'cls', None)  # set by APIView.as_view()
+        if key is None or request.method not in self.MUTATING_METHODS:
+            return None
+        if not (isinstance(view_class, type) and issubclass(view_class, APIView)):
+            return None
+        if getattr(view_class, 'idempotency_exempt', False):
+            return None
+        if not idempotency.KEY_RE.match(key):
+            return JsonResponse({'detail': 'Idempotency-Key must be 1 to 255 printable ASCII characters.'}, status=400)
+
+        keys = idempotency.cache_keys(request, key)
+        if keys is None:
+            return None
+        response_key, lock_key = keys
+        request_fingerprint = idempotency.fingerprint(request)
+        stored, locked = idempotency.begin(response_key, lock_key)
+        if locked:
+            request._idempotency = (response_key, lock_key, request_fingerprint)
+            return None
+        if stored is None:
+            return JsonResponse(
+                {'detail': 'A request with this Idempotency-Key is still in progress; retry later.'}, status=409,
+            )
+        if stored['fingerprint'] != request_fingerprint:
+            return JsonResponse(
+                {'detail': 'This Idempotency-Key was already used for a different request.'}, status=422,
+            )
+        return idempotency.replay(stored)
@@ -0,0 +1,23 @@
+from rest_framework.response import Response
+
+from .serializers import compile_serializer
+
+
+class CompiledListMixin:
+    """
+    List action for hot read-only endpoints.
+
+    Fetches only the serializer's columns with `.values()` and renders them
+    through the compiled serializer instead of building field objects per row.
+    Use together with `ListModelMixin`, listed before it.
+    """
+
+    def list(self, request, *args, **kwargs):
+        compiled = compile_serializer(self.get_serializer_class())
+        queryset = self.filter_queryset(self.get_queryset()).values(*compiled.sources)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(compiled.many_from_rows(page))
+
+        return Response(compiled.many_from_rows(queryset))
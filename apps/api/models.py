@@ -11,5 +11,39 @@ class Company(models.Model):
 
     def __str__(self):
         return self.name
-    
-    
+
+
+class CompanyTeardown(models.Model):
+    """
+    Background deletion of a company and everything that cascades from it,
+    run by `run_teardowns` (see teardown.py). Refers to the company by pk
+    rather than by foreign key: the job outlives the company.
+    """
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("running", "Running"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+
+    company_pk = models.PositiveBigIntegerField()
+    company_name = models.CharField(max_length=255)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    step = models.CharField(max_length=255, blank=True)  # model being deleted
+    deleted = models.PositiveBigIntegerField(default=0)  # rows deleted so far
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)  # last batch; a stale one means the worker died
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['company_pk'], condition=models.Q(status__in=['pending', 'running']),
+                name='one_active_teardown_per_company',
+            ),
+        ]
+
+    def __str__(self):
+        return f"Teardown of {self.company_name} ({self.status})"
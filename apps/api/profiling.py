@@ -0,0 +1,54 @@
+import collections
+import os
+import sys
+import threading
+
+from django.conf import settings
+
+
+# Sampling profiler for a single request (see TracingMiddleware). A helper
+# thread looks at the request thread's stack every PROFILING_INTERVAL_MS and
+# counts it; the result is written in the "folded" format (`a;b;c 12` per
+# line) that flamegraph.pl, speedscope and inferno read directly.
+
+def _fold(frame):
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f'{code.co_qualname} ({os.path.basename(code.co_filename)})')
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class SamplingProfiler:
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[_fold(frame)] += 1
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f'{stack} {count}\n')
+
+
+def start_profiler():
+    """Start sampling the calling thread."""
+    return SamplingProfiler(threading.get_ident(), settings.PROFILING_INTERVAL_MS / 1000).start()
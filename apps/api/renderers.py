@@ -0,0 +1,21 @@
+import msgpack
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+# Reuse DRF's JSON encoding rules for dates, decimals, UUIDs, lazy strings etc.
+# so a MessagePack body carries exactly the same values as the JSON one.
+_encoder = JSONEncoder()
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Renders response data as MessagePack, a compact binary alternative to JSON."""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_encoder.default, use_bin_type=True)
@@ -0,0 +1,89 @@
+from rest_framework import fields, relations, serializers
+
+
+# Field types whose `to_representation` returns the model value unchanged.
+# For these the compiled function copies the value straight through.
+PASSTHROUGH_FIELDS = (
+    fields.BooleanField,
+    fields.CharField,
+    fields.IntegerField,
+    fields.ReadOnlyField,
+)
+
+_compiled = {}
+
+
+class CompiledSerializer:
+    """
+    Flat, read-only representation of a ModelSerializer class.
+
+    `from_row` renders a `.values(*sources)` row and `from_instance` renders a
+    model instance, both producing the same dict as `serializer.data`.
+    """
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self.sources = []
+        namespace = {}
+        row_items, instance_items = [], []
+
+        for index, field in enumerate(serializer_class()._readable_fields):
+            if isinstance(field, relations.PrimaryKeyRelatedField) and field.pk_field is None:
+                # `.values('company')` yields the id, and `company_id` avoids a join on instances.
+                source, attname, converter = field.source, f'{field.source}_id', None
+            elif '.' in field.source or field.source == '*' or not isinstance(field, fields.Field) \
+                    or isinstance(field, (serializers.BaseSerializer, relations.RelatedField, fields.SerializerMethodField)):
+                raise ValueError(
+                    f'{serializer_class.__name__}.{field.field_name} cannot be compiled: '
+                    'only plain model column fields are supported.'
+                )
+            else:
+                source, attname, converter = field.source, field.source, _converter_for(field)
+
+            self.sources.append(source)
+            key = repr(field.field_name)
+            if converter is None:
+                row_items.append(f'{key}: row[{source!r}]')
+                instance_items.append(f'{key}: obj.{attname}')
+            else:
+                name = f'convert_{index}'
+                namespace[name] = converter
+                row_items.append(f'{key}: None if (v := row[{source!r}]) is None else {name}(v)')
+                instance_items.append(f'{key}: None if (v := obj.{attname}) is None else {name}(v)')
+
+        code = (
+            'def from_row(row):\n'
+            f'    return {{{", ".join(row_items)}}}\n'
+            'def from_instance(obj):\n'
+            f'    return {{{", ".join(instance_items)}}}\n'
+        )
+        exec(compile(code, f'<compiled {serializer_class.__name__}>', 'exec'), namespace)
+        self.from_row = namespace['from_row']
+        self.from_instance = namespace['from_instance']
+
+    def many_from_rows(self, rows):
+        from_row = self.from_row
+        return [from_row(row) for row in rows]
+
+    def many_from_instances(self, instances):
+        from_instance = self.from_instance
+        return [from_instance(obj) for obj in instances]
+
+
+def _converter_for(field):
+    """Return None when the field passes values through, else its `to_representation`."""
+    if isinstance(field, fields.ChoiceField):
+        if all(isinstance(key, str) for key in field.choice_strings_to_values.values()):
+            return None
+        return field.to_representation
+    if isinstance(field, PASSTHROUGH_FIELDS):
+        return None
+    return field.to_representation
+
+
+def compile_serializer(serializer_class):
+    """Return the cached CompiledSerializer for `serializer_class`, building it on first use."""
+    try:
+        return _compiled[serializer_class]
+    except KeyError:
+        return _compiled.setdefault(serializer_class, CompiledSerializer(serializer_class))
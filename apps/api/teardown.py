@@ -0,0 +1,183 @@
+import datetime
+import logging
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, models, transaction
+from django.db.models import signals
+from django.utils import timezone
+
+from .models import Company, CompanyTeardown
+
+
+# Tenant teardown: deletes a company's rows bottom-up, a bounded batch per
+# transaction, with raw DELETEs instead of the deletion collector (which loads
+# every object of the tenant into memory, sends signals per row and holds a
+# single transaction for the whole tenant).
+
+logger = logging.getLogger(__name__)
+
+# on_delete handlers the raw batches implement themselves; any other (SET(),
+# SET_DEFAULT, custom) makes the model go through the collector
+RAW_DELETE_SAFE = (models.CASCADE, models.SET_NULL, models.PROTECT, models.RESTRICT, models.DO_NOTHING)
+
+
+def _reverse_relations(model):
+    """Relations of the foreign keys pointing at `model`, auto-created many-to-many tables included."""
+    return [
+        field for field in model._meta.get_fields(include_hidden=True)
+        if (field.one_to_many or field.one_to_one) and field.auto_created and not field.concrete
+    ]
+
+
+def teardown_plan(root=Company):
+    """
+    Every model that deleting `root` cascades to, and `root` itself, as
+    (model, lookups) pairs: each lookup leads from the model to the root's
+    pk, one per cascade path. Ordered so that a model comes before every
+    model its foreign keys reference, whatever their on_delete.
+    """
+    edges = {root: []}  # model -> [(cascading foreign key, the model it references)]
+    stack = [root]
+    while stack:
+        parent = stack.pop()
+        for relation in _reverse_relations(parent):
+            if relation.on_delete is not models.CASCADE:
+                continue
+            child = relation.related_model
+            if child not in edges:
+                edges[child] = []
+                stack.append(child)
+            edges[child].append((relation.field, parent))
+
+    # topological order, referencing models first (Kahn's algorithm)
+    references = {
+        model: {
+            field.related_model for field in model._meta.concrete_fields
+            if field.is_relation and field.related_model in edges and field.related_model is not model
+        }
+        for model in edges
+    }
+    referenced_by = {model: 0 for model in edges}
+    for targets in references.values():
+        for target in targets:
+            referenced_by[target] += 1
+    order = []
+    ready = [model for model, count in referenced_by.items() if count == 0]
+    while ready:
+        model = ready.pop()
+        order.append(model)
+        for target in references[model]:
+            referenced_by[target] -= 1
+            if referenced_by[target] == 0:
+                ready.append(target)
+    if len(order) != len(edges):
+        cycle = sorted(model._meta.label for model in edges if model not in order)
+        raise RuntimeError(f'Foreign key cycle between {", ".join(cycle)}: no bottom-up deletion order')
+
+    # root-to-model lookups, parents before children
+    lookups = {root: ['pk']}
+    for model in reversed(order):
+        if model is not root:
+            lookups[model] = [
+                f'{field.name}__{lookup}' for field, parent in edges[model] for lookup in lookups[parent]
+            ]
+    return [(model, lookups[model]) for model in order]
+
+
+def _needs_collector(model):
+    if signals.pre_delete.has_listeners(model) or signals.post_delete.has_listeners(model):
+        return True  # receivers expect instances
+    return any(relation.on_delete not in RAW_DELETE_SAFE for relation in _reverse_relations(model))
+
+
+def _delete_batch(model, lookup, root_pk, batch_size, using):
+    """Delete up to `batch_size` rows of `model` that lead to the root through `lookup`; returns how many."""
+    manager = model._base_manager.using(using)
+    pks = list(manager.filter(**{lookup: root_pk}).order_by().values_list('pk', flat=True)[:batch_size])
+    if not pks:
+        return 0
+
+    with transaction.atomic(using=using):
+        # rows that cascade from this model are already gone (bottom-up order);
+        # references that survive the tenant are cleared as the collector would
+        for relation in _reverse_relations(model):
+            if relation.on_delete is models.SET_NULL:
+                relation.related_model._base_manager.using(using).filter(
+                    **{f'{relation.field.name}__in': pks}
+                ).update(**{relation.field.name: None})
+
+        batch = manager.filter(pk__in=pks)
+        if _needs_collector(model):
+            batch.delete()
+        else:
+            batch._raw_delete(using)
+    return len(pks)
+
+
+def run_teardown(job, batch_size=None, pause=None, using=DEFAULT_DB_ALIAS):
+    """
+    Delete the job's company, recording progress on the job after every batch.
+
+    Restartable: every step deletes whatever of the tenant is left, so a job
+    interrupted at any point simply runs again from the start of the plan;
+    steps already completed find nothing to delete.
+    """
+    batch_size = batch_size or settings.TEARDOWN_BATCH_SIZE
+    pause = settings.TEARDOWN_PAUSE if pause is None else pause
+
+    try:
+        for model, lookups in teardown_plan():
+            job.step = model._meta.label
+            for lookup in lookups:
+                while True:
+                    deleted = _delete_batch(model, lookup, job.company_pk, batch_size, using)
+                    job.deleted += deleted
+                    job.heartbeat_at = timezone.now()
+                    job.save(update_fields=['step', 'deleted', 'heartbeat_at'])
+                    if deleted < batch_size:
+                        break
+                    if pause:
+                        time.sleep(pause)
+    except Exception as exc:
+        logger.exception('Teardown of company %s failed', job.company_pk)
+        job.status, job.error, job.finished_at = 'failed', f'{type(exc).__name__}: {exc}', timezone.now()
+        job.save(update_fields=['status', 'error', 'finished_at'])
+        return job
+
+    job.status, job.step, job.error, job.finished_at = 'done', '', '', timezone.now()
+    job.save(update_fields=['status', 'step', 'error', 'finished_at'])
+    return job
+
+
+def schedule_teardown(companies, using=DEFAULT_DB_ALIAS):
+    """Queue a teardown job per company and return the new jobs; companies already queued or running are skipped."""
+    jobs = CompanyTeardown.objects.using(using)
+    active = set(jobs.filter(status__in=['pending', 'running']).values_list('company_pk', flat=True))
+    return jobs.bulk_create(
+        [CompanyTeardown(company_pk=company.pk, company_name=company.name) for company in companies
+         if company.pk not in active],
+        ignore_conflicts=True,  # one_active_teardown_per_company, should another admin queue it meanwhile
+    )
+
+
+def claim_teardown(using=DEFAULT_DB_ALIAS):
+    """
+    Mark the oldest runnable job as running and return it, or None: pending
+    jobs, and running ones whose worker stopped sending heartbeats.
+    """
+    now = timezone.now()
+    stale = now - datetime.timedelta(seconds=settings.TEARDOWN_STALE_AFTER)
+    with transaction.atomic(using=using):
+        job = (
+            CompanyTeardown.objects.using(using)
+            .select_for_update(skip_locked=True)
+            .filter(models.Q(status='pending') | models.Q(status='running', heartbeat_at__lt=stale))
+            .order_by('created_at')
+            .first()
+        )
+        if job is not None:
+            job.status, job.heartbeat_at = 'running', now
+            job.started_at = job.started_at or now
+            job.save(update_fields=['status', 'heartbeat_at', 'started_at'])
+    return job
@@ -1,3 +1,283 @@
-from django.test import TestCase
+import datetime
+import io
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+import msgpack
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db.models import signals
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import Resolver404, resolve
+from django.utils import timezone
+from rest_framework.exceptions import ParseError
+from rest_framework.test import APIClient
+
+from apps.api import idempotency, teardown
+from apps.api.checks import check_shared_cache
+from apps.api.logs import QueueListenerHandler
+from apps.api.models import Company, CompanyTeardown
+from apps.api.parsers import MessagePackParser
+from apps.api.renderers import MessagePackRenderer
+from apps.user.jwt_tokens import issue_token_pair
+from apps.shipment.models import Shipment, ShipmentEvent
+from apps.user.models import CustomerProfile, DriverProfile
+from apps.user.serializers import UserSerializer
+from apps.warehouse.models import StockLevel, Warehouse
+
+
+class MessagePackTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(name='Acme')
+        cls.admin = get_user_model().objects.create_user(
+            'Ada', 'Admin', 'admin@acme.example', 'pw', role='company_admin', company=cls.company,
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_format_query_parameter(self):
+        response = self.client.get('/api/users/company_users/?format=msgpack')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content), json.loads(self.client.get('/api/users/company_users/').content))
+
+    def test_accept_negotiation(self):
+        response = self.client.get('/api/users/company_users/', HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content)['results'][0]['email'], 'admin@acme.example')
+
+        response = self.client.get('/api/users/company_users/', HTTP_ACCEPT='application/json')
+        self.assertEqual(response['Content-Type'], 'application/json')
+
+    def test_round_trip(self):
+        data = UserSerializer(self.admin).data
+        parsed = MessagePackParser().parse(io.BytesIO(MessagePackRenderer().render(data)))
+        self.assertEqual(parsed, json.loads(json.dumps(data)))
+
+    def test_request_body(self):
+        body = {'first_name': 'Dan', 'last_name': 'Driver', 'email': 'dan@acme.example', 'role': 'driver', 'password': 'abcdefgh1'}
+        response = APIClient().post(
+            '/api/users/register/', data=msgpack.packb(body), content_type='application/msgpack',
+            HTTP_ACCEPT='application/msgpack',
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertIn('Registration successful', msgpack.unpackb(response.content)['message'])
+        self.assertTrue(get_user_model().objects.filter(email='dan@acme.example').exists())
+
+    def test_malformed_body(self):
+        with self.assertRaises(ParseError):
+            MessagePackParser().parse(io.BytesIO(b'\xc1'))
+
+        response = APIClient().post(
+            '/api/users/register/', data=b'\xc1', content_type='application/msgpack', HTTP_ACCEPT='application/msgpack',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('MessagePack parse error', msgpack.unpackb(response.content)['detail'])
+
+
+class QueueListenerHandlerTests(TestCase):
+    def test_concurrent_first_records_start_one_listener(self):
+        handler = QueueListenerHandler()
+        starts = []
+
+        def start():
+            starts.append(threading.get_ident())
+            time.sleep(0.05)  # widen the race
+            handler._pid = os.getpid()
+
+        record = logging.LogRecord('test', logging.INFO, __file__, 0, 'message', None, None)
+        with mock.patch.object(handler, '_start', side_effect=start):
+            threads = [threading.Thread(target=handler.enqueue, args=(record,)) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(starts), 1)
+        self.assertEqual(handler.queue.qsize(), 8)
+
+
+class SharedCacheCheckTests(TestCase):
+    def test_per_process_cache(self):
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            self.assertEqual([error.id for error in check_shared_cache(None)], ['api.E001'])
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://cache'}}):
+            self.assertEqual(check_shared_cache(None), [])
+
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_runprod_refuses_several_workers(self):
+        with mock.patch('os.execv') as execv, mock.patch.dict(os.environ, {'GUNICORN_WORKERS': '3'}):
+            with self.assertRaises(CommandError):
+                call_command('runprod')
+            execv.assert_not_called()
+
+            call_command('runprod', '--', '--workers', '1')
+            execv.assert_called_once()
+
+
+class MediaTests(TestCase):
+    def test_media_root_not_routed(self):
+        with self.assertRaises(Resolver404):
+            resolve('/media/images/user/profile_images/photo.jpg')
+
+
+class LeanSettingsTests(TestCase):
+    def test_setup_does_not_import_schema_generation(self):
+        code = 'import sys, django; django.setup(); print("drf_spectacular" in sys.modules)'
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': 'config.settings_lean'}
+        output = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.strip(), 'False')
+
+
+class IdempotencyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.driver = get_user_model().objects.create_user('Dan', 'Driver', 'dan@acme.example', 'pw', role='driver')
+        DriverProfile.objects.create(user=cls.driver)
+
+    def setUp(self):
+        cache.clear()
+        self.authorization = f'Bearer {issue_token_pair(self.driver)[0]}'
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=self.authorization)
+
+    def check_in(self, key, latitude=52.5):
+        return self.client.post(
+            '/api/users/me/check_in/', {'latitude': latitude, 'longitude': 13.4}, format='json', HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_replay(self):
+        first = self.check_in('key-1')
+        self.assertEqual(first.status_code, 200)
+        self.assertNotIn(idempotency.REPLAYED_HEADER, first)
+
+        retry = self.check_in('key-1')
+        self.assertEqual(retry[idempotency.REPLAYED_HEADER], 'true')
+        self.assertEqual(retry.content, first.content)
+        self.assertEqual(self.check_in('key-1', latitude=1).status_code, 422)
+
+    def test_stored_statuses(self):
+        self.assertEqual(self.check_in('invalid', latitude=123).status_code, 400)
+        self.assertEqual(self.check_in('invalid', latitude=123)[idempotency.REPLAYED_HEADER], 'true')
+
+        # 401/403/429 may not hold on retry: not stored
+        with mock.patch('apps.user.permissions.IsDriver.has_permission', return_value=False):
+            self.assertEqual(self.check_in('denied').status_code, 403)
+        response = self.check_in('denied')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(idempotency.REPLAYED_HEADER, response)
+
+    def test_in_progress(self):
+        request = RequestFactory().post('/api/users/me/check_in/', HTTP_AUTHORIZATION=self.authorization)
+        _response_key, lock_key = idempotency.cache_keys(request, 'busy')
+        cache.add(lock_key, 1)
+        start = time.monotonic()
+        self.assertEqual(self.check_in('busy').status_code, 409)
+        self.assertLess(time.monotonic() - start, 1)
+
+    def test_anonymous_callers_are_not_scoped(self):
+        self.assertIsNone(idempotency.cache_keys(RequestFactory().post('/'), 'key'))
+
+    def test_cookies_are_not_stored(self):
+        response = HttpResponse('{}', content_type='application/json')
+        response.set_cookie('jwt', 'token')
+        idempotency.store('idempotency:response:test', 'fingerprint', response)
+        self.assertIsNone(cache.get('idempotency:response:test'))
+
+
+class TeardownTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.doomed = cls.create_tenant('Doomed', 'doomed')
+        cls.kept = cls.create_tenant('Kept', 'kept')
+        # a surviving row that refers to a doomed user (SET_NULL)
+        cls.foreign_event = ShipmentEvent.objects.create(
+            shipment=Shipment.objects.filter(company=cls.kept).first(), status='in_transit',
+            occurred_at=timezone.now(), recorded_by=cls.doomed.users.get(role='dispatcher'),
+        )
+
+    @staticmethod
+    def create_tenant(name, domain):
+        User = get_user_model()
+        company = Company.objects.create(name=name)
+        User.objects.create_user('Dee', 'Dispatcher', f'dee@{domain}.example', 'pw', role='dispatcher', company=company)
+        # created here: profiles are provisioned once the transaction commits
+        customer = CustomerProfile.objects.create(
+            user=User.objects.create_user('Cus', 'Tomer', f'cus@{domain}.example', 'pw', role='customer', company=company),
+            company_name=name,
+        )
+        driver = DriverProfile.objects.create(
+            user=User.objects.create_user('Dri', 'Ver', f'dri@{domain}.example', 'pw', role='driver', company=company),
+        )
+        for n in range(3):
+            shipment = Shipment.objects.create(
+                company=company, customer=customer, driver=driver, tracking_number=f'{domain}-{n}',
+            )
+            for status in ('assigned', 'in_transit'):
+                ShipmentEvent.objects.create(shipment=shipment, status=status, occurred_at=timezone.now(), recorded_by=driver.user)
+        warehouse = Warehouse.objects.create(company=company, code='W1', name=name)
+        StockLevel.objects.bulk_create([StockLevel(warehouse=warehouse, sku=f'SKU{n}', on_hand=n) for n in range(3)])
+        return company
+
+    def tenant_rows(self, company):
+        return {
+            'users': set(get_user_model().objects.filter(company=company).values_list('pk', flat=True)),
+            'customers': set(CustomerProfile.objects.filter(user__company=company).values_list('pk', flat=True)),
+            'drivers': set(DriverProfile.objects.filter(user__company=company).values_list('pk', flat=True)),
+            'shipments': set(Shipment.objects.filter(company=company).values_list('pk', flat=True)),
+            'events': set(ShipmentEvent.objects.filter(shipment__company=company).values_list('pk', flat=True)),
+            'stock': set(StockLevel.objects.filter(warehouse__company=company).values_list('pk', flat=True)),
+        }
+
+    def test_plan_deletes_referencing_models_first(self):
+        plan = [model for model, _lookups in teardown.teardown_plan()]
+        self.assertEqual(plan[-1], Company)
+        for position, model in enumerate(plan):
+            for field in model._meta.concrete_fields:
+                if field.is_relation and field.related_model in plan and field.related_model is not model:
+                    self.assertGreater(plan.index(field.related_model), position, f'{model} -> {field.related_model}')
+
+    def test_only_the_company_is_torn_down(self):
+        kept = self.tenant_rows(self.kept)
+        doomed_users = self.tenant_rows(self.doomed)['users']
+        collected = []
+
+        def receiver(sender, instance, **kwargs):
+            collected.append(instance.pk)
+
+        signals.post_delete.connect(receiver, sender=get_user_model())
+        self.addCleanup(signals.post_delete.disconnect, receiver, sender=get_user_model())
+
+        job = teardown.run_teardown(CompanyTeardown.objects.create(company_pk=self.doomed.pk, company_name='Doomed'), batch_size=2)
+
+        self.assertEqual(job.status, 'done', job.error)
+        self.assertFalse(Company.objects.filter(pk=self.doomed.pk).exists())
+        self.assertFalse(any(self.tenant_rows(self.doomed.pk).values()))
+        self.assertEqual(self.tenant_rows(self.kept), kept)
+        # users have delete receivers, so they went through the collector
+        self.assertEqual(set(collected), doomed_users)
+        self.foreign_event.refresh_from_db()
+        self.assertIsNone(self.foreign_event.recorded_by)
+
+    def test_claim_takes_over_stale_jobs(self):
+        stale = timezone.now() - datetime.timedelta(seconds=settings.TEARDOWN_STALE_AFTER + 1)
+        CompanyTeardown.objects.create(company_pk=self.kept.pk, company_name='Kept', status='running', heartbeat_at=timezone.now())
+        job = CompanyTeardown.objects.create(company_pk=self.doomed.pk, company_name='Doomed', status='running', heartbeat_at=stale)
+
+        self.assertEqual(teardown.claim_teardown(), job)
+        job.refresh_from_db()
+        self.assertGreater(job.heartbeat_at, stale)
+        # the job just claimed is live again, the other one still is
+        self.assertIsNone(teardown.claim_teardown())
@@ -0,0 +1,148 @@
+import contextvars
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+try:
+    from opentelemetry import trace as otel_trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+except ImportError:
+    otel_trace = None
+
+
+# Opt-in request tracing (see TracingMiddleware). Code wraps the interesting
+# work in `with span('name', key=value):`; outside a traced request that is
+# a single context variable lookup.
+#
+# Spans are exported as JSON lines to TRACE_FILE. With the OpenTelemetry SDK
+# installed, its tracer and span format are used; otherwise a built-in tracer
+# writes the same fields (name, context.trace_id/span_id, parent_id,
+# start_time, end_time, attributes).
+
+_current = contextvars.ContextVar('trace_span', default=None)
+
+_tracer = None
+_write_lock = threading.Lock()
+
+
+def _get_tracer():
+    global _tracer
+    if _tracer is None:
+        provider = TracerProvider(resource=Resource.create({'service.name': settings.TRACING_SERVICE_NAME}))
+        exporter = ConsoleSpanExporter(
+            out=open(settings.TRACE_FILE, 'a'),
+            formatter=lambda span: span.to_json(indent=None) + os.linesep,
+        )
+        provider.add_span_processor(BatchSpanProcessor(exporter))
+        _tracer = provider.get_tracer('apps.api.tracing')
+    return _tracer
+
+
+class _Span:
+    __slots__ = ('name', 'trace', 'span_id', 'parent_id', 'attributes', 'start', 'end')
+
+    def __init__(self, name, trace, parent_id, attributes):
+        self.name = name
+        self.trace = trace
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start = time.time_ns()
+        self.end = None
+
+    def as_dict(self):
+        return {
+            'name': self.name,
+            'context': {'trace_id': self.trace.trace_id, 'span_id': self.span_id},
+            'parent_id': self.parent_id,
+            'start_time': self.start,
+            'end_time': self.end,
+            'duration_ms': round((self.end - self.start) / 1e6, 3),
+            'attributes': self.attributes,
+        }
+
+
+class _Trace:
+    """Spans of one request, written out together when the request ends."""
+
+    def __init__(self):
+        self.trace_id = secrets.token_hex(16)
+        self.spans = []
+
+    def export(self):
+        lines = ''.join(json.dumps(span.as_dict(), default=str) + '\n' for span in self.spans)
+        with _write_lock, open(settings.TRACE_FILE, 'a') as f:
+            f.write(lines)
+
+
+@contextmanager
+def span(name, **attributes):
+    """Time the enclosed block as a child of the current span, when the request is traced."""
+    parent = _current.get()
+    if parent is None:
+        yield
+        return
+
+    if otel_trace is not None:
+        with _get_tracer().start_as_current_span(name, attributes=attributes):
+            yield
+        return
+
+    child = _Span(name, parent.trace, parent.span_id, attributes)
+    token = _current.set(child)
+    try:
+        yield
+    finally:
+        child.end = time.time_ns()
+        parent.trace.spans.append(child)
+        _current.reset(token)
+
+
+def _query_wrapper(execute, sql, params, many, context):
+    with span('db.query', **{'db.statement': sql[:500], 'db.many': many}):
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def trace_request(name, **attributes):
+    """Root span for a request; every ORM query inside it gets its own span."""
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(_query_wrapper))
+
+        if otel_trace is not None:
+            stack.enter_context(_get_tracer().start_as_current_span(name, attributes=attributes))
+            # any non-None value marks the request as traced for span()
+            token = _current.set(True)
+            try:
+                yield
+            finally:
+                _current.reset(token)
+            return
+
+        trace = _Trace()
+        root = _Span(name, trace, None, attributes)
+        token = _current.set(root)
+        try:
+            yield
+        finally:
+            root.end = time.time_ns()
+            trace.spans.append(root)
+            _current.reset(token)
+            trace.export()
+
+
+class TracedValidationMixin:
+    """Serializer mixin recording `is_valid()` as a span."""
+
+    def is_valid(self, *, raise_exception=False):
+        with span('serializer.validate', serializer=type(self).__name__):
+            return super().is_valid(raise_exception=raise_exception)
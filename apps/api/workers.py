@@ -0,0 +1,29 @@
+import os
+
+import django
+from django.conf import settings
+
+
+def init_worker(settings_module=None):
+    # spawned workers start from a fresh interpreter; WORKER_SETTINGS_MODULE
+    # keeps their startup (and memory) lean
+    if settings_module:
+        os.environ['DJANGO_SETTINGS_MODULE'] = settings_module
+    django.setup()
+
+
+def process_pool(max_workers):
+    """
+    A ProcessPoolExecutor whose workers are spawned (never forked from a
+    threaded web worker) and run django.setup() with WORKER_SETTINGS_MODULE.
+    """
+    # imported here, as most processes never start a pool
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    return ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=init_worker,
+        initargs=(settings.WORKER_SETTINGS_MODULE,),
+    )
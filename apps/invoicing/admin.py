@@ -0,0 +1,32 @@
+from django.contrib import admin
+
+from .models import Invoice, InvoiceLine
+
+
+class InvoiceLineInline(admin.TabularInline):
+    model = InvoiceLine
+    fields = ('shipment', 'description', 'amount')
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Invoice)
+class InvoiceAdmin(admin.ModelAdmin):
+    list_display = ('number', 'company', 'customer', 'period_start', 'status', 'total', 'approved_by', 'created_at')
+    search_fields = ('number', 'company__name', 'customer__company_name')
+    list_filter = ('status', 'period_start', 'company')
+    ordering = ('-period_start', 'number')
+    list_select_related = ('company', 'customer__user', 'approved_by')
+    # invoices are written by generate_invoices and approved through the API
+    readonly_fields = (
+        'company', 'customer', 'number', 'period_start', 'period_end', 'status',
+        'subtotal', 'discount', 'tax', 'total', 'document', 'approved_by', 'approved_at', 'created_at',
+    )
+    inlines = [InvoiceLineInline]
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,193 @@
+"""
+Month-end invoicing: one invoice per customer and period, one line per
+delivered shipment.
+
+Billable shipments are streamed over a server-side cursor, ordered by
+customer, and written a batch of customers at a time, each batch in its own
+transaction. A shipment can be billed only once (InvoiceLine.shipment is
+one-to-one), so an interrupted run is resumed by running it again: committed
+batches are no longer billable, and invoices still without a document are
+rendered then. Each batch locks its shipments and skips those a concurrent
+run billed since they were read.
+
+Money is Decimal throughout; amounts are summed exactly and rounded only
+once, to the cent, for the discount and the tax.
+"""
+from decimal import ROUND_HALF_UP, Decimal
+from itertools import groupby
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.db.models import F
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from apps.api.tracing import span
+from apps.shipment.models import Shipment
+from .models import Invoice, InvoiceLine
+
+
+CENT = Decimal('0.01')
+
+
+def billable_shipments(period_start, period_end, company_id=None):
+    """
+    Delivered, not yet invoiced shipments of the period, as
+    (customer_id, company_id, shipment_id, tracking_number, price) rows ordered by customer.
+    """
+    queryset = Shipment.objects.filter(
+        status='delivered',
+        status_updated_at__date__range=(period_start, period_end),
+        customer__isnull=False,
+        invoice_line__isnull=True,
+    )
+    if company_id is not None:
+        queryset = queryset.filter(company_id=company_id)
+    return (
+        queryset
+        .order_by('customer_id', 'company_id', 'id')
+        .values_list('customer_id', 'company_id', 'id', 'tracking_number', 'price')
+        # a server-side cursor on PostgreSQL: rows arrive chunk by chunk, never all at once
+        .iterator(chunk_size=settings.INVOICE_FETCH_SIZE)
+    )
+
+
+def discount_rate(shipment_count):
+    """Volume discount for the number of shipments billed on one invoice."""
+    rate = Decimal(0)
+    for min_shipments, tier_rate in settings.INVOICE_VOLUME_DISCOUNTS:
+        if shipment_count >= min_shipments:
+            rate = max(rate, tier_rate)
+    return rate
+
+
+def compute_totals(amounts):
+    """(subtotal, discount, tax, total) of a list of Decimal line amounts."""
+    subtotal = sum(amounts, Decimal(0))
+    discount = (subtotal * discount_rate(len(amounts))).quantize(CENT, rounding=ROUND_HALF_UP)
+    tax = ((subtotal - discount) * settings.INVOICE_TAX_RATE).quantize(CENT, rounding=ROUND_HALF_UP)
+    return subtotal, discount, tax, subtotal - discount + tax
+
+
+def generate(period_start, period_end, company_id=None, batch_size=None):
+    """
+    Write the invoices of a period. Yields the ids of the invoices written,
+    one list per committed batch.
+    """
+    batch_size = batch_size or settings.INVOICE_BATCH_SIZE
+    batch = []
+    for (customer_id, invoice_company_id), rows in groupby(
+        billable_shipments(period_start, period_end, company_id), key=itemgetter(0, 1),
+    ):
+        batch.append((customer_id, invoice_company_id, list(rows)))
+        if len(batch) >= batch_size:
+            yield _write_batch(batch, period_start, period_end)
+            batch = []
+    if batch:
+        yield _write_batch(batch, period_start, period_end)
+
+
+def _lock_billed(shipment_ids):
+    """Lock the shipments (sorted ids, locked in that order) and return the ids of those already invoiced."""
+    billed = set()
+    for offset in range(0, len(shipment_ids), 1000):
+        chunk = shipment_ids[offset:offset + 1000]
+        shipments = Shipment.objects.filter(pk__in=chunk).order_by('pk')
+        if connection.features.has_select_for_update:
+            list(shipments.select_for_update().values_list('pk', flat=True))
+        else:
+            # SQLite: writing first takes the database write lock (see inventory._lock)
+            shipments.update(status_updated_at=F('status_updated_at'))
+        billed.update(InvoiceLine.objects.filter(shipment_id__in=chunk).values_list('shipment_id', flat=True))
+    return billed
+
+
+def _write_batch(batch, period_start, period_end):
+    invoices, lines = [], []
+    with span('invoicing.batch', customers=len(batch)), transaction.atomic():
+        billed = _lock_billed(sorted(row[2] for _customer_id, _company_id, rows in batch for row in rows))
+        for customer_id, company_id, rows in batch:
+            # billed by a concurrent run since they were read
+            rows = [row for row in rows if row[2] not in billed]
+            if not rows:
+                continue
+            subtotal, discount, tax, total = compute_totals([row[4] for row in rows])
+            invoice = Invoice(
+                company_id=company_id,
+                customer_id=customer_id,
+                # unique, as its first shipment is billed on no other invoice
+                number=f'INV-{period_start:%Y%m}-{rows[0][2]:08d}',
+                period_start=period_start,
+                period_end=period_end,
+                subtotal=subtotal,
+                discount=discount,
+                tax=tax,
+                total=total,
+            )
+            invoices.append(invoice)
+            lines.extend(
+                InvoiceLine(invoice=invoice, shipment_id=shipment_id, description=f'Shipment {tracking_number}', amount=price)
+                for _customer_id, _company_id, shipment_id, tracking_number, price in rows
+            )
+
+        # primary keys come back from the INSERT, so the lines can reference them
+        Invoice.objects.bulk_create(invoices)
+        InvoiceLine.objects.bulk_create(lines, batch_size=1000)
+    return [invoice.pk for invoice in invoices]
+
+
+def render_document(invoice):
+    """
+    Render one invoice (a dict built by document_payloads) and store it in the
+    private `invoices` storage. Runs in the worker processes; returns
+    (invoice id, storage name).
+    """
+    content = render_to_string('invoicing/invoice.html', {'invoice': invoice})
+    storage = Invoice._meta.get_field('document').storage
+    name = f'invoices/{invoice["number"]}.html'
+    # re-rendering after an interrupted run replaces the file instead of adding a suffixed copy
+    if storage.exists(name):
+        storage.delete(name)
+    return invoice['id'], storage.save(name, ContentFile(content.encode()))
+
+
+def document_payloads(invoice_ids):
+    """Everything render_document needs, read here so the workers run no queries."""
+    invoices = {
+        invoice['id']: {**invoice, 'lines': []}
+        for invoice in Invoice.objects.filter(pk__in=invoice_ids).values(
+            'id', 'number', 'period_start', 'period_end', 'subtotal', 'discount', 'tax', 'total',
+            'company__name', 'customer__company_name', 'customer__address',
+        )
+    }
+    lines = InvoiceLine.objects.filter(invoice_id__in=invoice_ids).order_by('invoice_id', 'id')
+    for invoice_id, description, amount in lines.values_list('invoice_id', 'description', 'amount'):
+        invoices[invoice_id]['lines'].append((description, amount))
+    return list(invoices.values())
+
+
+def render_documents(invoice_ids, pool=None, chunksize=16):
+    """
+    Render and attach the documents of the given invoices, across `pool`
+    (see apps.api.workers.process_pool) or inline when it is None.
+    """
+    payloads = document_payloads(invoice_ids)
+    if pool is None:
+        rendered = map(render_document, payloads)
+    else:
+        rendered = pool.map(render_document, payloads, chunksize=chunksize)
+
+    invoices = [Invoice(pk=invoice_id, document=name) for invoice_id, name in rendered]
+    Invoice.objects.bulk_update(invoices, ['document'], batch_size=1000)
+    return len(invoices)
+
+
+def approve(company_id, invoice_ids, user):
+    """Approve the company's draft invoices among `invoice_ids`; returns the ids approved."""
+    with transaction.atomic():
+        drafts = Invoice.objects.select_for_update().filter(company_id=company_id, pk__in=invoice_ids, status='draft')
+        approved = list(drafts.values_list('pk', flat=True))
+        Invoice.objects.filter(pk__in=approved).update(status='approved', approved_by=user, approved_at=timezone.now())
+    return approved
@@ -0,0 +1,77 @@
+import calendar
+import datetime
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.api import workers
+from apps.invoicing import billing
+from apps.invoicing.models import Invoice
+
+
+class Command(BaseCommand):
+    help = (
+        'Invoice the delivered shipments of a month, one invoice per customer, and render their documents. '
+        'Safe to re-run: an interrupted run picks up where it stopped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--period', help='Month to invoice, YYYY-MM (default: the previous month).')
+        parser.add_argument('--company', type=int, help='Only invoice this company id.')
+        parser.add_argument('--batch-size', type=int, default=settings.INVOICE_BATCH_SIZE, help='Customers per transaction.')
+        parser.add_argument(
+            '--workers', type=int, default=settings.INVOICE_RENDER_WORKERS,
+            help='Document rendering processes; 0 renders inline.',
+        )
+
+    def handle(self, *args, **options):
+        period_start, period_end = self.parse_period(options['period'])
+        company_id, batch_size = options['company'], options['batch_size']
+
+        invoices = 0
+        start = time.perf_counter()
+        for invoice_ids in billing.generate(period_start, period_end, company_id, batch_size):
+            invoices += len(invoice_ids)
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{invoices} invoices written')
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f'{period_start:%Y-%m}: {invoices} invoices in {elapsed:.2f} s, {invoices / elapsed if elapsed else 0:.0f} invoices/s'
+        )
+
+        # every invoice of the period still without a document, including
+        # those written by an earlier, interrupted run
+        unrendered = Invoice.objects.filter(period_start=period_start, period_end=period_end, document='')
+        if company_id is not None:
+            unrendered = unrendered.filter(company_id=company_id)
+        invoice_ids = list(unrendered.order_by('id').values_list('id', flat=True))
+
+        rendered = 0
+        start = time.perf_counter()
+        pool = workers.process_pool(options['workers']) if options['workers'] > 0 and invoice_ids else None
+        try:
+            for offset in range(0, len(invoice_ids), batch_size):
+                rendered += billing.render_documents(invoice_ids[offset:offset + batch_size], pool)
+                if options['verbosity'] > 1:
+                    self.stdout.write(f'{rendered} documents rendered')
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f'{rendered} documents in {elapsed:.2f} s, {rendered / elapsed if elapsed else 0:.0f} documents/s'
+        )
+
+    def parse_period(self, period):
+        if period is None:
+            last_month = timezone.localdate().replace(day=1) - datetime.timedelta(days=1)
+            year, month = last_month.year, last_month.month
+        else:
+            try:
+                year, month = (int(part) for part in period.split('-'))
+                datetime.date(year, month, 1)
+            except ValueError:
+                raise CommandError(f'Invalid period {period!r}: expected YYYY-MM.')
+        return datetime.date(year, month, 1), datetime.date(year, month, calendar.monthrange(year, month)[1])
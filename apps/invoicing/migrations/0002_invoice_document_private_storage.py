@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:43
+
+import apps.invoicing.models
+from django.core.files.storage import storages
+from django.db import migrations, models
+
+
+def move_documents(apps, schema_editor):
+    # documents rendered so far sit in public media; move them to the private storage
+    public, private = storages['default'], storages['invoices']
+    Invoice = apps.get_model('invoicing', 'Invoice')
+    names = Invoice.objects.using(schema_editor.connection.alias).exclude(document='').values_list('document', flat=True)
+    for name in names.iterator():
+        if public.exists(name):
+            if not private.exists(name):
+                with public.open(name) as file:
+                    private.save(name, file)
+            public.delete(name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoicing', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='invoice',
+            name='document',
+            field=models.FileField(blank=True, storage=apps.invoicing.models.invoice_storage, upload_to='invoices/'),
+        ),
+        migrations.RunPython(move_documents, migrations.RunPython.noop),
+    ]
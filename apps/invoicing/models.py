@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.core.files.storage import storages
+from django.db import models
+
+from apps.api.models import Company
+from apps.shipment.models import Shipment
+from apps.user.models import CustomerProfile
+
+
+def invoice_storage():
+    return storages['invoices']
+
+
+class Invoice(models.Model):
+    STATUS_CHOICES = [
+        ("draft", "Draft"),
+        ("approved", "Approved"),
+    ]
+
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='invoices')
+    customer = models.ForeignKey(CustomerProfile, on_delete=models.PROTECT, related_name='invoices')
+    number = models.CharField(max_length=64, unique=True)
+    period_start = models.DateField()
+    period_end = models.DateField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="draft")
+    subtotal = models.DecimalField(max_digits=14, decimal_places=2)
+    discount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    tax = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total = models.DecimalField(max_digits=14, decimal_places=2)
+    # rendered after the invoice is written; empty until then (see billing.render_documents).
+    # Private: served by InvoiceViewSet.document to the company's users only
+    document = models.FileField(upload_to='invoices/', blank=True, storage=invoice_storage)
+    approved_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='approved_invoices'
+    )
+    approved_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['company', 'period_start', 'status'], name='invoice_by_period'),
+        ]
+
+    def __str__(self):
+        return f"{self.number} ({self.status})"
+
+
+
+class InvoiceLine(models.Model):
+    invoice = models.ForeignKey(Invoice, on_delete=models.CASCADE, related_name='lines')
+    # one-to-one: a shipment is billed at most once, which is what makes
+    # invoice generation safe to re-run after an interruption
+    shipment = models.OneToOneField(Shipment, on_delete=models.PROTECT, related_name='invoice_line')
+    description = models.CharField(max_length=255)
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+
+    def __str__(self):
+        return f"{self.invoice_id}: {self.description} {self.amount}"
@@ -0,0 +1,37 @@
+from django.conf import settings
+from rest_framework import serializers
+from rest_framework.reverse import reverse
+
+from .models import Invoice, InvoiceLine
+
+
+class InvoiceSerializer(serializers.ModelSerializer):
+    # the company-scoped download view, never the storage location
+    document = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Invoice
+        fields = [
+            'id', 'number', 'customer', 'period_start', 'period_end', 'status',
+            'subtotal', 'discount', 'tax', 'total', 'document', 'approved_by', 'approved_at', 'created_at',
+        ]
+        read_only_fields = fields
+
+    def get_document(self, invoice) -> str | None:
+        if not invoice.document:
+            return None
+        return reverse('invoices-document', args=[invoice.pk], request=self.context.get('request'))
+
+
+class InvoiceLineSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = InvoiceLine
+        fields = ['shipment', 'description', 'amount']
+
+
+class InvoiceApprovalSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.INVOICE_MAX_APPROVALS,
+    )
@@ -0,0 +1,95 @@
+import datetime
+import shutil
+import tempfile
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import FileSystemStorage
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.api.models import Company
+from apps.invoicing import billing
+from apps.invoicing.models import Invoice, InvoiceLine
+from apps.shipment.models import Shipment
+from apps.user.models import CustomerProfile
+
+
+PERIOD = (datetime.date(2026, 9, 1), datetime.date(2026, 9, 30))
+
+
+class InvoicingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.company = Company.objects.create(name='Acme')
+        cls.other_company = Company.objects.create(name='Other')
+        cls.accountant = User.objects.create_user('Ann', 'Accountant', 'ann@acme.example', 'pw', role='accountant', company=cls.company)
+        cls.other_admin = User.objects.create_user('Olga', 'Admin', 'olga@other.example', 'pw', role='company_admin', company=cls.other_company)
+        # created here: profiles are provisioned once the transaction commits
+        cls.customers = [
+            CustomerProfile.objects.create(
+                user=User.objects.create_user('Cus', str(n), f'c{n}@acme.example', 'pw', role='customer', company=cls.company),
+                company_name=f'Customer {n}',
+            )
+            for n in range(2)
+        ]
+        delivered_at = timezone.make_aware(datetime.datetime(2026, 9, 15, 12))
+        Shipment.objects.bulk_create([
+            Shipment(
+                company=cls.company, customer=cls.customers[n % 2], tracking_number=f'T{n}', price=Decimal('10.05'),
+                status='delivered', status_updated_at=delivered_at,
+            )
+            for n in range(5)
+        ] + [
+            Shipment(company=cls.company, customer=cls.customers[0], tracking_number='OPEN', price=Decimal('99'), status='in_transit'),
+        ])
+
+    def setUp(self):
+        cache.clear()
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        storage = mock.patch.object(Invoice._meta.get_field('document'), 'storage', FileSystemStorage(location=media))
+        storage.start()
+        self.addCleanup(storage.stop)
+
+    def generate(self):
+        return [invoice_id for batch in billing.generate(*PERIOD, batch_size=1) for invoice_id in batch]
+
+    def test_one_invoice_per_customer(self):
+        self.assertEqual(len(self.generate()), 2)
+        invoices = {invoice.customer_id: invoice for invoice in Invoice.objects.all()}
+        self.assertEqual(invoices[self.customers[0].pk].total, Decimal('30.15'))
+        self.assertEqual(invoices[self.customers[1].pk].total, Decimal('20.10'))
+        self.assertFalse(InvoiceLine.objects.filter(shipment__tracking_number='OPEN').exists())
+
+        # re-running bills nothing twice
+        self.assertEqual(self.generate(), [])
+
+    def test_batch_read_before_a_concurrent_run(self):
+        rows = list(billing.billable_shipments(*PERIOD))
+        self.generate()  # the concurrent run commits first
+
+        batch = [(rows[0][0], rows[0][1], [row for row in rows if row[0] == rows[0][0]])]
+        self.assertEqual(billing._write_batch(batch, *PERIOD), [])
+        self.assertEqual(Invoice.objects.count(), 2)
+
+    def test_document_is_company_scoped(self):
+        invoice_ids = self.generate()
+        billing.render_documents(invoice_ids)
+        invoice = Invoice.objects.get(pk=invoice_ids[0])
+
+        client = APIClient()
+        client.force_authenticate(self.accountant)
+        url = client.get(f'/api/invoicing/invoices/{invoice.pk}/').json()['document']
+        self.assertEqual(url, f'http://testserver/api/invoicing/invoices/{invoice.pk}/document/')
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(invoice.number, b''.join(response.streaming_content).decode())
+
+        client.force_authenticate(self.other_admin)
+        self.assertEqual(client.get(url).status_code, 404)
+        self.assertEqual(APIClient().get(url).status_code, 403)
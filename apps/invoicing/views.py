@@ -0,0 +1,78 @@
+from django.http import FileResponse, Http404
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema
+from rest_framework import mixins, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from apps.api.serializers import compile_serializer
+from apps.user.permissions import CanApproveInvoices, IsAccountant, IsCompanyAdmin
+from . import billing
+from .models import Invoice, InvoiceLine
+from .serializers import InvoiceApprovalSerializer, InvoiceLineSerializer, InvoiceSerializer
+
+
+class InvoiceViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Invoices of the requesting user's company, written by `manage.py generate_invoices`.
+    `?status=draft|approved` and `?period=YYYY-MM` filter the list.
+    """
+    serializer_class = InvoiceSerializer
+
+    def get_permissions(self):
+        if self.action == 'approve':
+            permission_classes = [CanApproveInvoices]
+        else:
+            permission_classes = [IsAccountant | IsCompanyAdmin]
+        return [permission() for permission in permission_classes]
+
+    def get_queryset(self):
+        queryset = Invoice.objects.filter(company_id=self.request.user.company_id)
+        params = self.request.query_params
+        if params.get('status'):
+            queryset = queryset.filter(status=params['status'])
+        if params.get('period'):
+            year, _, month = params['period'].partition('-')
+            if year.isdigit() and month.isdigit():
+                queryset = queryset.filter(period_start__year=int(year), period_start__month=int(month))
+            else:
+                queryset = queryset.none()
+        return queryset.order_by('-period_start', 'number')
+
+    def get_serializer_class(self):
+        if self.action == 'approve':
+            return InvoiceApprovalSerializer
+        return super().get_serializer_class()
+
+    @action(detail=True, methods=['get'])
+    def lines(self, request, pk=None):
+        compiled = compile_serializer(InvoiceLineSerializer)
+        invoice = self.get_object()
+        queryset = InvoiceLine.objects.filter(invoice=invoice).order_by('id').values(*compiled.sources)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(compiled.many_from_rows(page))
+        return Response(compiled.many_from_rows(queryset))
+
+    @extend_schema(responses={(200, 'text/html'): OpenApiTypes.BINARY})
+    @action(detail=True, methods=['get'])
+    def document(self, request, pk=None):
+        """The rendered invoice, from private storage; 404 until it is rendered."""
+        invoice = self.get_object()
+        if not invoice.document:
+            raise Http404
+        response = FileResponse(
+            invoice.document.open('rb'), content_type='text/html; charset=utf-8', filename=f'{invoice.number}.html',
+        )
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+    @action(detail=False, methods=['post'])
+    def approve(self, request):
+        """Bulk-approve draft invoices; ids that are not drafts of the company are skipped."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        approved = billing.approve(request.user.company_id, serializer.validated_data['ids'], request.user)
+        return Response({'approved': approved})
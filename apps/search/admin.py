@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.contrib import messages
+
+from .backends import get_backend
+
+
+class SearchIndexAdminMixin:
+    """
+    Answers the changelist search box from the search index instead of
+    `icontains` over joined tables. `search_user_field` is the lookup of the
+    user id on the admin's model. Keep `search_fields` set: the box only
+    shows when it is. At most SEARCH_ADMIN_MAX_RESULTS matches are listed,
+    with a message when there may be more.
+    """
+    search_user_field = 'user_id'
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return super().get_search_results(request, queryset, search_term)
+        limit = settings.SEARCH_ADMIN_MAX_RESULTS
+        rows = get_backend().search(search_term, limit=limit)
+        if len(rows) >= limit:
+            self.message_user(
+                request,
+                f'Only the best {limit} matches of the search index are listed; refine the search to narrow them down.',
+                messages.WARNING,
+            )
+        user_ids = [row['user_id'] for row in rows]
+        return queryset.filter(**{f'{self.search_user_field}__in': user_ids}), False
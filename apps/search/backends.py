@@ -0,0 +1,179 @@
+"""
+Search backends over SearchDocument.
+
+PostgresBackend ranks full-text matches of a prefix tsquery (every query
+token must prefix a token of the document) against the GIN-indexed vector;
+for queries matching more than SEARCH_MAX_CANDIDATES documents, the best of
+the first SEARCH_MAX_CANDIDATES found are returned (typing more narrows it).
+MemoryBackend answers the same queries from a per-process sorted token
+index, for SQLite and tests; it only sees changes made by its own process
+once loaded, which suits a development server or a test run.
+
+Both return rows of RESULT_FIELDS plus a `rank`, best first.
+"""
+import bisect
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import F
+
+from .documents import tokenize
+from .models import SearchDocument
+
+
+RESULT_FIELDS = ('user_id', 'name', 'email', 'role', 'phone', 'company_name')
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """The configured backend (SEARCH_BACKEND), 'auto' picking by database vendor."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                name = settings.SEARCH_BACKEND
+                if name == 'auto':
+                    name = 'postgres' if connections[DEFAULT_DB_ALIAS].vendor == 'postgresql' else 'memory'
+                _backend = PostgresBackend() if name == 'postgres' else MemoryBackend()
+    return _backend
+
+
+class PostgresBackend:
+    def index(self, documents, using=DEFAULT_DB_ALIAS):
+        # imported here: only PostgreSQL deployments need the contrib.postgres expressions
+        from django.contrib.postgres.search import SearchVector
+
+        SearchDocument.objects.using(using).filter(pk__in=[document.pk for document in documents]).update(
+            vector=(
+                SearchVector('name', 'company_name', weight='A', config='simple')
+                + SearchVector('text', weight='B', config='simple')
+            ),
+        )
+
+    def remove(self, user_ids):
+        pass  # documents are deleted with their user
+
+    def search(self, query, company_id=None, role=None, offset=0, limit=20):
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        # tokens are \w+ only, so they cannot inject tsquery operators
+        tsquery = SearchQuery(' & '.join(f'{token}:*' for token in tokens), search_type='raw', config='simple')
+
+        matches = SearchDocument.objects.filter(vector=tsquery)
+        if company_id is not None:
+            matches = matches.filter(company_id=company_id)
+        if role:
+            matches = matches.filter(role=role)
+        # ranking reads every row it ranks, so a short, broad prefix ("jo")
+        # would rank a large share of the table: only the first
+        # SEARCH_MAX_CANDIDATES matches off the index are ranked
+        candidates = matches.values('pk')[:settings.SEARCH_MAX_CANDIDATES]
+        return list(
+            SearchDocument.objects.filter(pk__in=candidates)
+            .annotate(rank=SearchRank(F('vector'), tsquery))
+            .order_by('-rank', 'name', 'user_id')
+            .values(*RESULT_FIELDS, 'rank')[offset:offset + limit]
+        )
+
+
+class MemoryBackend:
+    """
+    Sorted token list plus token -> user ids postings; a query token matches
+    the contiguous run of tokens it prefixes (found with bisect). Loaded from
+    the table on first use, then kept current by index() / remove().
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._documents = {}  # user_id -> (company_id, tokens, result row)
+        self._postings = {}   # token -> set of user ids
+        self._tokens = []     # sorted keys of _postings
+
+    def _load(self):
+        rows = SearchDocument.objects.values_list('company_id', 'text', *RESULT_FIELDS).iterator(chunk_size=2000)
+        for company_id, text, *result in rows:
+            self._add(company_id, text, dict(zip(RESULT_FIELDS, result)))
+        self._loaded = True
+
+    def _add(self, company_id, text, row):
+        self._discard(row['user_id'])
+        tokens = frozenset(text.split())
+        self._documents[row['user_id']] = (company_id, tokens, row)
+        for token in tokens:
+            users = self._postings.get(token)
+            if users is None:
+                users = self._postings[token] = set()
+                bisect.insort(self._tokens, token)
+            users.add(row['user_id'])
+
+    def _discard(self, user_id):
+        document = self._documents.pop(user_id, None)
+        if document is None:
+            return
+        for token in document[1]:
+            users = self._postings[token]
+            users.discard(user_id)
+            if not users:
+                del self._postings[token]
+                del self._tokens[bisect.bisect_left(self._tokens, token)]
+
+    def index(self, documents, using=DEFAULT_DB_ALIAS):
+        with self._lock:
+            # before the first search there is nothing to update: _load reads the table
+            if self._loaded:
+                for document in documents:
+                    row = {field: getattr(document, field) for field in RESULT_FIELDS}
+                    self._add(document.company_id, document.text, row)
+
+    def remove(self, user_ids):
+        with self._lock:
+            for user_id in user_ids:
+                self._discard(user_id)
+
+    def _prefixed(self, prefix):
+        """{user_id: best score} of the documents with a token starting with `prefix`."""
+        scores = {}
+        start = bisect.bisect_left(self._tokens, prefix)
+        for token in self._tokens[start:bisect.bisect_right(self._tokens, prefix + '\U0010ffff')]:
+            # an exact token scores 1, a longer one by how much of it the prefix covers
+            score = len(prefix) / len(token)
+            for user_id in self._postings[token]:
+                if score > scores.get(user_id, 0):
+                    scores[user_id] = score
+        return scores
+
+    def search(self, query, company_id=None, role=None, offset=0, limit=20):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        with self._lock:
+            if not self._loaded:
+                self._load()
+
+            # rarest match first, so the intersection shrinks fast
+            matches = sorted((self._prefixed(token) for token in tokens), key=len)
+            ranked = []
+            for user_id, score in matches[0].items():
+                total = score
+                for other in matches[1:]:
+                    if user_id not in other:
+                        break
+                    total += other[user_id]
+                else:
+                    document_company_id, _tokens, row = self._documents[user_id]
+                    if company_id is not None and document_company_id != company_id:
+                        continue
+                    if role and row['role'] != role:
+                        continue
+                    ranked.append((-total / len(tokens), row['name'], user_id, row))
+
+        ranked.sort(key=lambda item: item[:3])
+        return [{**row, 'rank': -rank} for rank, _name, _user_id, row in ranked[offset:offset + limit]]
@@ -0,0 +1,99 @@
+import re
+import threading
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from apps.user.provisioning import ROLE_PROFILES
+from .models import SearchDocument
+
+
+TOKEN = re.compile(r'\w+')
+
+# reverse one-to-one accessor of each role profile, e.g. 'customer_profile'
+PROFILE_RELATIONS = {
+    role: model._meta.get_field('user').remote_field.related_name
+    for role, model in ROLE_PROFILES.items() if model is not None
+}
+
+# User fields copied into the document; saves touching none of them skip the sync
+USER_FIELDS = frozenset({'first_name', 'last_name', 'email', 'role', 'company'})
+
+DOCUMENT_FIELDS = ['company', 'role', 'name', 'email', 'phone', 'company_name', 'text']
+
+# Users waiting for the current transaction to commit, per thread and database alias
+_pending = threading.local()
+
+
+def tokenize(text):
+    return TOKEN.findall(text.lower())
+
+
+def build_document(user):
+    profile = None
+    relation = PROFILE_RELATIONS.get(user.role)
+    if relation is not None:
+        try:
+            profile = getattr(user, relation)
+        except ObjectDoesNotExist:  # not provisioned yet
+            pass
+
+    name = user.get_full_name()
+    phone = (profile.phone or '') if profile is not None else ''
+    company_name = getattr(profile, 'company_name', '') or ''
+    tokens = tokenize(f'{name} {user.email} {company_name}')
+    digits = ''.join(character for character in phone if character.isdigit())
+    # the number's suffixes down to 4 digits: as prefixes match, digits typed
+    # from any position of the number (with or without area code) find it
+    tokens.extend(digits[start:] for start in range(max(len(digits) - 3, 1 if digits else 0)))
+
+    return SearchDocument(
+        user_id=user.pk,
+        company_id=user.company_id,
+        role=user.role,
+        name=name,
+        email=user.email,
+        phone=phone,
+        company_name=company_name,
+        text=' '.join(tokens),
+    )
+
+
+def sync_users(user_ids, using=DEFAULT_DB_ALIAS):
+    """(Re)build the documents of the given users, in one upsert."""
+    from .backends import get_backend
+
+    users = (
+        get_user_model().objects.using(using)
+        .filter(pk__in=list(user_ids))
+        .select_related(*PROFILE_RELATIONS.values())
+    )
+    documents = [build_document(user) for user in users]
+    if not documents:
+        return []
+
+    SearchDocument.objects.using(using).bulk_create(
+        documents, update_conflicts=True, unique_fields=['user'], update_fields=DOCUMENT_FIELDS,
+    )
+    get_backend().index(documents, using)
+    return documents
+
+
+def schedule_sync(user_ids, using=DEFAULT_DB_ALIAS):
+    """
+    Sync the given users' documents once the current transaction commits, all
+    users saved within one transaction together (a user and their profile
+    are often saved back to back). Runs right away outside an atomic block.
+    """
+    if not hasattr(_pending, 'queues'):
+        _pending.queues = {}
+    _pending.queues.setdefault(using, set()).update(user_ids)
+    transaction.on_commit(lambda: _flush(using), using=using)
+
+
+def _flush(using):
+    user_ids = _pending.queues.pop(using, None)
+    if user_ids:
+        # users of a rolled back transaction no longer exist and are skipped
+        sync_users(user_ids, using)
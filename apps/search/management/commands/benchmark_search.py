@@ -0,0 +1,78 @@
+import random
+import statistics
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from apps.api.models import Company
+from apps.search.backends import get_backend
+from apps.search.documents import sync_users
+from apps.search.models import SearchDocument
+
+
+SYLLABLES = ('an', 'bel', 'car', 'do', 'el', 'fin', 'ga', 'hal', 'is', 'jo', 'ka', 'lin', 'mar', 'no', 'or',
+             'pe', 'ri', 'sa', 'to', 'ul', 'va', 'wil', 'yo', 'zen')
+
+
+class Command(BaseCommand):
+    help = 'Measure search latency (ms) over a throw-away company of synthetic users, through the configured backend.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--documents', type=int, default=100000)
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+
+        def word():
+            return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+
+        User = get_user_model()
+        company = Company.objects.create(name=f'search-benchmark-{uuid.uuid4().hex[:12]}')
+        try:
+            start = time.perf_counter()
+            names = []
+            for offset in range(0, options['documents'], 5000):
+                users = []
+                for n in range(offset, min(offset + 5000, options['documents'])):
+                    first, last = word(), word()
+                    names.append((first, last))
+                    user = User(
+                        first_name=first, last_name=last, email=f'{first}.{last}.{n}@{company.pk}.example'.lower(),
+                        role='driver', company=company,
+                    )
+                    user.set_unusable_password()
+                    users.append(user)
+                # no signals on bulk_create: documents are built explicitly
+                sync_users([user.pk for user in User.objects.bulk_create(users)])
+            self.stdout.write(f'{options["documents"]} documents indexed in {time.perf_counter() - start:.1f} s')
+            if connection.vendor == 'postgresql':
+                # freshly loaded rows have no planner statistics yet
+                with connection.cursor() as cursor:
+                    cursor.execute(f'ANALYZE {SearchDocument._meta.db_table}')
+
+            backend = get_backend()
+            for label, make_query in (
+                ('2-letter prefix', lambda first, last: first[:2]),
+                ('name prefix', lambda first, last: first[:4]),
+                ('full name', lambda first, last: f'{first} {last}'),
+                ('first + last prefix', lambda first, last: f'{first} {last[:3]}'),
+            ):
+                timings = []
+                for first, last in rng.sample(names, min(options['queries'], len(names))):
+                    query = make_query(first, last)
+                    start = time.perf_counter()
+                    backend.search(query, company_id=company.pk, limit=21)
+                    timings.append((time.perf_counter() - start) * 1000)
+                timings.sort()
+                self.stdout.write(
+                    f'{label}: p50 {statistics.median(timings):.1f} ms, '
+                    f'p95 {timings[int(len(timings) * 0.95) - 1]:.1f} ms, max {timings[-1]:.1f} ms'
+                )
+        finally:
+            User.objects.filter(company=company).delete()
+            company.delete()
@@ -0,0 +1,34 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from apps.search.documents import sync_users
+
+
+class Command(BaseCommand):
+    help = (
+        'Build the search document of every user, e.g. after installing the search app or '
+        'after writes that bypassed the signals (raw SQL, fixtures, queryset.update()).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Users per upsert.')
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.order_by('pk')
+        batch_size = options['batch_size']
+
+        documents, last_pk = 0, 0
+        start = time.perf_counter()
+        while True:
+            # keyset pagination: each batch is an index range scan, however far in
+            user_ids = list(users.filter(pk__gt=last_pk).values_list('pk', flat=True)[:batch_size])
+            if not user_ids:
+                break
+            documents += len(sync_users(user_ids))
+            last_pk = user_ids[-1]
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{documents} documents')
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f'{documents} documents in {elapsed:.2f} s, {documents / elapsed if elapsed else 0:.0f} documents/s')
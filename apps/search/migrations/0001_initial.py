@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:22
+
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_vector_index(apps, schema_editor):
+    # GIN indexes are PostgreSQL only; elsewhere search uses the in-memory index
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS searchdocument_vector ON search_searchdocument USING gin (vector)'
+        )
+
+
+def drop_vector_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS searchdocument_vector')
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('api', '0001_initial'),
+        ('user', '0005_driverprofile_capacity_driverprofile_latitude_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('role', models.CharField(max_length=50)),
+                ('name', models.CharField(max_length=101)),
+                ('email', models.EmailField(max_length=255)),
+                ('phone', models.CharField(blank=True, max_length=20)),
+                ('company_name', models.CharField(blank=True, max_length=255)),
+                ('text', models.TextField(blank=True)),
+                ('vector', django.contrib.postgres.search.SearchVectorField(editable=False, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('company', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.company')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['company', 'role'], name='searchdocument_scope')],
+            },
+        ),
+        migrations.RunPython(create_vector_index, drop_vector_index),
+    ]
@@ -0,0 +1,75 @@
+import re
+
+from django.db import migrations
+
+
+TOKEN = re.compile(r'\w+')
+
+# reverse one-to-one accessor of each role's profile, as of this migration
+PROFILE_RELATIONS = {
+    'dispatcher': 'dispatcher_profile',
+    'warehouse_staff': 'warehouse_profile',
+    'driver': 'driver_profile',
+    'customer': 'customer_profile',
+    'accountant': 'accountant_profile',
+}
+
+BATCH_SIZE = 1000
+
+
+def build_document(SearchDocument, user):
+    # a frozen copy of documents.build_document: historical models have no custom methods
+    profile = getattr(user, PROFILE_RELATIONS[user.role], None) if user.role in PROFILE_RELATIONS else None
+    name = f'{user.first_name} {user.last_name}'.strip()
+    phone = (profile.phone or '') if profile is not None else ''
+    company_name = getattr(profile, 'company_name', '') or ''
+    tokens = TOKEN.findall(f'{name} {user.email} {company_name}'.lower())
+    digits = ''.join(character for character in phone if character.isdigit())
+    tokens.extend(digits[start:] for start in range(max(len(digits) - 3, 1 if digits else 0)))
+    return SearchDocument(
+        user_id=user.pk, company_id=user.company_id, role=user.role, name=name, email=user.email,
+        phone=phone, company_name=company_name, text=' '.join(tokens),
+    )
+
+
+def backfill_documents(apps, schema_editor):
+    """Build the documents of the users that existed before the search app (see rebuild_search_index)."""
+    User = apps.get_model('user', 'User')
+    SearchDocument = apps.get_model('search', 'SearchDocument')
+    using = schema_editor.connection.alias
+
+    vector = None
+    if schema_editor.connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchVector
+
+        vector = (
+            SearchVector('name', 'company_name', weight='A', config='simple')
+            + SearchVector('text', weight='B', config='simple')
+        )
+
+    users = User.objects.using(using).select_related(*PROFILE_RELATIONS.values()).order_by('pk')
+    last_pk = 0
+    while True:
+        batch = list(users.filter(pk__gt=last_pk)[:BATCH_SIZE])
+        if not batch:
+            break
+        documents = [build_document(SearchDocument, user) for user in batch]
+        SearchDocument.objects.using(using).bulk_create(
+            documents, update_conflicts=True, unique_fields=['user'],
+            update_fields=['company', 'role', 'name', 'email', 'phone', 'company_name', 'text'],
+        )
+        if vector is not None:
+            SearchDocument.objects.using(using).filter(pk__in=[user.pk for user in batch]).update(vector=vector)
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_initial'),
+        ('user', '0005_driverprofile_capacity_driverprofile_latitude_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models
+
+from apps.api.models import Company
+
+
+class SearchDocument(models.Model):
+    """
+    Denormalized, searchable copy of a user and their role profile, rebuilt
+    whenever either is saved (see documents.py).
+
+    On PostgreSQL `vector` holds the weighted full-text vector, GIN-indexed
+    (created by migration 0001 on PostgreSQL only); on other databases it
+    stays empty and searches use the in-memory index (backends.MemoryBackend).
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='search_document'
+    )
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    role = models.CharField(max_length=50)
+    name = models.CharField(max_length=101)
+    email = models.EmailField(max_length=255)
+    phone = models.CharField(max_length=20, blank=True)
+    company_name = models.CharField(max_length=255, blank=True)
+    # every searchable token, lowercased: name, email parts, company name, phone digit suffixes
+    text = models.TextField(blank=True)
+    vector = SearchVectorField(null=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['company', 'role'], name='searchdocument_scope'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} <{self.email}>"
@@ -0,0 +1,17 @@
+from rest_framework import serializers
+
+
+class SearchResultSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    email = serializers.EmailField()
+    role = serializers.CharField()
+    phone = serializers.CharField(allow_blank=True)
+    company_name = serializers.CharField(allow_blank=True)
+    rank = serializers.FloatField()
+
+
+class SearchPageSerializer(serializers.Serializer):
+    next = serializers.URLField(allow_null=True)
+    previous = serializers.URLField(allow_null=True)
+    results = SearchResultSerializer(many=True)
@@ -0,0 +1,38 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.user.provisioning import ROLE_PROFILES
+from .backends import get_backend
+from .documents import USER_FIELDS, schedule_sync
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User, dispatch_uid='sync_user_search_document')
+def sync_user_search_document(sender, instance, raw=False, using=None, update_fields=None, **kwargs):
+    """
+    Rebuilds the user's search document after commit. Saves limited to other
+    fields (last_login, password, ...) leave it alone. Bulk writes send no
+    signals; they call schedule_sync directly.
+    """
+    if raw or (update_fields is not None and not USER_FIELDS.intersection(update_fields)):
+        return
+    schedule_sync([instance.pk], using)
+
+
+def sync_profile_search_document(sender, instance, raw=False, using=None, **kwargs):
+    if not raw:
+        schedule_sync([instance.user_id], using)
+
+
+for model in {model for model in ROLE_PROFILES.values() if model is not None}:
+    post_save.connect(
+        sync_profile_search_document, sender=model, dispatch_uid=f'sync_{model._meta.model_name}_search_document',
+    )
+
+
+@receiver(post_delete, sender=User, dispatch_uid='remove_user_search_document')
+def remove_user_search_document(sender, instance, **kwargs):
+    # the row goes with the user (CASCADE); in-memory indexes need telling
+    get_backend().remove([instance.pk])
@@ -0,0 +1,65 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.api.models import Company
+from apps.search import backends
+from apps.search.documents import sync_users
+
+
+class SearchViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.company = Company.objects.create(name='Acme')
+        other_company = Company.objects.create(name='Other')
+        cls.dispatcher = User.objects.create_user('Dora', 'Dispatcher', 'dora@acme.example', 'pw', role='dispatcher', company=cls.company)
+        cls.drivers = [
+            User.objects.create_user('Jonas', f'Driver{n}', f'jonas.{n}@acme.example', 'pw', role='driver', company=cls.company)
+            for n in range(3)
+        ]
+        cls.customer = User.objects.create_user('Jonas', 'Customer', 'jonas.c@acme.example', 'pw', role='customer', company=cls.company)
+        cls.outsider = User.objects.create_user('Jonas', 'Outsider', 'jonas@other.example', 'pw', role='driver', company=other_company)
+        # documents are built after commit, which a TestCase never does
+        sync_users(User.objects.values_list('pk', flat=True))
+
+    def setUp(self):
+        cache.clear()
+        # a fresh in-memory index per test, loaded from this test's documents
+        backend = mock.patch.object(backends, '_backend', backends.MemoryBackend())
+        backend.start()
+        self.addCleanup(backend.stop)
+        self.client = APIClient()
+        self.client.force_authenticate(self.dispatcher)
+
+    def search(self, **params):
+        response = self.client.get('/api/search/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_company_isolation(self):
+        ids = {row['id'] for row in self.search(q='jonas', limit=10)['results']}
+        self.assertEqual(ids, {user.pk for user in [*self.drivers, self.customer]})
+
+    def test_role_filter(self):
+        results = self.search(q='jonas', role='customer')['results']
+        self.assertEqual([row['id'] for row in results], [self.customer.pk])
+
+    def test_pagination(self):
+        first = self.search(q='jonas driver', limit=2)
+        self.assertEqual(len(first['results']), 2)
+        self.assertIsNone(first['previous'])
+        self.assertIn('offset=2', first['next'])
+
+        second = self.client.get(first['next']).json()
+        self.assertEqual(len(second['results']), 1)
+        self.assertIsNone(second['next'])
+        self.assertIsNotNone(second['previous'])
+        ids = [row['id'] for row in first['results'] + second['results']]
+        self.assertEqual(sorted(ids), sorted(user.pk for user in self.drivers))
+
+    def test_short_query(self):
+        self.assertEqual(self.client.get('/api/search/', {'q': 'j'}).status_code, 400)
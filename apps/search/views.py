@@ -0,0 +1,81 @@
+from django.conf import settings
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework import generics, status
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from apps.api.tracing import span
+from apps.user.permissions import IsAccountant, IsCompanyAdmin, IsDispatcher
+from .backends import get_backend
+from .serializers import SearchPageSerializer
+
+
+class SearchView(generics.GenericAPIView):
+    """
+    Ranked typeahead search over the company's users and their profiles: name,
+    email, phone and customer company name. Every word of `?q=` must start a
+    word of the match; `?role=` narrows by role. Paginated with `limit` and
+    `offset`, without a total count (counting every match is what a search
+    index is there to avoid).
+    """
+    serializer_class = SearchPageSerializer
+    permission_classes = [IsDispatcher | IsAccountant | IsCompanyAdmin]
+
+    @extend_schema(parameters=[
+        OpenApiParameter('q', str, required=True, description='Words to match, each as a word prefix.'),
+        OpenApiParameter('role', str, description='Only users with this role.'),
+        OpenApiParameter('limit', int),
+        OpenApiParameter('offset', int),
+    ])
+    def get(self, request, *args, **kwargs):
+        query = request.query_params.get('q', '').strip()
+        if len(query) < settings.SEARCH_MIN_QUERY_LENGTH:
+            return Response(
+                {'q': [f'Enter at least {settings.SEARCH_MIN_QUERY_LENGTH} characters.']},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            limit = min(int(request.query_params.get('limit', settings.REST_FRAMEWORK['PAGE_SIZE'])), settings.SEARCH_MAX_PAGE_SIZE)
+            offset = int(request.query_params.get('offset', 0))
+        except ValueError:
+            return Response({'limit': ['Expected integers for limit and offset.']}, status=status.HTTP_400_BAD_REQUEST)
+        limit, offset = max(limit, 1), max(offset, 0)
+
+        if request.user.company_id is None:
+            rows = []  # company_id=None would search every company
+        else:
+            with span('search.query', query_length=len(query)):
+                # one row more than the page tells whether there is a next page
+                rows = get_backend().search(
+                    query,
+                    company_id=request.user.company_id,
+                    role=request.query_params.get('role') or None,
+                    offset=offset,
+                    limit=limit + 1,
+                )
+
+        url = request.build_absolute_uri()
+        next_url = replace_query_param(url, 'offset', offset + limit) if len(rows) > limit else None
+        if offset <= 0:
+            previous_url = None
+        elif offset <= limit:
+            previous_url = remove_query_param(url, 'offset')
+        else:
+            previous_url = replace_query_param(url, 'offset', offset - limit)
+
+        return Response({
+            'next': next_url,
+            'previous': previous_url,
+            'results': [
+                {
+                    'id': row['user_id'],
+                    'name': row['name'],
+                    'email': row['email'],
+                    'role': row['role'],
+                    'phone': row['phone'],
+                    'company_name': row['company_name'],
+                    'rank': round(row['rank'], 4),
+                }
+                for row in rows[:limit]
+            ],
+        })
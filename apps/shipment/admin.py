@@ -0,0 +1,35 @@
+from django.contrib import admin
+
+from .models import Shipment, ShipmentEvent
+
+
+class ShipmentEventInline(admin.TabularInline):
+    model = ShipmentEvent
+    fields = ('occurred_at', 'status', 'location', 'recorded_by', 'created_at')
+    readonly_fields = fields
+    ordering = ('occurred_at',)
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Shipment)
+class ShipmentAdmin(admin.ModelAdmin):
+    list_display = ('tracking_number', 'company', 'status', 'status_updated_at', 'driver', 'customer', 'price', 'created_at')
+    search_fields = ('tracking_number', 'company__name')
+    list_filter = ('status', 'company')
+    ordering = ('-created_at',)
+    list_select_related = ('company', 'driver__user', 'customer__user')
+    raw_id_fields = ('driver', 'customer')
+    # status only changes through scans, so it stays in step with the event log
+    readonly_fields = ('status', 'status_updated_at', 'created_at')
+    inlines = [ShipmentEventInline]
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if not change:
+            ShipmentEvent.objects.create(
+                shipment=obj, status=obj.status, occurred_at=obj.status_updated_at, recorded_by=request.user,
+            )
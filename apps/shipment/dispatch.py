@@ -0,0 +1,166 @@
+"""
+Automatic dispatch: assign a company's pending pickups to its available drivers.
+
+A pickup is a shipment still 'created', without a driver, with pickup
+coordinates. A driver is available when active, with a vehicle, checked in
+recently (DISPATCH_CHECK_IN_MAX_AGE) and with spare capacity: `capacity`
+minus their open shipments. The assignment itself is solver.solve.
+"""
+import datetime
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from apps.api import workers
+from apps.api.tracing import span
+from apps.user.models import DriverProfile
+from .models import CLOSED_STATUSES, Shipment
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Return the shared region-solving process pool, or None when DISPATCH_WORKERS is 0."""
+    global _executor
+    if settings.DISPATCH_WORKERS <= 0:
+        return None
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = workers.process_pool(settings.DISPATCH_WORKERS)
+    return _executor
+
+
+def pending_pickups(company_id, shipment_ids=None):
+    queryset = Shipment.objects.filter(
+        company_id=company_id,
+        status='created',
+        driver__isnull=True,
+        pickup_latitude__isnull=False,
+        pickup_longitude__isnull=False,
+    )
+    if shipment_ids is not None:
+        queryset = queryset.filter(pk__in=shipment_ids)
+    return queryset
+
+
+def available_drivers(company_id):
+    """Drivers that can take pickups, annotated with their `spare` capacity."""
+    checked_in_since = timezone.now() - datetime.timedelta(seconds=settings.DISPATCH_CHECK_IN_MAX_AGE)
+    return (
+        DriverProfile.objects
+        .filter(
+            user__company_id=company_id,
+            user__is_active=True,
+            last_check_in__gte=checked_in_since,
+            latitude__isnull=False,
+            longitude__isnull=False,
+        )
+        .exclude(vehicle_assigned='')
+        .annotate(spare=F('capacity') - Count('shipments', filter=~Q(shipments__status__in=CLOSED_STATUSES)))
+        .filter(spare__gt=0)
+    )
+
+
+def plan(company_id, shipment_ids=None, pool=None):
+    """
+    Propose a driver for each pending pickup (all of them, or those among
+    `shipment_ids`). Returns ([(shipment_id, driver_id, distance_km)], [unassigned shipment ids]).
+    """
+    # NumPy is a heavy import, paid only by the processes that dispatch
+    import numpy as np
+
+    from . import solver
+
+    pickups = list(
+        pending_pickups(company_id, shipment_ids)
+        .order_by('id')
+        .values_list('id', 'pickup_latitude', 'pickup_longitude')[:settings.DISPATCH_MAX_JOBS]
+    )
+    drivers = list(available_drivers(company_id).values_list('id', 'latitude', 'longitude', 'spare'))
+    if not pickups or not drivers:
+        return [], [shipment_id for shipment_id, _lat, _lng in pickups]
+
+    pickup_ids = np.array([pickup[0] for pickup in pickups])
+    driver_ids = np.array([driver[0] for driver in drivers])
+    with span('dispatch.solve', jobs=len(pickups), drivers=len(drivers)):
+        assignment, travelled = solver.solve(
+            [pickup[1:] for pickup in pickups],
+            [driver[1:3] for driver in drivers],
+            [driver[3] for driver in drivers],
+            max_distance_km=settings.DISPATCH_MAX_DISTANCE_KM or None,
+            region_size=settings.DISPATCH_REGION_SIZE,
+            rounds=settings.DISPATCH_LOCAL_SEARCH_ROUNDS,
+            pool=pool if pool is not None else get_executor(),
+        )
+
+    assigned = assignment != solver.UNASSIGNED
+    assignments = list(zip(
+        pickup_ids[assigned].tolist(),
+        driver_ids[assignment[assigned]].tolist(),
+        travelled[assigned].round(3).tolist(),
+    ))
+    return assignments, pickup_ids[~assigned].tolist()
+
+
+def assign(company_id, shipment_ids=None, pool=None):
+    """
+    Plan and apply: set the driver of every pickup that is still pending,
+    as long as the driver still has spare capacity.
+    Returns the same ([(shipment_id, driver_id, distance_km)], [unassigned ids])
+    as plan(), less the pickups assigned or cancelled in the meantime; those
+    whose driver filled up meanwhile move to the unassigned ids.
+    """
+    assignments, unassigned = plan(company_id, shipment_ids, pool)
+
+    with transaction.atomic():
+        # The drivers' spare capacity is checked again under their row locks
+        # (taken first, in id order), as a concurrent assign may have used it
+        # up since planning; pickups over it are left unassigned.
+        driver_ids = sorted({driver_id for _shipment_id, driver_id, _distance in assignments})
+        spare = {}
+        for offset in range(0, len(driver_ids), 1000):
+            chunk = driver_ids[offset:offset + 1000]
+            spare.update(
+                DriverProfile.objects.select_for_update().filter(pk__in=chunk).order_by('pk').values_list('pk', 'capacity')
+            )
+            open_shipments = (
+                Shipment.objects.filter(driver_id__in=chunk).exclude(status__in=CLOSED_STATUSES)
+                .order_by().values('driver').annotate(count=Count('pk')).values_list('driver', 'count')
+            )
+            for driver_id, count in open_shipments:
+                spare[driver_id] -= count
+
+        # a pickup assigned (or cancelled) meanwhile keeps what it has
+        planned = sorted(shipment_id for shipment_id, _driver_id, _distance in assignments)
+        still_pending = set()
+        for offset in range(0, len(planned), 1000):
+            still_pending.update(
+                pending_pickups(company_id, planned[offset:offset + 1000])
+                .select_for_update()
+                .order_by('pk')
+                .values_list('pk', flat=True)
+            )
+
+        kept = []
+        for assignment in assignments:
+            shipment_id, driver_id, _distance = assignment
+            if shipment_id not in still_pending:
+                continue
+            if spare.get(driver_id, 0) > 0:
+                spare[driver_id] -= 1
+                kept.append(assignment)
+            else:
+                unassigned.append(shipment_id)
+        Shipment.objects.bulk_update(
+            [Shipment(pk=shipment_id, driver_id=driver_id) for shipment_id, driver_id, _distance in kept],
+            ['driver'],
+            batch_size=1000,
+        )
+    return kept, sorted(unassigned)
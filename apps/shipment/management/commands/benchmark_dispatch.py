@@ -0,0 +1,64 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.api import workers
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure the dispatch solver on synthetic pickups clustered around cities: '
+        'time, share assigned and mean distance, greedy only vs with local search.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jobs', type=int, nargs='+', default=[1000, 10000, 50000])
+        parser.add_argument('--jobs-per-driver', type=int, default=15)
+        parser.add_argument('--capacity', type=int, default=20)
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Region solving pool size; 0 solves inline.')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        import numpy as np
+
+        from apps.shipment import solver
+
+        rng = np.random.default_rng(options['seed'])
+        # ~40 cities across central Europe, pickups and drivers within ~30 km of one
+        cities = rng.uniform((44.0, -2.0), (54.0, 20.0), size=(40, 2))
+
+        def around_cities(count):
+            return cities[rng.integers(0, len(cities), count)] + rng.normal(0, 0.25, (count, 2))
+
+        pool = workers.process_pool(options['workers']) if options['workers'] > 0 else None
+        try:
+            if pool is not None:
+                # start the workers before measuring
+                list(pool.map(abs, range(options['workers'])))
+
+            for job_count in options['jobs']:
+                driver_count = max(1, job_count // options['jobs_per_driver'])
+                job_coords, driver_coords = around_cities(job_count), around_cities(driver_count)
+                capacities = np.full(driver_count, options['capacity'])
+
+                for label, rounds in (('greedy', 0), ('local search', settings.DISPATCH_LOCAL_SEARCH_ROUNDS)):
+                    start = time.perf_counter()
+                    assignment, travelled = solver.solve(
+                        job_coords, driver_coords, capacities,
+                        max_distance_km=settings.DISPATCH_MAX_DISTANCE_KM or None,
+                        region_size=settings.DISPATCH_REGION_SIZE,
+                        rounds=rounds,
+                        pool=pool,
+                    )
+                    elapsed = time.perf_counter() - start
+                    assigned = assignment != solver.UNASSIGNED
+                    self.stdout.write(
+                        f'{job_count} jobs, {driver_count} drivers, {label}: {elapsed:.2f} s, '
+                        f'{job_count / elapsed:.0f} jobs/s, {assigned.mean():.1%} assigned, '
+                        f'mean {np.nanmean(travelled):.2f} km'
+                    )
+        finally:
+            if pool is not None:
+                pool.shutdown()
@@ -0,0 +1,58 @@
+import datetime
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.api.models import Company
+from apps.shipment import scans
+from apps.shipment.models import Shipment, ShipmentEvent
+
+
+# the scans every benchmark shipment goes through, in order
+LIFECYCLE = ('picked_up', 'in_transit', 'in_transit', 'out_for_delivery', 'delivered')
+
+
+class Command(BaseCommand):
+    help = 'Measure status scan ingestion (scans/s) on throw-away shipments, in batches like the bulk scan endpoint.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shipments', type=int, default=2000)
+        parser.add_argument('--batch', type=int, default=2000, help='Scans per request.')
+
+    def handle(self, *args, **options):
+        company = Company.objects.create(name=f'scan-benchmark-{uuid.uuid4().hex[:12]}')
+        try:
+            created = timezone.now()
+            shipments = Shipment.objects.bulk_create(
+                [
+                    Shipment(company=company, tracking_number=f'{company.pk}-{n:08d}', status_updated_at=created)
+                    for n in range(options['shipments'])
+                ],
+                batch_size=1000,
+            )
+            # stage by stage, as devices would upload them
+            all_scans = [
+                (shipment.tracking_number, status, created + datetime.timedelta(minutes=stage + 1), 'Hub')
+                for stage, status in enumerate(LIFECYCLE)
+                for shipment in shipments
+            ]
+
+            batch, rejected = options['batch'], 0
+            start = time.perf_counter()
+            for offset in range(0, len(all_scans), batch):
+                _accepted, errors = scans.ingest(company.pk, all_scans[offset:offset + batch])
+                rejected += len(errors)
+            elapsed = time.perf_counter() - start
+
+            self.stdout.write(
+                f'{len(all_scans)} scans in batches of {batch}: {elapsed:.2f} s, '
+                f'{len(all_scans) / elapsed:.0f} scans/s, {rejected} rejected'
+            )
+            delivered = Shipment.objects.filter(company=company, status='delivered').count()
+            events = ShipmentEvent.objects.filter(shipment__company=company).count()
+            if rejected or delivered != len(shipments) or events != len(all_scans):
+                raise CommandError(f'Unexpected result: {delivered} delivered, {events} events.')
+        finally:
+            company.delete()
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipment', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shipment',
+            name='price',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:18
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipment', '0002_shipment_price'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shipment',
+            name='pickup_latitude',
+            field=models.FloatField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(-90), django.core.validators.MaxValueValidator(90)]),
+        ),
+        migrations.AddField(
+            model_name='shipment',
+            name='pickup_longitude',
+            field=models.FloatField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(-180), django.core.validators.MaxValueValidator(180)]),
+        ),
+    ]
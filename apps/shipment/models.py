@@ -0,0 +1,111 @@
+from django.conf import settings
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.api.models import Company
+from apps.user.models import CustomerProfile, DriverProfile
+
+
+CLOSED_STATUSES = ("delivered", "returned", "cancelled")
+
+
+class ShipmentQuerySet(models.QuerySet):
+    def open(self):
+        # same condition as the partial indexes, so the planner can use them
+        return self.exclude(status__in=CLOSED_STATUSES)
+
+
+
+class Shipment(models.Model):
+    STATUS_CHOICES = [
+        ("created", "Created"),
+        ("picked_up", "Picked Up"),
+        ("in_transit", "In Transit"),
+        ("out_for_delivery", "Out for Delivery"),
+        ("delivered", "Delivered"),
+        ("failed", "Delivery Failed"),
+        ("returned", "Returned"),
+        ("cancelled", "Cancelled"),
+    ]
+
+    # allowed next statuses; repeating the current status (e.g. hub scans while
+    # in transit) is always allowed
+    TRANSITIONS = {
+        "created": {"picked_up", "cancelled"},
+        "picked_up": {"in_transit", "out_for_delivery", "cancelled"},
+        "in_transit": {"out_for_delivery", "returned"},
+        "out_for_delivery": {"delivered", "failed", "in_transit"},
+        "failed": {"out_for_delivery", "in_transit", "returned"},
+        "delivered": set(),
+        "returned": set(),
+        "cancelled": set(),
+    }
+
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='shipments')
+    customer = models.ForeignKey(
+        CustomerProfile, on_delete=models.SET_NULL, null=True, blank=True, related_name='shipments'
+    )
+    driver = models.ForeignKey(
+        DriverProfile, on_delete=models.SET_NULL, null=True, blank=True, related_name='shipments'
+    )
+    tracking_number = models.CharField(max_length=64, unique=True)
+    origin = models.TextField(blank=True)
+    destination = models.TextField(blank=True)
+    # where the driver collects it; shipments without it are not auto-dispatched
+    pickup_latitude = models.FloatField(
+        null=True, blank=True, validators=[MinValueValidator(-90), MaxValueValidator(90)]
+    )
+    pickup_longitude = models.FloatField(
+        null=True, blank=True, validators=[MinValueValidator(-180), MaxValueValidator(180)]
+    )
+    price = models.DecimalField(max_digits=12, decimal_places=2, default=0)  # billed once delivered
+    # denormalized from the latest ShipmentEvent, so reads never scan the log
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="created")
+    status_updated_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = ShipmentQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # partial: only open shipments, which are the ones boards and drivers query
+            models.Index(
+                fields=['driver', 'status'],
+                condition=~Q(status__in=CLOSED_STATUSES),
+                name='shipment_open_by_driver',
+            ),
+            models.Index(
+                fields=['company', 'status'],
+                condition=~Q(status__in=CLOSED_STATUSES),
+                name='shipment_open_by_company',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.tracking_number} ({self.status})"
+
+    def can_transition(self, status):
+        return status == self.status or status in self.TRANSITIONS[self.status]
+
+
+
+class ShipmentEvent(models.Model):
+    """Append-only log of status scans; the shipment's status mirrors the latest one."""
+    shipment = models.ForeignKey(Shipment, on_delete=models.CASCADE, related_name='events')
+    status = models.CharField(max_length=20, choices=Shipment.STATUS_CHOICES)
+    occurred_at = models.DateTimeField()  # scan time on the device
+    location = models.CharField(max_length=255, blank=True)
+    recorded_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='shipment_events'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['shipment', 'occurred_at'], name='shipmentevent_history'),
+        ]
+
+    def __str__(self):
+        return f"{self.shipment_id}: {self.status} at {self.occurred_at}"
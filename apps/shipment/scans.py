@@ -0,0 +1,63 @@
+from django.db import transaction
+
+from .models import Shipment, ShipmentEvent
+
+
+# Bulk ingestion of status scans. A batch costs a fixed handful of queries
+# whatever its size: one SELECT ... FOR UPDATE of the shipments involved,
+# one bulk INSERT of events and one bulk UPDATE of the denormalized status,
+# all in a single transaction.
+
+
+def ingest(company_id, scans, user=None, driver_user_id=None):
+    """
+    Apply `scans` ((tracking_number, status, occurred_at, location) tuples) to
+    the company's shipments, only those assigned to the driver whose user is
+    `driver_user_id` when given. Every accepted scan is logged as an event; the
+    shipment's status follows the latest one. Scans older than the current
+    status are logged without changing it (late uploads from offline devices).
+
+    Returns (accepted count, [(index, error)] of rejected scans).
+    """
+    order = sorted(range(len(scans)), key=lambda index: scans[index][2])
+    tracking_numbers = {scan[0] for scan in scans}
+    rejected, events, changed = [], [], {}
+
+    queryset = Shipment.objects.filter(company_id=company_id, tracking_number__in=tracking_numbers)
+    if driver_user_id is not None:
+        # other shipments are rejected as unknown, not revealing they exist
+        queryset = queryset.filter(driver__user_id=driver_user_id)
+
+    with transaction.atomic():
+        # row locks (in id order) keep concurrent batches for the same
+        # shipments from overwriting each other's status
+        shipments = {
+            shipment.tracking_number: shipment
+            for shipment in queryset.select_for_update()
+            .only('id', 'tracking_number', 'status', 'status_updated_at')
+            .order_by('id')
+        }
+
+        for index in order:
+            tracking_number, status, occurred_at, location = scans[index]
+            shipment = shipments.get(tracking_number)
+            if shipment is None:
+                rejected.append((index, f'Unknown tracking number {tracking_number!r}.'))
+                continue
+
+            if occurred_at >= shipment.status_updated_at:
+                if not shipment.can_transition(status):
+                    rejected.append((index, f'Cannot go from {shipment.status!r} to {status!r}.'))
+                    continue
+                shipment.status, shipment.status_updated_at = status, occurred_at
+                changed[shipment.pk] = shipment
+
+            events.append(ShipmentEvent(
+                shipment=shipment, status=status, occurred_at=occurred_at, location=location, recorded_by=user,
+            ))
+
+        ShipmentEvent.objects.bulk_create(events, batch_size=1000)
+        Shipment.objects.bulk_update(changed.values(), ['status', 'status_updated_at'], batch_size=500)
+
+    rejected.sort()
+    return len(events), rejected
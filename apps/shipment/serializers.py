@@ -0,0 +1,91 @@
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import serializers
+
+from apps.user.models import CustomerProfile, DriverProfile
+from .models import Shipment, ShipmentEvent
+
+
+STATUSES = {status for status, _label in Shipment.STATUS_CHOICES}
+
+
+class ScansField(serializers.Field):
+    """
+    A list of {"tracking_number", "status", "occurred_at" (ISO 8601), "location"?}
+    objects, validated in one plain loop (see warehouse.StockLinesField).
+    Returns (tracking_number, status, occurred_at, location) tuples.
+    """
+    default_error_messages = {
+        'not_a_list': 'Expected a non-empty list of scans.',
+        'too_many': 'At most {max_scans} scans per request.',
+        'invalid': 'Scan {index}: {problem}.',
+    }
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list) or not data:
+            self.fail('not_a_list')
+        if len(data) > settings.SHIPMENT_MAX_SCANS:
+            self.fail('too_many', max_scans=settings.SHIPMENT_MAX_SCANS)
+
+        scans = []
+        for index, scan in enumerate(data):
+            if not isinstance(scan, dict):
+                self.fail('invalid', index=index, problem='expected an object')
+            tracking_number, status = scan.get('tracking_number'), scan.get('status')
+            location = scan.get('location') or ''
+            if not isinstance(tracking_number, str) or not 0 < len(tracking_number) <= 64:
+                self.fail('invalid', index=index, problem='"tracking_number" must be a string up to 64 characters')
+            if status not in STATUSES:
+                self.fail('invalid', index=index, problem=f'"status" must be one of {", ".join(sorted(STATUSES))}')
+            if not isinstance(location, str) or len(location) > 255:
+                self.fail('invalid', index=index, problem='"location" must be a string up to 255 characters')
+            try:
+                occurred_at = parse_datetime(scan.get('occurred_at') or '')
+            except (TypeError, ValueError):
+                occurred_at = None
+            if occurred_at is None:
+                self.fail('invalid', index=index, problem='"occurred_at" must be an ISO 8601 date and time')
+            if timezone.is_naive(occurred_at):
+                occurred_at = timezone.make_aware(occurred_at)
+            scans.append((tracking_number, status, occurred_at, location))
+        return scans
+
+
+class ScanBatchSerializer(serializers.Serializer):
+    scans = ScansField()
+
+
+class DispatchSerializer(serializers.Serializer):
+    # omitted: every pending pickup of the company
+    shipments = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, allow_empty=False,
+        max_length=settings.DISPATCH_MAX_JOBS,
+    )
+    dry_run = serializers.BooleanField(default=False)
+
+
+class ShipmentSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Shipment
+        fields = [
+            'id', 'tracking_number', 'customer', 'driver', 'origin', 'destination', 'price',
+            'pickup_latitude', 'pickup_longitude',
+            'status', 'status_updated_at', 'created_at',
+        ]
+        read_only_fields = ['id', 'status', 'status_updated_at', 'created_at']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # only profiles of the requesting user's company can be assigned
+        request = self.context.get('request')
+        if request is not None and 'customer' in self.fields:
+            company_id = getattr(request.user, 'company_id', None)
+            self.fields['customer'].queryset = CustomerProfile.objects.filter(user__company_id=company_id)
+            self.fields['driver'].queryset = DriverProfile.objects.filter(user__company_id=company_id)
+
+
+class ShipmentEventSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ShipmentEvent
+        fields = ['status', 'occurred_at', 'location', 'recorded_by', 'created_at']
@@ -0,0 +1,229 @@
+"""
+Assignment of pickup jobs to drivers by travel distance, under per-driver capacity.
+
+Within a region: a vectorized greedy (every open job proposes to its nearest
+driver with spare capacity, each driver accepts its closest proposals),
+improved by local search (moving jobs to closer drivers with spare capacity,
+swapping jobs between two drivers when that shortens both trips in total).
+
+Large inputs are split into regions by recursive bisection at the job median,
+so distance matrices stay small; regions are independent and can be solved in
+a process pool. Jobs left over (a region short of drivers) are solved again in
+larger regions.
+
+Pure NumPy; coordinates are (latitude, longitude) in degrees, distances in km.
+"""
+import numpy as np
+
+
+EARTH_RADIUS_KM = 6371.0088
+UNASSIGNED = -1
+# swap() compares every pair of jobs it is given; larger regions are swapped
+# within spatial blocks of this many jobs to bound its (jobs x jobs) matrices
+SWAP_BLOCK_SIZE = 2000
+
+
+def distance_matrix(job_coords, driver_coords):
+    """Great-circle (haversine) distances, shape (jobs, drivers)."""
+    jobs, drivers = np.radians(job_coords), np.radians(driver_coords)
+    job_lat, job_lng = jobs[:, 0, None], jobs[:, 1, None]
+    driver_lat, driver_lng = drivers[None, :, 0], drivers[None, :, 1]
+    a = (
+        np.sin((job_lat - driver_lat) / 2) ** 2
+        + np.cos(job_lat) * np.cos(driver_lat) * np.sin((job_lng - driver_lng) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def greedy(distances, capacities):
+    """
+    Assign in rounds: each open job proposes to its nearest driver with spare
+    capacity, and each driver accepts its closest proposals up to that
+    capacity. Unreachable pairs are np.inf. Returns (assignment, remaining capacity).
+    """
+    distances = distances.copy()  # full drivers are masked out in place
+    job_count, driver_count = distances.shape
+    remaining = np.asarray(capacities, dtype=np.int64).copy()
+    distances[:, remaining <= 0] = np.inf
+    assignment = np.full(job_count, UNASSIGNED, dtype=np.int64)
+
+    open_jobs = np.arange(job_count)
+    while open_jobs.size:
+        rows = distances[open_jobs]
+        choice = rows.argmin(axis=1)
+        chosen = rows[np.arange(open_jobs.size), choice]
+        reachable = np.isfinite(chosen)
+        if not reachable.any():
+            break
+        open_jobs, choice, chosen = open_jobs[reachable], choice[reachable], chosen[reachable]
+
+        # proposals grouped by driver, closest first; a proposal's rank within
+        # its group decides whether it fits the driver's remaining capacity
+        order = np.lexsort((chosen, choice))
+        drivers = choice[order]
+        rank = np.arange(order.size) - np.searchsorted(drivers, drivers)
+        accepted = rank < remaining[drivers]
+
+        assignment[open_jobs[order[accepted]]] = drivers[accepted]
+        remaining -= np.bincount(drivers[accepted], minlength=driver_count)
+        # every driver that turned a proposal down is now full
+        distances[:, np.unique(drivers[~accepted])] = np.inf
+        open_jobs = open_jobs[order[~accepted]]
+
+    return assignment, remaining
+
+
+def relocate(distances, assignment, remaining):
+    """Move jobs to a closer driver with spare capacity; returns the number of moves."""
+    jobs = np.flatnonzero(assignment != UNASSIGNED)
+    spare = np.flatnonzero(remaining > 0)
+    if not jobs.size or not spare.size:
+        return 0
+
+    current = distances[jobs, assignment[jobs]]
+    candidates = distances[np.ix_(jobs, spare)]
+    best = candidates.argmin(axis=1)
+    gain = current - candidates[np.arange(jobs.size), best]
+
+    moves = 0
+    for index in np.argsort(-gain):
+        if gain[index] <= 1e-9:
+            break
+        job, driver = jobs[index], spare[best[index]]
+        if remaining[driver] <= 0:
+            continue
+        remaining[assignment[job]] += 1
+        remaining[driver] -= 1
+        assignment[job] = driver
+        moves += 1
+    return moves
+
+
+def swap(distances, assignment, jobs):
+    """
+    Exchange the drivers of pairs among `jobs` where that shortens the two
+    trips; returns the number of swaps.
+    """
+    jobs = jobs[assignment[jobs] != UNASSIGNED]
+    if jobs.size < 2:
+        return 0
+
+    drivers = assignment[jobs]
+    current = distances[jobs, drivers]
+    # cross[i, j]: distance from job i to the driver of job j
+    cross = distances[np.ix_(jobs, drivers)]
+    gain = current[:, None] + current[None, :] - cross - cross.T
+    partner = gain.argmax(axis=1)
+    best = gain[np.arange(jobs.size), partner]
+
+    used = np.zeros(jobs.size, dtype=bool)
+    swaps = 0
+    for first in np.argsort(-best):
+        if best[first] <= 1e-9:
+            break
+        second = partner[first]
+        if used[first] or used[second]:
+            continue
+        used[first] = used[second] = True
+        assignment[jobs[first]], assignment[jobs[second]] = drivers[second], drivers[first]
+        swaps += 1
+    return swaps
+
+
+def solve_region(job_coords, driver_coords, capacities, max_distance_km=None, rounds=3):
+    """
+    Assign the jobs of one region. Returns (driver index per job or UNASSIGNED,
+    distance per job or NaN). Top level, so it can run in a process pool.
+    """
+    distances = distance_matrix(job_coords, driver_coords)
+    if max_distance_km is not None:
+        distances[distances > max_distance_km] = np.inf
+
+    assignment, remaining = greedy(distances, capacities)
+    if len(job_coords) <= SWAP_BLOCK_SIZE:
+        blocks = [np.arange(len(job_coords))]
+    else:
+        blocks = [jobs for jobs, _ in split_regions(job_coords, driver_coords[:0], SWAP_BLOCK_SIZE)]
+    for _ in range(rounds):
+        changes = relocate(distances, assignment, remaining)
+        changes += sum(swap(distances, assignment, jobs) for jobs in blocks)
+        if not changes:
+            break
+
+    assigned = assignment != UNASSIGNED
+    travelled = np.full(assignment.size, np.nan)
+    travelled[assigned] = distances[assigned.nonzero()[0], assignment[assigned]]
+    return assignment, travelled
+
+
+def split_regions(job_coords, driver_coords, max_jobs):
+    """
+    Recursive bisection at the job median along the wider coordinate axis,
+    until every region has at most `max_jobs` jobs. Drivers go to the side
+    their own coordinate falls on. Returns [(job indices, driver indices)].
+    """
+    regions = []
+    stack = [(np.arange(len(job_coords)), np.arange(len(driver_coords)))]
+    while stack:
+        jobs, drivers = stack.pop()
+        if jobs.size <= max_jobs:
+            regions.append((jobs, drivers))
+            continue
+        points = job_coords[jobs]
+        axis = int(np.ptp(points, axis=0).argmax())
+        threshold = np.median(points[:, axis])
+        left = points[:, axis] <= threshold
+        if left.all():  # all on the median (same coordinates): cannot split further
+            regions.append((jobs, drivers))
+            continue
+        drivers_left = driver_coords[drivers, axis] <= threshold
+        stack.append((jobs[left], drivers[drivers_left]))
+        stack.append((jobs[~left], drivers[~drivers_left]))
+    return regions
+
+
+def solve(job_coords, driver_coords, capacities, max_distance_km=None, region_size=5000, rounds=3, pool=None):
+    """
+    Assign jobs to drivers. Regions are solved across `pool` (a
+    concurrent.futures executor) when given. Returns (driver index per job or
+    UNASSIGNED, distance per job or NaN).
+    """
+    job_coords = np.asarray(job_coords, dtype=np.float64).reshape(-1, 2)
+    driver_coords = np.asarray(driver_coords, dtype=np.float64).reshape(-1, 2)
+    remaining = np.asarray(capacities, dtype=np.int64).copy()
+
+    assignment = np.full(len(job_coords), UNASSIGNED, dtype=np.int64)
+    travelled = np.full(len(job_coords), np.nan)
+    open_jobs = np.arange(len(job_coords))
+    while open_jobs.size:
+        drivers = np.flatnonzero(remaining > 0)
+        if not drivers.size:
+            break
+        split = split_regions(job_coords[open_jobs], driver_coords[drivers], region_size)
+        regions = [(open_jobs[jobs], drivers[region_drivers]) for jobs, region_drivers in split if region_drivers.size]
+        arguments = (
+            [job_coords[jobs] for jobs, _ in regions],
+            [driver_coords[region_drivers] for _, region_drivers in regions],
+            [remaining[region_drivers] for _, region_drivers in regions],
+            [max_distance_km] * len(regions),
+            [rounds] * len(regions),
+        )
+        if pool is not None and len(regions) > 1:
+            results = pool.map(solve_region, *arguments)
+        else:
+            results = map(solve_region, *arguments)
+
+        for (jobs, region_drivers), (local, distances) in zip(regions, results):
+            assigned = local != UNASSIGNED
+            chosen = region_drivers[local[assigned]]
+            assignment[jobs[assigned]] = chosen
+            travelled[jobs[assigned]] = distances[assigned]
+            remaining -= np.bincount(chosen, minlength=remaining.size)
+
+        open_jobs = open_jobs[assignment[open_jobs] == UNASSIGNED]
+        if len(split) <= 1:
+            break
+        # regions short of drivers: retry what is left with wider regions
+        region_size *= 4
+
+    return assignment, travelled
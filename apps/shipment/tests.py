@@ -0,0 +1,195 @@
+import datetime
+from unittest import mock
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.api.models import Company
+from apps.shipment import dispatch, scans, solver
+from apps.shipment.models import Shipment, ShipmentEvent
+from apps.user.models import DriverProfile
+
+
+def create_driver(company, name, **profile):
+    # created here: profiles are provisioned once the transaction commits
+    return DriverProfile.objects.create(
+        user=get_user_model().objects.create_user(name, 'Driver', f'{name.lower()}@acme.example', 'pw', role='driver', company=company),
+        **profile,
+    )
+
+
+class ScanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(name='Acme')
+        other_company = Company.objects.create(name='Other')
+        cls.dispatcher = get_user_model().objects.create_user(
+            'Dora', 'Dispatcher', 'dora@acme.example', 'pw', role='dispatcher', company=cls.company,
+        )
+        cls.driver = create_driver(cls.company, 'Dan')
+        colleague = create_driver(cls.company, 'Col')
+        cls.start = timezone.make_aware(datetime.datetime(2026, 10, 19, 8))
+        Shipment.objects.bulk_create([
+            Shipment(company=cls.company, tracking_number='MINE', driver=cls.driver, status_updated_at=cls.start),
+            Shipment(company=cls.company, tracking_number='THEIRS', driver=colleague, status_updated_at=cls.start),
+            Shipment(company=other_company, tracking_number='OTHER', status_updated_at=cls.start),
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def at(self, minutes):
+        return self.start + datetime.timedelta(minutes=minutes)
+
+    def post_scans(self, user, *tracking_numbers):
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.post('/api/shipments/shipments/scans/', {'scans': [
+            {'tracking_number': tracking_number, 'status': 'picked_up', 'occurred_at': self.at(10).isoformat()}
+            for tracking_number in tracking_numbers
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_drivers_scan_only_their_shipments(self):
+        result = self.post_scans(self.driver.user, 'MINE', 'THEIRS', 'OTHER')
+        self.assertEqual(result['accepted'], 1)
+        # a colleague's shipment is as unknown as another company's
+        self.assertEqual(result['rejected'], [
+            {'index': 1, 'error': "Unknown tracking number 'THEIRS'."},
+            {'index': 2, 'error': "Unknown tracking number 'OTHER'."},
+        ])
+        self.assertEqual(
+            dict(Shipment.objects.values_list('tracking_number', 'status')),
+            {'MINE': 'picked_up', 'THEIRS': 'created', 'OTHER': 'created'},
+        )
+
+    def test_dispatchers_scan_any_company_shipment(self):
+        result = self.post_scans(self.dispatcher, 'MINE', 'THEIRS', 'OTHER')
+        self.assertEqual(result['accepted'], 2)
+        self.assertEqual([row['index'] for row in result['rejected']], [2])
+
+    def test_scans_apply_in_time_order(self):
+        accepted, rejected = scans.ingest(self.company.pk, [
+            ('MINE', 'in_transit', self.at(20), 'Hub'),
+            ('MINE', 'picked_up', self.at(10), 'Depot'),
+        ])
+        self.assertEqual((accepted, rejected), (2, []))
+        shipment = Shipment.objects.get(tracking_number='MINE')
+        self.assertEqual((shipment.status, shipment.status_updated_at), ('in_transit', self.at(20)))
+
+    def test_late_scan_is_logged_without_changing_status(self):
+        scans.ingest(self.company.pk, [('MINE', 'picked_up', self.at(10), ''), ('MINE', 'in_transit', self.at(20), '')])
+        # an offline device uploads a scan older than the current status
+        accepted, rejected = scans.ingest(self.company.pk, [('MINE', 'cancelled', self.at(15), 'Van')])
+
+        self.assertEqual((accepted, rejected), (1, []))
+        shipment = Shipment.objects.get(tracking_number='MINE')
+        self.assertEqual((shipment.status, shipment.status_updated_at), ('in_transit', self.at(20)))
+        self.assertTrue(ShipmentEvent.objects.filter(shipment=shipment, status='cancelled', occurred_at=self.at(15)).exists())
+
+    def test_invalid_transition_is_rejected(self):
+        accepted, rejected = scans.ingest(self.company.pk, [('MINE', 'delivered', self.at(10), '')])
+        self.assertEqual((accepted, rejected), (0, [(0, "Cannot go from 'created' to 'delivered'.")]))
+        self.assertFalse(ShipmentEvent.objects.exists())
+
+
+class DispatchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(name='Acme')
+        cls.driver = create_driver(
+            cls.company, 'Dan', vehicle_assigned='VAN', capacity=3, latitude=52.5, longitude=13.4, last_check_in=timezone.now(),
+        )
+        cls.pickups = [
+            Shipment.objects.create(company=cls.company, tracking_number=f'P{n}', pickup_latitude=52.5, pickup_longitude=13.4 + n / 100).pk
+            for n in range(3)
+        ]
+        cls.elsewhere = Shipment.objects.create(company=cls.company, tracking_number='ELSEWHERE')
+
+    def test_assign(self):
+        assignments, unassigned = dispatch.assign(self.company.pk)
+        self.assertEqual(sorted(shipment_id for shipment_id, _driver, _km in assignments), self.pickups)
+        self.assertEqual(unassigned, [])
+        self.assertEqual(Shipment.objects.filter(driver=self.driver).count(), 3)
+
+    def test_capacity_is_checked_again_when_applying(self):
+        plan = dispatch.plan
+
+        def plan_then_concurrent_assign(*args, **kwargs):
+            result = plan(*args, **kwargs)
+            # another assign takes one of the driver's seats after this one planned
+            Shipment.objects.filter(pk=self.elsewhere.pk).update(driver=self.driver)
+            return result
+
+        with mock.patch.object(dispatch, 'plan', plan_then_concurrent_assign):
+            assignments, unassigned = dispatch.assign(self.company.pk)
+        self.assertEqual(len(assignments), 2)
+        self.assertEqual(len(unassigned), 1)
+        self.assertEqual(Shipment.objects.filter(driver=self.driver).count(), self.driver.capacity)
+
+    def test_pickups_assigned_meanwhile_keep_their_driver(self):
+        other = create_driver(self.company, 'Col')
+        plan = dispatch.plan
+
+        def plan_then_manual_assign(*args, **kwargs):
+            result = plan(*args, **kwargs)
+            Shipment.objects.filter(pk=self.pickups[0]).update(driver=other)
+            return result
+
+        with mock.patch.object(dispatch, 'plan', plan_then_manual_assign):
+            assignments, unassigned = dispatch.assign(self.company.pk)
+        self.assertEqual(sorted(shipment_id for shipment_id, _driver, _km in assignments), self.pickups[1:])
+        self.assertEqual(unassigned, [])
+        self.assertEqual(Shipment.objects.get(pk=self.pickups[0]).driver, other)
+
+
+class SolverTests(TestCase):
+    def test_distance_matrix(self):
+        distances = solver.distance_matrix(np.array([[0.0, 0.0], [1.0, 0.0]]), np.array([[0.0, 0.0], [0.0, 180.0]]))
+        np.testing.assert_allclose(distances, [
+            [0, np.pi * solver.EARTH_RADIUS_KM],
+            [np.pi * solver.EARTH_RADIUS_KM / 180, np.pi * solver.EARTH_RADIUS_KM * 179 / 180],
+        ], rtol=1e-9, atol=1e-9)
+
+    def test_nearest_driver_within_capacity(self):
+        jobs = [(0, 0.1), (0, 0.2), (0, 9.9), (0, 5.1)]
+        drivers = [(0, 0), (0, 10)]
+        assignment, travelled = solver.solve(jobs, drivers, [2, 1])
+        # the job in the middle is nearer the second driver, who is full
+        self.assertEqual(assignment.tolist(), [0, 0, 1, solver.UNASSIGNED])
+        self.assertTrue(np.isnan(travelled[3]))
+        np.testing.assert_allclose(travelled[:3], solver.distance_matrix(np.array(jobs[:3]), np.array(drivers)).min(axis=1))
+
+    def test_local_search_finds_the_shorter_total(self):
+        # greedy gives the first job the driver next to it, leaving the far job
+        # the far driver; swapping the two jobs' drivers is shorter in total
+        jobs = [(0, 1.0), (0, 2.1)]
+        drivers = [(0, 1.1), (0, 0.0)]
+        greedy, _remaining = solver.greedy(solver.distance_matrix(np.array(jobs), np.array(drivers)), [1, 1])
+        assignment, travelled = solver.solve(jobs, drivers, [1, 1])
+        self.assertEqual(greedy.tolist(), [0, 1])
+        self.assertEqual(assignment.tolist(), [1, 0])
+        self.assertLess(travelled.sum(), solver.distance_matrix(np.array(jobs), np.array(drivers))[[0, 1], [0, 1]].sum())
+
+    def test_max_distance(self):
+        assignment, _travelled = solver.solve([(0, 0), (0, 5)], [(0, 0)], [5], max_distance_km=100)
+        self.assertEqual(assignment.tolist(), [0, solver.UNASSIGNED])
+
+    def test_regions_respect_capacities(self):
+        rng = np.random.default_rng(0)
+        jobs = rng.uniform([50, 10], [54, 14], size=(200, 2))
+        drivers = rng.uniform([50, 10], [54, 14], size=(30, 2))
+        capacities = rng.integers(1, 8, size=30)
+
+        assignment, travelled = solver.solve(jobs, drivers, capacities, region_size=25)
+        assigned = assignment != solver.UNASSIGNED
+        self.assertTrue((np.bincount(assignment[assigned], minlength=30) <= capacities).all())
+        self.assertEqual(assigned.sum(), min(len(jobs), capacities.sum()))
+        np.testing.assert_allclose(
+            travelled[assigned], solver.distance_matrix(jobs, drivers)[assigned.nonzero()[0], assignment[assigned]],
+        )
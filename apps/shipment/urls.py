@@ -0,0 +1,12 @@
+from django.urls import include, path
+from rest_framework.routers import SimpleRouter
+
+from .views import ShipmentViewSet
+
+router = SimpleRouter()
+router.register('shipments', ShipmentViewSet, basename='shipments')
+
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
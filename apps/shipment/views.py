@@ -0,0 +1,102 @@
+from django.db import transaction
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from apps.api.mixins import CompiledListMixin
+from apps.api.serializers import compile_serializer
+from apps.user.permissions import IsCompanyAdmin, IsDispatcher, IsDriver, IsWarehouseStaff
+from . import dispatch, scans
+from .models import Shipment, ShipmentEvent
+from .serializers import DispatchSerializer, ScanBatchSerializer, ShipmentEventSerializer, ShipmentSerializer
+
+
+class ShipmentViewSet(
+    CompiledListMixin,
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.CreateModelMixin,
+    viewsets.GenericViewSet,
+):
+    """
+    Shipments of the requesting user's company (drivers see their own).
+    `?open=true` lists only shipments that are not delivered, returned or cancelled.
+    """
+    serializer_class = ShipmentSerializer
+
+    def get_permissions(self):
+        if self.action in ('create', 'assign'):
+            permission_classes = [IsDispatcher | IsCompanyAdmin]
+        else:
+            permission_classes = [IsDispatcher | IsCompanyAdmin | IsDriver | IsWarehouseStaff]
+        return [permission() for permission in permission_classes]
+
+    def get_queryset(self):
+        user = self.request.user
+        queryset = Shipment.objects.filter(company_id=user.company_id)
+        if user.role == 'driver':
+            queryset = queryset.filter(driver__user_id=user.pk)
+        if self.request.query_params.get('open') == 'true':
+            queryset = queryset.open()
+        return queryset.order_by('-id')
+
+    def get_serializer_class(self):
+        if self.action == 'scans':
+            return ScanBatchSerializer
+        if self.action == 'assign':
+            return DispatchSerializer
+        return super().get_serializer_class()
+
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            shipment = serializer.save(company_id=self.request.user.company_id)
+            ShipmentEvent.objects.create(
+                shipment=shipment, status=shipment.status,
+                occurred_at=shipment.status_updated_at, recorded_by=self.request.user,
+            )
+
+    @action(detail=True, methods=['get'])
+    def events(self, request, pk=None):
+        compiled = compile_serializer(ShipmentEventSerializer)
+        shipment = self.get_object()
+        queryset = ShipmentEvent.objects.filter(shipment=shipment).order_by('occurred_at', 'id').values(*compiled.sources)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(compiled.many_from_rows(page))
+        return Response(compiled.many_from_rows(queryset))
+
+    @action(detail=False, methods=['post'])
+    def scans(self, request):
+        """Apply a batch of status scans; invalid scans are reported, the rest applied."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        # drivers may only scan the shipments assigned to them, as in get_queryset()
+        driver_user_id = request.user.pk if request.user.role == 'driver' else None
+        accepted, rejected = scans.ingest(
+            request.user.company_id, serializer.validated_data['scans'], user=request.user, driver_user_id=driver_user_id,
+        )
+        return Response({
+            'accepted': accepted,
+            'rejected': [{'index': index, 'error': error} for index, error in rejected],
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'])
+    def assign(self, request):
+        """
+        Assign pending pickups to available drivers by travel distance and
+        capacity; `dry_run` returns the plan without applying it.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        run = dispatch.plan if serializer.validated_data['dry_run'] else dispatch.assign
+        assignments, unassigned = run(request.user.company_id, serializer.validated_data.get('shipments'))
+        return Response({
+            'assigned': [
+                {'shipment': shipment_id, 'driver': driver_id, 'distance_km': distance}
+                for shipment_id, driver_id, distance in assignments
+            ],
+            'unassigned': unassigned,
+        }, status=status.HTTP_200_OK)
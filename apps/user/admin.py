@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.html import format_html
+
+from apps.search.admin import SearchIndexAdminMixin
 from .models import (
     User,
     DispatcherProfile,
@@ -35,7 +37,7 @@ class CustomUserAdmin(BaseUserAdmin):
     filter_horizontal = ('groups', 'user_permissions')
 
 
-class BaseProfileAdmin(admin.ModelAdmin):
+class BaseProfileAdmin(SearchIndexAdminMixin, admin.ModelAdmin):
     def image_tag(self, obj):
         if obj.profile_image:
             return format_html('<img src="{}" width="40" style="border-radius: 4px;" />', obj.profile_image.url)
@@ -44,6 +46,7 @@ class BaseProfileAdmin(admin.ModelAdmin):
 
     ordering = ('user__first_name',)
     list_filter = ('gender',)
+    # answered from the search index (name, email, phone, customer company name)
     search_fields = ('user__first_name', 'user__last_name', 'user__email', 'phone')
 
 
@@ -59,11 +62,11 @@ class DispatcherProfileAdmin(BaseProfileAdmin):
 
 @admin.register(WarehouseStaffProfile)
 class WarehouseStaffProfileAdmin(BaseProfileAdmin):
-    list_display = ('user', 'gender', 'phone', 'warehouse_id', 'shift', 'is_active', 'image_tag')
+    list_display = ('user', 'gender', 'phone', 'warehouse', 'shift', 'is_active', 'image_tag')
     list_filter = BaseProfileAdmin.list_filter + ('is_active',)
     fieldsets = (
         ('User Profile', {'fields': ('user', 'gender', 'phone', 'address', 'profile_image')}),
-        ('Warehouse Info', {'fields': ('warehouse_id', 'shift', 'is_active')}),
+        ('Warehouse Info', {'fields': ('warehouse', 'warehouse_code', 'shift', 'is_active')}),
     )
     add_fieldsets = fieldsets
 
@@ -73,7 +76,7 @@ class DriverProfileAdmin(BaseProfileAdmin):
     list_display = ('user', 'gender', 'phone', 'license_number', 'vehicle_assigned', 'last_check_in', 'image_tag')
     fieldsets = (
         ('User Profile', {'fields': ('user', 'gender', 'phone', 'address', 'profile_image')}),
-        ('Driver Info', {'fields': ('license_number', 'vehicle_assigned', 'last_check_in', 'current_location')}),
+        ('Driver Info', {'fields': ('license_number', 'vehicle_assigned', 'capacity', 'last_check_in', 'current_location', 'latitude', 'longitude')}),
     )
     add_fieldsets = fieldsets
 
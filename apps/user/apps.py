@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class UserConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.user'
+
+    def ready(self):
+        from .controller import signals  # noqa: F401  connects the signal receivers
+        # the lean settings (worker processes) leave the schema generator out
+        if self.apps.is_installed('drf_spectacular'):
+            from . import schema  # noqa: F401  registers the OpenAPI extension of JWTAuthentication
@@ -0,0 +1,44 @@
+import jwt
+from django.contrib.auth import get_user_model
+from rest_framework.authentication import BaseAuthentication, SessionAuthentication, get_authorization_header
+from rest_framework.exceptions import AuthenticationFailed
+
+from .jwt_tokens import decode_token
+
+
+class JWTAuthentication(BaseAuthentication):
+    """
+    Authenticates with an access token from the `Authorization: Bearer` header
+    or the `jwt` cookie. `request.auth` is the decoded token payload.
+    """
+
+    def authenticate(self, request):
+        header = get_authorization_header(request).split()
+        if header and header[0].lower() == b'bearer':
+            if len(header) != 2:
+                raise AuthenticationFailed('Invalid Authorization header.')
+            token, from_cookie = header[1].decode(), False
+        else:
+            token, from_cookie = request.COOKIES.get('jwt'), True
+
+        if not token:
+            return None
+
+        try:
+            payload = decode_token(token)
+        except jwt.InvalidTokenError:
+            if from_cookie:
+                return None  # stale cookie; let other authenticators try
+            raise AuthenticationFailed('Invalid or expired token.')
+
+        user = get_user_model().objects.filter(pk=payload['user_id'], is_active=True).first()
+        if user is None:
+            raise AuthenticationFailed('User not found or inactive.')
+
+        if from_cookie:
+            # cookies are sent by the browser automatically, so require CSRF like session auth does
+            SessionAuthentication().enforce_csrf(request)
+        return user, payload
+
+    def authenticate_header(self, request):
+        return 'Bearer'
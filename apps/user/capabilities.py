@@ -0,0 +1,109 @@
+import enum
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+# A user's role, profile flags and Django permissions packed into one integer.
+# It is computed once, cached (and embedded in access tokens as `cap`), so
+# permission checks are a bitwise AND instead of profile/group/permission queries.
+
+class Capability(enum.IntFlag):
+    # roles
+    SUPER_ADMIN = 1 << 0
+    COMPANY_ADMIN = 1 << 1
+    DISPATCHER = 1 << 2
+    WAREHOUSE_STAFF = 1 << 3
+    DRIVER = 1 << 4
+    CUSTOMER = 1 << 5
+    ACCOUNTANT = 1 << 6
+    # account and profile flags
+    STAFF = 1 << 8
+    SUPERUSER = 1 << 9
+    APPROVE_INVOICES = 1 << 10
+    WAREHOUSE_ACTIVE = 1 << 11
+
+
+ROLE_CAPABILITIES = {
+    'super_admin': Capability.SUPER_ADMIN,
+    'company_admin': Capability.COMPANY_ADMIN,
+    'dispatcher': Capability.DISPATCHER,
+    'warehouse_staff': Capability.WAREHOUSE_STAFF,
+    'driver': Capability.DRIVER,
+    'customer': Capability.CUSTOMER,
+    'accountant': Capability.ACCOUNTANT,
+}
+
+# Django permissions listed in CAPABILITY_PERMISSIONS get the bits from here up
+PERMISSION_BASE_BIT = 16
+
+GENERATION_KEY = 'caps:generation'
+
+
+def _key(user_id):
+    return f'caps:user:{user_id}'
+
+
+def permission_bit(perm):
+    """Bit for an 'app_label.codename' permission listed in CAPABILITY_PERMISSIONS."""
+    return 1 << (PERMISSION_BASE_BIT + settings.CAPABILITY_PERMISSIONS.index(perm))
+
+
+def compute_capabilities(user):
+    """Build the bitset from the database (role, profile flags, Django permissions)."""
+    bits = ROLE_CAPABILITIES.get(user.role, 0)
+    if user.is_staff:
+        bits |= Capability.STAFF
+    if user.is_superuser:
+        bits |= Capability.SUPERUSER
+
+    if user.role == 'accountant':
+        from .models import AccountantProfile
+        if AccountantProfile.objects.filter(user_id=user.pk, can_approve_invoices=True).exists():
+            bits |= Capability.APPROVE_INVOICES
+    elif user.role == 'warehouse_staff':
+        from .models import WarehouseStaffProfile
+        if WarehouseStaffProfile.objects.filter(user_id=user.pk, is_active=True).exists():
+            bits |= Capability.WAREHOUSE_ACTIVE
+
+    if settings.CAPABILITY_PERMISSIONS:
+        granted = user.get_all_permissions()
+        for perm in settings.CAPABILITY_PERMISSIONS:
+            if user.is_superuser or perm in granted:
+                bits |= permission_bit(perm)
+    return int(bits)
+
+
+def get_capabilities(user):
+    """
+    Return the user's bitset: memoized on the user object for the request, then
+    from the cache (one round-trip), computing it only on a miss.
+    """
+    if hasattr(user, '_capabilities'):
+        return user._capabilities
+
+    found = cache.get_many([GENERATION_KEY, _key(user.pk)])
+    generation = found.get(GENERATION_KEY, 0)
+    cached = found.get(_key(user.pk))
+
+    if cached is not None and cached[0] == generation:
+        bits = cached[1]
+    else:
+        bits = compute_capabilities(user)
+        cache.set(_key(user.pk), (generation, bits), settings.CAPABILITY_CACHE_TIMEOUT)
+
+    user._capabilities = bits
+    return bits
+
+
+def invalidate_user(*user_ids):
+    cache.delete_many([_key(user_id) for user_id in user_ids])
+
+
+def invalidate_all():
+    """Invalidate every cached bitset at once, e.g. after a group's permissions change."""
+    cache.add(GENERATION_KEY, 0, None)
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 1, None)
@@ -1,14 +1,74 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete, m2m_changed
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from apps.user.models import CustomerProfile
+from django.contrib.auth.models import Group
+from apps.user import capabilities, lockout
+from apps.user.models import AccountantProfile, WarehouseStaffProfile
+from apps.user.provisioning import schedule_profile_provisioning
 
 User = get_user_model()
 
-@receiver(post_save, sender=User)
-def create_customer_profile(sender, instance, created, **kwargs):
+@receiver(post_save, sender=User, dispatch_uid='provision_user_profile')
+def provision_user_profile(sender, instance, created, raw=False, using=None, **kwargs):
     """
-    Automatically creates a Customer profile when a user with role 'customer' is created.
+    Automatically creates the role's profile (customer, driver, ...) when a user is created.
+    Bulk inserts send no signals; they call schedule_profile_provisioning directly.
     """
-    if created and instance.role == 'customer':
-        CustomerProfile.objects.create(user=instance)
+    if created and not raw:
+        schedule_profile_provisioning([instance], using)
+
+
+
+@receiver(post_save, sender=User, dispatch_uid='invalidate_user_capabilities')
+def invalidate_user_capabilities(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Drops the cached capability bitset when a user changes (role, staff flags, ...).
+    Login only touches last_login, which doesn't affect capabilities.
+    """
+    if not created and update_fields != frozenset({'last_login'}):
+        capabilities.invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=User, dispatch_uid='forget_unknown_login_email')
+def forget_unknown_login_email(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Drops a cached "no such user" login lookup for the email and role, so a new
+    (or renamed) user can log in right away. Bulk writes call lockout directly.
+    """
+    if created or update_fields is None or {'email', 'role'} & update_fields:
+        lockout.forget_unknown(instance.email, instance.role)
+
+
+@receiver(post_save, sender=AccountantProfile, dispatch_uid='invalidate_accountant_capabilities')
+@receiver(post_delete, sender=AccountantProfile, dispatch_uid='invalidate_accountant_capabilities_delete')
+@receiver(post_save, sender=WarehouseStaffProfile, dispatch_uid='invalidate_warehouse_capabilities')
+@receiver(post_delete, sender=WarehouseStaffProfile, dispatch_uid='invalidate_warehouse_capabilities_delete')
+def invalidate_profile_capabilities(sender, instance, **kwargs):
+    """
+    Drops the cached bitset when a profile flag it includes may have changed.
+    """
+    capabilities.invalidate_user(instance.user_id)
+
+
+@receiver(m2m_changed, sender=User.groups.through, dispatch_uid='invalidate_group_membership_capabilities')
+@receiver(m2m_changed, sender=User.user_permissions.through, dispatch_uid='invalidate_user_permission_capabilities')
+def invalidate_user_permission_capabilities(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Drops cached bitsets when users gain or lose groups or permissions.
+    """
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if isinstance(instance, User):
+        capabilities.invalidate_user(instance.pk)
+    else:
+        # changed from the group / permission side; pk_set is None on clear
+        capabilities.invalidate_all()
+
+
+@receiver(m2m_changed, sender=Group.permissions.through, dispatch_uid='invalidate_group_permission_capabilities')
+def invalidate_group_permission_capabilities(sender, action, **kwargs):
+    """
+    A group's permissions affect all its members, so every cached bitset is dropped.
+    """
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        capabilities.invalidate_all()
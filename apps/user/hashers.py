@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+# Cost parameters come from settings so they can be tuned per deployment.
+# The algorithm names are unchanged: existing hashes keep verifying, and
+# `must_update` rehashes them on the next login once a cost is raised.
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    iterations = settings.PASSWORD_PBKDF2_ITERATIONS or hashers.PBKDF2PasswordHasher.iterations
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """Memory-hard hasher; requires argon2-cffi."""
+    time_cost = settings.PASSWORD_ARGON2_TIME_COST
+    memory_cost = settings.PASSWORD_ARGON2_MEMORY_COST
+    parallelism = settings.PASSWORD_ARGON2_PARALLELISM
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    """Memory-hard hasher from the standard library."""
+    work_factor = settings.PASSWORD_SCRYPT_WORK_FACTOR
+    block_size = settings.PASSWORD_SCRYPT_BLOCK_SIZE
+    parallelism = settings.PASSWORD_SCRYPT_PARALLELISM
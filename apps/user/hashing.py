@@ -0,0 +1,52 @@
+import threading
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+from apps.api import workers
+from apps.api.tracing import span
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Return the shared hashing process pool, or None when PASSWORD_HASHING_WORKERS is 0.
+
+    Hashing in a separate process keeps the CPU-bound work (and the GIL) off
+    the web worker, whose other threads keep serving requests meanwhile.
+    """
+    global _executor
+    if settings.PASSWORD_HASHING_WORKERS <= 0:
+        return None
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = workers.process_pool(settings.PASSWORD_HASHING_WORKERS)
+    return _executor
+
+
+def make_password(password):
+    """Hash `password` with the preferred hasher."""
+    executor = get_executor()
+    with span('password.hash', pooled=executor is not None):
+        if executor is None:
+            return hashers.make_password(password)
+        return executor.submit(hashers.make_password, password).result()
+
+
+def verify_password(password, encoded):
+    """Return (is_correct, must_update) for `password` against the `encoded` hash."""
+    executor = get_executor()
+    with span('password.verify', pooled=executor is not None):
+        if executor is None:
+            return hashers.verify_password(password, encoded)
+        return executor.submit(hashers.verify_password, password, encoded).result()
+
+
+def dummy_verify(password):
+    """Spend one hash on a login that has no user, so it takes as long as a real one."""
+    verify_password(password, hashers.UNUSABLE_PASSWORD_PREFIX)
@@ -0,0 +1,140 @@
+import datetime
+import uuid
+
+import jwt
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import F
+
+
+ACCESS = 'access'
+REFRESH = 'refresh'
+
+
+class RevokedTokenError(jwt.InvalidTokenError):
+    pass
+
+
+def _revoked_key(jti):
+    return f'jwt:revoked:{jti}'
+
+
+def _version_key(user_id):
+    return f'jwt:version:{user_id}'
+
+
+def encode_token(payload):
+    """
+    Sign with the active asymmetric key (`kid` header) when JWT_ALGORITHM is
+    RS256 or EdDSA, otherwise with SECRET_KEY using HS256.
+    """
+    if settings.JWT_ALGORITHM == 'HS256':
+        return jwt.encode(payload, settings.SECRET_KEY, algorithm='HS256')
+
+    from .signing_keys import get_keyring
+    keyring = get_keyring()
+    return jwt.encode(payload, keyring.signing_key, algorithm=settings.JWT_ALGORITHM, headers={'kid': keyring.active_kid})
+
+
+def _verify(token):
+    kid = jwt.get_unverified_header(token).get('kid')
+    if kid is None:
+        # HS256 tokens (also those issued before switching to asymmetric signing)
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
+
+    from .signing_keys import ASYMMETRIC_ALGORITHMS, get_keyring
+    public_key = get_keyring().public_keys.get(kid)
+    if public_key is None:
+        raise jwt.InvalidTokenError('Unknown signing key')
+    return jwt.decode(token, public_key, algorithms=list(ASYMMETRIC_ALGORITHMS))
+
+
+def issue_token_pair(user):
+    """Return a short-lived access token and a longer-lived refresh token for `user`."""
+    from .capabilities import get_capabilities
+
+    now = datetime.datetime.now(datetime.timezone.utc)
+    tokens = []
+    for token_type, lifetime in ((ACCESS, settings.JWT_ACCESS_TOKEN_LIFETIME), (REFRESH, settings.JWT_REFRESH_TOKEN_LIFETIME)):
+        tokens.append(encode_token({
+            'user_id': user.id,
+            'type': token_type,
+            'jti': uuid.uuid4().hex,
+            'ver': user.token_version,
+            'cap': get_capabilities(user),  # for services verifying tokens offline
+            'iat': now,
+            'exp': now + datetime.timedelta(seconds=lifetime),
+        }))
+
+    # prime the version cache so verifying these tokens needs no DB query
+    cache.add(_version_key(user.id), user.token_version, settings.JWT_REFRESH_TOKEN_LIFETIME)
+    return tuple(tokens)
+
+
+def decode_token(token, token_type=ACCESS):
+    """
+    Decode and verify a token of the given type.
+    Raises jwt.ExpiredSignatureError, or jwt.InvalidTokenError (RevokedTokenError
+    included) for tampered, mistyped or revoked tokens.
+    """
+    payload = _verify(token)
+    if payload.get('type') != token_type:
+        raise jwt.InvalidTokenError('Unexpected token type')
+    if is_revoked(payload):
+        raise RevokedTokenError('Token has been revoked')
+    return payload
+
+
+def is_revoked(payload):
+    """
+    Check the token's jti against the revocation list and its version against
+    the user's current token version, in one cache round-trip.
+    """
+    revoked_key, version_key = _revoked_key(payload['jti']), _version_key(payload['user_id'])
+    found = cache.get_many([revoked_key, version_key])
+    if revoked_key in found:
+        return True
+
+    version = found.get(version_key)
+    if version is None:
+        # cache miss: load once from the DB and keep it for the refresh token lifetime
+        version = get_user_model().objects.filter(pk=payload['user_id']).values_list('token_version', flat=True).first()
+        if version is None:
+            return True
+        cache.set(version_key, version, settings.JWT_REFRESH_TOKEN_LIFETIME)
+    return payload.get('ver') != version
+
+
+def revoke_token(payload):
+    """Revoke a single token until it would have expired anyway."""
+    remaining = int(payload['exp'] - datetime.datetime.now(datetime.timezone.utc).timestamp())
+    if remaining > 0:
+        cache.set(_revoked_key(payload['jti']), True, remaining)
+
+
+def claim_token(payload):
+    """
+    Revoke a single-use token, returning False if it was already revoked:
+    of concurrent requests presenting the same token, only one claims it.
+    """
+    remaining = int(payload['exp'] - datetime.datetime.now(datetime.timezone.utc).timestamp())
+    return remaining > 0 and cache.add(_revoked_key(payload['jti']), True, remaining)
+
+
+def revoke_all_tokens(user, update_fields=()):
+    """
+    Invalidate every outstanding token of `user` by bumping their token
+    version. The fields named in `update_fields` (e.g. a new password) are
+    written by the same UPDATE.
+    """
+    users = get_user_model().objects.filter(pk=user.pk)
+    values = {field: getattr(user, field) for field in update_fields}
+    # compare-and-set, so the new version is known without reading it back
+    if users.filter(token_version=user.token_version).update(token_version=user.token_version + 1, **values):
+        user.token_version += 1
+    else:
+        # bumped by someone else since `user` was loaded
+        users.update(token_version=F('token_version') + 1, **values)
+        user.refresh_from_db(fields=['token_version'])
+    cache.set(_version_key(user.pk), user.token_version, settings.JWT_REFRESH_TOKEN_LIFETIME)
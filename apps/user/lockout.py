@@ -0,0 +1,118 @@
+import hashlib
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+# Login failure tracking, kept in the cache so checks cost no DB query.
+# Failures are counted per (email, role) and per client IP; reaching the limit
+# locks that account or IP for LOGIN_LOCKOUT_SECONDS. Behind reverse proxies
+# the client IP comes from X-Forwarded-For, see client_ip().
+
+logger = logging.getLogger(__name__)
+
+METRICS = ('failures', 'lockouts', 'rejected_while_locked', 'unknown_email_hits')
+
+
+def _digest(*parts):
+    # cache backends such as memcached reject spaces and long keys
+    return hashlib.sha256(':'.join(str(part).lower() for part in parts).encode()).hexdigest()[:32]
+
+
+def _account_key(kind, email, role):
+    return f'login:{kind}:account:{_digest(email, role)}'
+
+
+def _ip_key(kind, ip):
+    return f'login:{kind}:ip:{_digest(ip)}'
+
+
+def client_ip(request):
+    """
+    The client's address: REMOTE_ADDR, or behind TRUSTED_PROXY_HOPS reverse
+    proxies the X-Forwarded-For entry the outermost one appended. Entries
+    left of it are client-supplied and ignored; with fewer entries than hops
+    the header did not come through the proxies and REMOTE_ADDR is used.
+    """
+    hops = settings.TRUSTED_PROXY_HOPS
+    if hops:
+        forwarded = [part.strip() for part in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if part.strip()]
+        if len(forwarded) >= hops:
+            return forwarded[-hops]
+    return request.META.get('REMOTE_ADDR')
+
+
+def _incr(key, timeout):
+    cache.add(key, 0, timeout)
+    try:
+        return cache.incr(key)
+    except ValueError:  # expired between add() and incr()
+        cache.set(key, 1, timeout)
+        return 1
+
+
+def _record(metric):
+    _incr(f'login:metrics:{metric}', None)
+
+
+def lockout_remaining(email, role, ip):
+    """Return the seconds left on a lock of this account or IP, or 0 when not locked."""
+    locks = cache.get_many([_account_key('lock', email, role), _ip_key('lock', ip)])
+    if not locks:
+        return 0
+    _record('rejected_while_locked')
+    return max(1, int(max(locks.values()) - time.time()))
+
+
+def _lock(key):
+    cache.set(key, time.time() + settings.LOGIN_LOCKOUT_SECONDS, settings.LOGIN_LOCKOUT_SECONDS)
+    _record('lockouts')
+    logger.warning('Login locked for %s seconds', settings.LOGIN_LOCKOUT_SECONDS, extra={'event': 'lockout'})
+
+
+def register_failure(email, role, ip):
+    """Count a failed login and lock the account or IP once its limit is reached."""
+    _record('failures')
+    # sampled by the logging config; the email is left out on purpose
+    logger.warning('Login failed', extra={'event': 'auth_failure', 'role': role, 'ip': ip})
+    window = settings.LOGIN_FAILURE_WINDOW
+
+    if _incr(_account_key('failures', email, role), window) >= settings.LOGIN_FAILURE_LIMIT:
+        _lock(_account_key('lock', email, role))
+        cache.delete(_account_key('failures', email, role))
+
+    if _incr(_ip_key('failures', ip), window) >= settings.LOGIN_IP_FAILURE_LIMIT:
+        _lock(_ip_key('lock', ip))
+        cache.delete(_ip_key('failures', ip))
+
+
+def register_success(email, role):
+    cache.delete(_account_key('failures', email, role))
+
+
+def is_known_unknown(email, role):
+    """True when a recent lookup already found no user for this email and role."""
+    if cache.get(_account_key('unknown', email, role)):
+        _record('unknown_email_hits')
+        return True
+    return False
+
+
+def remember_unknown(email, role):
+    cache.set(_account_key('unknown', email, role), True, settings.LOGIN_UNKNOWN_EMAIL_CACHE_SECONDS)
+
+
+def forget_unknown(email, role):
+    cache.delete(_account_key('unknown', email, role))
+
+
+def forget_unknown_users(users):
+    """forget_unknown() for many users (bulk creates and updates), in one cache round-trip."""
+    cache.delete_many([_account_key('unknown', user.email, user.role) for user in users])
+
+
+def get_metrics():
+    values = cache.get_many([f'login:metrics:{metric}' for metric in METRICS])
+    return {metric: values.get(f'login:metrics:{metric}', 0) for metric in METRICS}
@@ -0,0 +1,47 @@
+import queue
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.api.loadtest import measure, request
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-test the auth endpoints (login, token refresh, JWKS) of a running server, '
+        'e.g. `runserver` vs `runprod`, and report requests/s and latency percentiles.'
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Server base URL.')
+        parser.add_argument('--email', required=True, help='An active user to log in as.')
+        parser.add_argument('--password', required=True)
+        parser.add_argument('--role', required=True)
+        parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint.')
+        parser.add_argument('--concurrency', type=int, default=8, help='Concurrent clients.')
+
+    def handle(self, *args, **options):
+        base = options['url'].rstrip('/')
+        credentials = {key: options[key] for key in ('email', 'password', 'role')}
+
+        # refresh tokens are single use: keep one rotating token per client
+        refresh_tokens = queue.Queue()
+        for _ in range(options['concurrency']):
+            status, body = request(f'{base}/api/users/login/', credentials)
+            if status != 200:
+                raise CommandError(f'Login failed ({status}): {body}')
+            refresh_tokens.put(body['refresh'])
+
+        def refresh():
+            status, body = request(f'{base}/api/users/token/refresh/', {'refresh': refresh_tokens.get()})
+            refresh_tokens.put(body['refresh'] if status == 200 else None)
+            return status, body
+
+        endpoints = {
+            'login': lambda: request(f'{base}/api/users/login/', credentials),
+            'token/refresh': refresh,
+            'jwks': lambda: request(f'{base}/.well-known/jwks.json'),
+        }
+
+        for name, call in endpoints.items():
+            self.stdout.write(f'{name:14} {measure(call, options["requests"], options["concurrency"])}')
@@ -0,0 +1,55 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import hashers
+from django.core.management.base import BaseCommand
+
+from apps.api import workers
+from apps.user.hashers import PBKDF2PasswordHasher, Argon2PasswordHasher, ScryptPasswordHasher
+
+
+HASHERS = {
+    'pbkdf2': PBKDF2PasswordHasher,
+    'argon2': Argon2PasswordHasher,
+    'scrypt': ScryptPasswordHasher,
+}
+
+
+class Command(BaseCommand):
+    help = 'Measure logins (password verifications) per second for each hasher, inline and in a process pool.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=50, help='Verifications per measurement.')
+        parser.add_argument('--threads', type=int, default=4, help='Concurrent request threads.')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Hashing pool size.')
+
+    def handle(self, *args, **options):
+        logins, threads = options['logins'], options['threads']
+        pool = workers.process_pool(options['workers'])
+
+        def pooled(password, encoded):
+            return pool.submit(hashers.verify_password, password, encoded).result()
+
+        with pool:
+            for name, hasher_class in HASHERS.items():
+                hasher = hasher_class()
+                try:
+                    encoded = hasher.encode('benchmark-password', hasher.salt())
+                except ValueError as exc:  # optional library missing
+                    self.stdout.write(f'{name:8} skipped: {exc}')
+                    continue
+
+                inline_rate = self.measure(hashers.verify_password, encoded, logins, threads)
+                pooled_rate = self.measure(pooled, encoded, logins, threads)
+                self.stdout.write(
+                    f'{name:8} inline: {inline_rate:8.1f} logins/s   '
+                    f'pool({options["workers"]}): {pooled_rate:8.1f} logins/s'
+                )
+
+    def measure(self, verify, encoded, logins, threads):
+        verify('benchmark-password', encoded)  # warm up (pool start-up, library loading)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(lambda _: verify('benchmark-password', encoded), range(logins)))
+        return logins / (time.perf_counter() - start)
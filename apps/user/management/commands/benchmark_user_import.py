@@ -0,0 +1,66 @@
+import statistics
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.api.models import Company
+from apps.user.serializers import UserSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure validating a --rows user payload (many=True) against --existing users of a '
+        'throw-away company: ms (p50/p95 over --repeat runs) and queries per validation.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000)
+        parser.add_argument('--existing', type=int, default=50000)
+        parser.add_argument('--repeat', type=int, default=10)
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        company = Company.objects.create(name=f'import-benchmark-{uuid.uuid4().hex[:12]}')
+        try:
+            User.objects.bulk_create(
+                [
+                    User(first_name='Existing', last_name=str(n), email=f'Existing.{n}@{company.pk}.example',
+                         role='driver', company=company)
+                    for n in range(options['existing'])
+                ],
+                batch_size=5000,
+            )
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute(f'ANALYZE {User._meta.db_table}')
+
+            # every tenth row collides, in a different case, with an existing user
+            payload = [
+                {
+                    'first_name': 'New', 'last_name': str(n), 'role': 'driver', 'password': 'abcdefgh1',
+                    'email': f'existing.{n}@{company.pk}.example' if n % 10 == 0 else f'new.{n}@{company.pk}.example',
+                }
+                for n in range(options['rows'])
+            ]
+
+            timings = []
+            for _ in range(options['repeat']):
+                serializer = UserSerializer(data=payload, many=True)
+                start = time.perf_counter()
+                with CaptureQueriesContext(connection) as queries:
+                    serializer.is_valid()
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            rejected = sum(1 for errors in serializer.errors if errors)
+            self.stdout.write(
+                f"{options['rows']} rows against {options['existing']} users, {rejected} rejected, "
+                f'{len(queries)} queries: p50 {statistics.median(timings):.1f} ms, '
+                f'p95 {timings[int(len(timings) * 0.95) - 1]:.1f} ms'
+            )
+        finally:
+            User.objects.filter(company=company).delete()
+            company.delete()
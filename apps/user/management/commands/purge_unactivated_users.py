@@ -0,0 +1,44 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.user.purge import purge_unactivated_users, unactivated_users
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete users who registered more than --max-age seconds ago and never activated their account, '
+        'in small batches with short transactions. Meant to run periodically (cron, systemd timer).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-age', type=int, default=settings.UNACTIVATED_USER_MAX_AGE,
+                            help='Minimum age (seconds) of the registrations to delete.')
+        parser.add_argument('--batch-size', type=int, default=settings.UNACTIVATED_USER_PURGE_BATCH_SIZE,
+                            help='Users deleted per transaction.')
+        parser.add_argument('--pause', type=float, default=settings.UNACTIVATED_USER_PURGE_PAUSE,
+                            help='Seconds to sleep between batches.')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the users that would be deleted.')
+
+    def handle(self, *args, **options):
+        if options['max_age'] < settings.ACCOUNT_ACTIVATION_TIMEOUT:
+            raise CommandError(
+                f'--max-age must be at least ACCOUNT_ACTIVATION_TIMEOUT ({settings.ACCOUNT_ACTIVATION_TIMEOUT} s): '
+                'younger registrations may still hold a valid activation link.'
+            )
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive.')
+
+        if options['dry_run']:
+            self.stdout.write(f'{unactivated_users(options["max_age"]).count()} unactivated users would be deleted')
+            return
+
+        purged = 0
+        start = time.perf_counter()
+        for deleted in purge_unactivated_users(options['max_age'], options['batch_size'], options['pause']):
+            purged += deleted
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{purged} users')
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f'{purged} unactivated users purged in {elapsed:.2f} s, {purged / elapsed if elapsed else 0:.0f} rows/s')
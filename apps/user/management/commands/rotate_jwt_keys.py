@@ -0,0 +1,88 @@
+import datetime
+import secrets
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.user.signing_keys import (
+    ACTIVE_FILE, ASYMMETRIC_ALGORITHMS, activate_key, generate_key, read_pending, write_key,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a new JWT signing key, publish it in the JWKS now and sign with it once JWKS_MAX_AGE '
+        'has passed, so verifiers holding a cached JWKS already know it. Previous keys stay in the JWKS '
+        'so outstanding tokens keep verifying; --prune removes keys older than the refresh token lifetime.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--algorithm', choices=ASYMMETRIC_ALGORITHMS, default=None,
+                            help='Key type to generate (defaults to JWT_ALGORITHM).')
+        parser.add_argument('--no-activate', action='store_true',
+                            help='Publish the key in the JWKS without scheduling it for signing.')
+        parser.add_argument('--activate', metavar='KID',
+                            help='Sign with the existing key KID right away instead of generating one.')
+        parser.add_argument('--prune', action='store_true',
+                            help='Delete inactive keys older than JWT_REFRESH_TOKEN_LIFETIME.')
+
+    def handle(self, *args, **options):
+        directory = Path(settings.JWT_KEYS_DIR)
+        pending = read_pending(directory)
+        if pending is not None and pending[1] <= time.time():
+            # due: record it as the active key before anything else changes
+            activate_key(pending[0])
+            pending = None
+
+        if options['activate']:
+            try:
+                activate_key(options['activate'])
+            except ImproperlyConfigured as e:
+                raise CommandError(e)
+            self.stdout.write(self.style.SUCCESS(f"Activated key {options['activate']}"))
+        else:
+            self.create_key(directory, pending, options)
+
+        if options['prune']:
+            self.prune()
+
+    def create_key(self, directory, pending, options):
+        algorithm = options['algorithm'] or settings.JWT_ALGORITHM
+        if algorithm not in ASYMMETRIC_ALGORITHMS:
+            raise CommandError(f'JWT_ALGORITHM is {algorithm}; pass --algorithm RS256 or EdDSA.')
+        if pending is not None and not options['no_activate']:
+            raise CommandError(
+                f'Key {pending[0]} is already scheduled to sign from '
+                f'{datetime.datetime.fromtimestamp(pending[1], datetime.timezone.utc):%Y-%m-%d %H:%M:%S} UTC; '
+                f'wait for it or use --activate {pending[0]}.'
+            )
+
+        kid = f"{datetime.datetime.now(datetime.timezone.utc):%Y%m%d%H%M%S}-{secrets.token_hex(4)}"
+        if options['no_activate']:
+            write_key(kid, generate_key(algorithm), activate=False)
+            note = ''
+        elif not (directory / ACTIVE_FILE).exists():
+            # the first key: no verifier can have cached a JWKS yet
+            write_key(kid, generate_key(algorithm))
+            note = ' (active)'
+        else:
+            activate_at = time.time() + settings.JWKS_MAX_AGE
+            write_key(kid, generate_key(algorithm), activate_at=activate_at)
+            note = f' (signing from {datetime.datetime.fromtimestamp(activate_at, datetime.timezone.utc):%Y-%m-%d %H:%M:%S} UTC)'
+        self.stdout.write(self.style.SUCCESS(f'Created {algorithm} key {kid}{note}'))
+
+    def prune(self):
+        directory = Path(settings.JWT_KEYS_DIR)
+        keep = {(directory / ACTIVE_FILE).read_text().strip()}
+        pending = read_pending(directory)
+        if pending is not None:
+            keep.add(pending[0])
+        cutoff = time.time() - settings.JWT_REFRESH_TOKEN_LIFETIME
+
+        for path in directory.glob('*.pem'):
+            if path.stem not in keep and path.stat().st_mtime < cutoff:
+                path.unlink()
+                self.stdout.write(f'Pruned key {path.stem}')
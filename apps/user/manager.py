@@ -1,4 +1,5 @@
 from django.contrib.auth.base_user import BaseUserManager
+from django.db.models.functions import Lower
 
 class UserManager(BaseUserManager):
     def create_user(self, first_name, last_name, email, password, role='client', **extra_fields):
@@ -31,3 +32,11 @@ class UserManager(BaseUserManager):
             raise ValueError('Superuser must have is_superuser=True.')
 
         return self.create_user(first_name, last_name, email, password, **extra_fields)
+
+    def email_owners(self, emails):
+        """Map the lowercased `emails` already taken, compared case-insensitively, to their user's id (one query)."""
+        return dict(
+            self.annotate(email_lower=Lower('email'))
+            .filter(email_lower__in=[email.lower() for email in emails])
+            .values_list('email_lower', 'id')
+        )
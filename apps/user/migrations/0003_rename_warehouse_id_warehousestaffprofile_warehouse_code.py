@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:08
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0002_user_token_version'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='warehousestaffprofile',
+            old_name='warehouse_id',
+            new_name='warehouse_code',
+        ),
+    ]
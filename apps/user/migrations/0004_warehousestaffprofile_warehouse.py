@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0003_rename_warehouse_id_warehousestaffprofile_warehouse_code'),
+        ('warehouse', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='warehousestaffprofile',
+            name='warehouse',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='staff', to='warehouse.warehouse'),
+        ),
+    ]
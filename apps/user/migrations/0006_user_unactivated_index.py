@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('user', '0005_driverprofile_capacity_driverprofile_latitude_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('is_active', False), ('last_login__isnull', True)), fields=['id'], name='user_unactivated'),
+        ),
+    ]
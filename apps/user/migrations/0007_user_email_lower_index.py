@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:02
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_companyteardown'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('user', '0006_user_unactivated_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='user_email_lower'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:28
+
+from django.db import migrations, models
+
+
+def mark_pending_registrations(apps, schema_editor):
+    # Every account that never logged in and is inactive is taken to be an
+    # unfinished registration, however old: admin deactivations cannot be told
+    # apart from it before this field, and the purge still applies its max age.
+    apps.get_model('user', 'User').objects.using(schema_editor.connection.alias).filter(
+        is_active=False, last_login__isnull=True,
+    ).update(activation_pending=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_companyteardown'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('user', '0007_user_email_lower_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='user',
+            name='user_unactivated',
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='activation_pending',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(mark_pending_registrations, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('activation_pending', True), ('is_active', False), ('last_login__isnull', True)), fields=['id'], name='user_unactivated'),
+        ),
+    ]
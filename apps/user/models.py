@@ -1,11 +1,13 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.utils.safestring import mark_safe
-from django.core.validators import FileExtensionValidator
+from django.core.validators import FileExtensionValidator, MaxValueValidator, MinValueValidator
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models.functions import Lower
 
 from . manager import UserManager
+from . import hashing
 from apps.api.models import Company
 
 
@@ -35,6 +37,9 @@ class User(AbstractUser):
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)  # access to Django admin
     date_joined = models.DateTimeField(auto_now_add=True)
+    token_version = models.PositiveIntegerField(default=0)  # bumped to revoke all of the user's JWTs
+    # signed up through UserRegistrationView and not activated yet (cleared by UserActivateView)
+    activation_pending = models.BooleanField(default=False)
 
     username = None
 
@@ -46,10 +51,41 @@ class User(AbstractUser):
     # update django about user model
     class Meta(AbstractUser.Meta):
         swappable = 'AUTH_USER_MODEL'
+        indexes = [
+            # registrations never activated, walked in pk order by purge_unactivated_users
+            models.Index(
+                fields=['id'], name='user_unactivated',
+                condition=models.Q(activation_pending=True, is_active=False, last_login__isnull=True),
+            ),
+            # case-insensitive email lookups (UserManager.email_owners)
+            models.Index(Lower('email'), name='user_email_lower'),
+        ]
 
     def __str__(self):
         return "{} {}".format(self.first_name, self.last_name)
 
+    def save(self, *args, **kwargs):
+        # activated some other way (e.g. in the admin): no longer a pending registration
+        if self.is_active and self.activation_pending:
+            self.activation_pending = False
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'activation_pending'}
+        super().save(*args, **kwargs)
+
+    def set_password(self, raw_password):
+        self.password = hashing.make_password(raw_password)
+        self._password = raw_password
+
+    def check_password(self, raw_password):
+        """Same as Django's check_password, but hashes in the hashing pool when configured"""
+        is_correct, must_update = hashing.verify_password(raw_password, self.password)
+        if is_correct and must_update:
+            # transparent upgrade to the preferred hasher / cost
+            self.set_password(raw_password)
+            self._password = None
+            self.save(update_fields=['password'])
+        return is_correct
+
 
 
 
@@ -86,7 +122,10 @@ class WarehouseStaffProfile(models.Model):
         blank=True,
         null=True
     )
-    warehouse_id = models.CharField(max_length=50)
+    warehouse_code = models.CharField(max_length=50)
+    warehouse = models.ForeignKey(
+        'warehouse.Warehouse', on_delete=models.SET_NULL, null=True, blank=True, related_name='staff'
+    )
     shift = models.CharField(max_length=50, blank=True)
     is_active = models.BooleanField(default=True)
 
@@ -111,6 +150,10 @@ class DriverProfile(models.Model):
     vehicle_assigned = models.CharField(max_length=100, blank=True)
     last_check_in = models.DateTimeField(null=True, blank=True)
     current_location = models.CharField(max_length=255, blank=True)
+    # last reported position (see DriverCheckInView); used by dispatch
+    latitude = models.FloatField(null=True, blank=True, validators=[MinValueValidator(-90), MaxValueValidator(90)])
+    longitude = models.FloatField(null=True, blank=True, validators=[MinValueValidator(-180), MaxValueValidator(180)])
+    capacity = models.PositiveSmallIntegerField(default=20)  # open shipments the vehicle can take
 
     def __str__(self):
         return f"Driver: {self.user.get_full_name()}"
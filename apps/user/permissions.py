@@ -1,5 +1,50 @@
 from rest_framework.permissions import BasePermission
 
+from .capabilities import Capability, get_capabilities, permission_bit
+
 class IsCompanyAdmin(BasePermission):
     def has_permission(self, request, view):
         return request.user.is_authenticated and request.user.role == 'company_admin'
+
+
+class HasCapability(BasePermission):
+    """
+    Grants access when the user holds every bit in `required`.
+    Checked against the cached capability bitset, so it costs no query.
+    """
+    required = 0
+
+    def has_permission(self, request, view):
+        if not request.user or not request.user.is_authenticated:
+            return False
+        return get_capabilities(request.user) & self.required == self.required
+
+
+def capability_required(*capabilities, perms=()):
+    """Build a permission class requiring all the given capabilities and 'app_label.codename' perms."""
+    required = 0
+    for capability in capabilities:
+        required |= capability
+    for perm in perms:
+        required |= permission_bit(perm)
+    return type('CapabilityRequired', (HasCapability,), {'required': int(required)})
+
+
+class IsDispatcher(HasCapability):
+    required = Capability.DISPATCHER
+
+
+class IsWarehouseStaff(HasCapability):
+    required = Capability.WAREHOUSE_STAFF | Capability.WAREHOUSE_ACTIVE
+
+
+class IsDriver(HasCapability):
+    required = Capability.DRIVER
+
+
+class IsAccountant(HasCapability):
+    required = Capability.ACCOUNTANT
+
+
+class CanApproveInvoices(HasCapability):
+    required = Capability.ACCOUNTANT | Capability.APPROVE_INVOICES
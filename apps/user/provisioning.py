@@ -0,0 +1,94 @@
+import functools
+import threading
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from .models import DispatcherProfile, WarehouseStaffProfile, DriverProfile, CustomerProfile, AccountantProfile
+
+
+# Profile model created for each role; admin roles have no profile.
+ROLE_PROFILES = {
+    'super_admin': None,
+    'company_admin': None,
+    'dispatcher': DispatcherProfile,
+    'warehouse_staff': WarehouseStaffProfile,
+    'driver': DriverProfile,
+    'customer': CustomerProfile,
+    'accountant': AccountantProfile,
+}
+
+BATCH_SIZE = 1000
+
+# Users waiting for their atomic block to commit, per thread and database
+# alias: one batch per block, keyed by its savepoint ids. A rolled back block
+# takes its flush callback with it, and the batch is dropped unflushed.
+_pending = threading.local()
+
+
+def provision_profiles(users, using=DEFAULT_DB_ALIAS):
+    """Create the missing role profile for each user, one bulk INSERT per profile model."""
+    users_by_model = {}
+    for user in users:
+        model = ROLE_PROFILES.get(user.role)
+        if model is not None and user.pk is not None:
+            users_by_model.setdefault(model, []).append(user)
+
+    for model, members in users_by_model.items():
+        model.objects.using(using).bulk_create(
+            [model(user=user) for user in members],
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,  # profile already exists
+        )
+
+
+def schedule_profile_provisioning(users, using=DEFAULT_DB_ALIAS):
+    """
+    Provision profiles for `users` once the current transaction commits.
+
+    All users scheduled within one atomic block are provisioned together by a
+    single flush after the transaction commits; those of a block that rolls
+    back are never provisioned. Outside atomic blocks, or with
+    PROFILE_PROVISIONING_DEFERRED off, profiles are created immediately.
+    """
+    users = [user for user in users if ROLE_PROFILES.get(user.role) is not None]
+    if not users:
+        return
+
+    connection = transaction.get_connection(using)
+    if not settings.PROFILE_PROVISIONING_DEFERRED or not connection.in_atomic_block:
+        provision_profiles(users, using)
+        return
+
+    batches = _pending_batches(connection, using)
+    block = tuple(connection.savepoint_ids)
+    if block not in batches:
+        batch = []
+        flush = functools.partial(_flush, batch, using)
+        batches[block] = (flush, batch)
+        transaction.on_commit(flush, using=using)
+    batches[block][1].extend(users)
+
+
+def _pending_batches(connection, using):
+    """This thread's batches for `using`, without those whose flush already ran or was rolled back."""
+    if not hasattr(_pending, 'batches'):
+        _pending.batches = {}
+    batches = _pending.batches.setdefault(using, {})
+    if batches:
+        callbacks = {id(entry[1]) for entry in connection.run_on_commit}
+        for block, (flush, _users) in list(batches.items()):
+            if id(flush) not in callbacks:
+                del batches[block]
+    return batches
+
+
+def _flush(users, using):
+    # users deleted again before the commit have nothing to attach a profile to
+    committed = set(
+        get_user_model().objects.using(using)
+        .filter(pk__in=[user.pk for user in users])
+        .values_list('pk', flat=True)
+    )
+    provision_profiles([user for user in users if user.pk in committed], using)
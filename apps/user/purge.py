@@ -0,0 +1,48 @@
+import datetime
+import time
+
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+
+# Registered but never activated (UserRegistrationView / UserActivateView);
+# accounts deactivated by an admin have no `activation_pending` and are kept.
+# Matches the partial index `user_unactivated`
+UNACTIVATED = Q(activation_pending=True, is_active=False, last_login__isnull=True)
+
+
+def unactivated_users(max_age, using=DEFAULT_DB_ALIAS):
+    """Users who signed up more than `max_age` seconds ago and never activated."""
+    cutoff = timezone.now() - datetime.timedelta(seconds=max_age)
+    return get_user_model().objects.using(using).filter(UNACTIVATED, date_joined__lt=cutoff)
+
+
+def purge_unactivated_users(max_age, batch_size, pause=0.0, using=DEFAULT_DB_ALIAS):
+    """
+    Delete stale unactivated users `batch_size` at a time, yielding the number
+    of users deleted by each batch.
+
+    Batches walk the primary key (keyset, through the partial index) instead
+    of offsets, each in its own short transaction so row locks are held only
+    for one batch, with `pause` seconds between batches to leave the database
+    to regular traffic. The deletion collector only ever loads one batch.
+    """
+    users = unactivated_users(max_age, using)
+    last_pk = 0
+    while True:
+        pks = list(users.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return
+        last_pk = pks[-1]
+
+        with transaction.atomic(using=using):
+            # re-checked: a user activated since the batch was read is kept
+            deleted, per_model = users.filter(pk__in=pks).delete()
+        yield per_model.get(users.model._meta.label, 0)
+
+        if len(pks) < batch_size:
+            return
+        if pause:
+            time.sleep(pause)
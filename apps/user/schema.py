@@ -0,0 +1,15 @@
+from drf_spectacular.extensions import OpenApiAuthenticationExtension
+
+
+class JWTAuthenticationScheme(OpenApiAuthenticationExtension):
+    """Documents JWTAuthentication as a bearer scheme (browsers may send the same access token in the `jwt` cookie)."""
+    target_class = 'apps.user.authentication.JWTAuthentication'
+    name = 'jwtAuth'
+
+    def get_security_definition(self, auto_schema):
+        return {
+            'type': 'http',
+            'scheme': 'bearer',
+            'bearerFormat': 'JWT',
+            'description': 'Access token from login or token refresh, also accepted in the `jwt` cookie.',
+        }
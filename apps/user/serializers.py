@@ -1,15 +1,20 @@
 import json
-from django.contrib.auth import authenticate, get_user_model, update_session_auth_hash
+from django.contrib.auth import get_user_model
 from django.conf import settings
-from rest_framework import serializers
+from rest_framework import exceptions, serializers
+from rest_framework.settings import api_settings
 from django.utils.translation import gettext_lazy as _
 
+from . import capabilities, hashing, lockout
+from .provisioning import schedule_profile_provisioning
 from .models import DispatcherProfile, WarehouseStaffProfile, DriverProfile, CustomerProfile, AccountantProfile
 from apps.api.models import Company
+from apps.api.tracing import TracedValidationMixin
+from apps.search.documents import USER_FIELDS as SEARCH_USER_FIELDS, schedule_sync as schedule_search_sync
 
 
 
-class UserPasswordResetSerializer(serializers.Serializer):
+class UserPasswordResetSerializer(TracedValidationMixin, serializers.Serializer):
     email = serializers.EmailField()
 
     def validate_email(self, value):
@@ -24,7 +29,7 @@ class UserPasswordResetSerializer(serializers.Serializer):
         return value
 
 
-class UserPasswordResetConfirmSerializer(serializers.Serializer):
+class UserPasswordResetConfirmSerializer(TracedValidationMixin, serializers.Serializer):
     new_password1 = serializers.CharField(max_length=128)
     new_password2 = serializers.CharField(max_length=128)
 
@@ -35,7 +40,7 @@ class UserPasswordResetConfirmSerializer(serializers.Serializer):
 
 
 
-class LoginSerializer(serializers.Serializer):
+class LoginSerializer(TracedValidationMixin, serializers.Serializer):
     email = serializers.EmailField()
     password = serializers.CharField(write_only=True)
     role = serializers.ChoiceField(choices=get_user_model().ROLE_CHOICES)
@@ -49,18 +54,33 @@ class LoginSerializer(serializers.Serializer):
         if not email or not password:
             raise serializers.ValidationError({'message': 'Email and password are required.'})
 
-        # Filter user by email and role
-        user = get_user_model().objects.filter(email=email, role=role).first()
-        
+        request = self.context.get('request')
+        ip = lockout.client_ip(request) if request else None
+
+        # Locked accounts / IPs are rejected before any hashing or query
+        wait = lockout.lockout_remaining(email, role, ip)
+        if wait:
+            raise exceptions.Throttled(wait=wait, detail='Too many failed login attempts.')
+
+        # Filter user by email and role (skipped for emails recently found unknown)
+        user = None
+        if not lockout.is_known_unknown(email, role):
+            user = get_user_model().objects.filter(email=email, role=role).first()
+
         if user is None:
-            raise serializers.ValidationError({'message': 'User not found!'})
+            # Hash anyway so unknown emails take as long as wrong passwords
+            hashing.dummy_verify(password)
+            lockout.remember_unknown(email, role)
+            lockout.register_failure(email, role, ip)
+            raise serializers.ValidationError({'message': 'Invalid email or password.'})
 
         if not user.check_password(password):
-            raise serializers.ValidationError({'message': 'Incorrect password!'})
+            lockout.register_failure(email, role, ip)
+            raise serializers.ValidationError({'message': 'Invalid email or password.'})
 
-        user = authenticate(email=email, password=password)
-        
-        if user and user.is_active:
+        lockout.register_success(email, role)
+
+        if user.is_active:
             # Return user and a success message
             return {'user': user, 'message': 'Login successful!'}
         
@@ -70,11 +90,43 @@ class LoginSerializer(serializers.Serializer):
 
 
 class UserLogoutSerializer(serializers.Serializer):
-    pass
+    refresh = serializers.CharField(required=False, write_only=True)  # revoked along with the access token
+
+
+
+class TokenRefreshSerializer(serializers.Serializer):
+    # the refresh token may also come from the jwt_refresh cookie; the response carries the new one
+    refresh = serializers.CharField(required=False)
+    token = serializers.CharField(read_only=True)
+
+
+
+class JWKSSerializer(serializers.Serializer):
+    keys = serializers.ListField(child=serializers.DictField(), read_only=True)
+
+
+
+class LoginLockoutMetricsSerializer(serializers.Serializer):
+    failures = serializers.IntegerField(read_only=True)
+    lockouts = serializers.IntegerField(read_only=True)
+    rejected_while_locked = serializers.IntegerField(read_only=True)
+    unknown_email_hits = serializers.IntegerField(read_only=True)
 
 
 
-class ChangePasswordSerializer(serializers.Serializer):
+class DriverCheckInSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DriverProfile
+        fields = ['latitude', 'longitude', 'current_location', 'last_check_in']
+        read_only_fields = ['last_check_in']
+        extra_kwargs = {
+            'latitude': {'required': True, 'allow_null': False},
+            'longitude': {'required': True, 'allow_null': False},
+        }
+
+
+
+class ChangePasswordSerializer(TracedValidationMixin, serializers.Serializer):
     old_password = serializers.CharField(required=True, write_only=True, style={'input_type': 'password'})
     new_password = serializers.CharField(required=True, write_only=True, style={'input_type': 'password'})
     confirm_password = serializers.CharField(required=True, write_only=True, style={'input_type': 'password'})
@@ -90,27 +142,121 @@ class ChangePasswordSerializer(serializers.Serializer):
         return data
 
 
-    def save(self):
-        user = self.context['request'].user
-        user.set_password(self.validated_data['new_password'])
-        user.save()
-        
-         # ✅ Prevent automatic logout
-        update_session_auth_hash(self.context['request'], user)
-        
-        return user
 
+class UserListSerializer(serializers.ListSerializer):
+    """
+    Handles `UserSerializer(many=True)` payloads in bulk.
+
+    Email uniqueness for every row is checked with a single query, and rows are
+    written with `bulk_create` / `bulk_update`. For updates, pass the users as
+    `instance` and include each row's `id` in the payload.
+    """
+    batch_size = 1000
+
+    @property
+    def instances_by_id(self):
+        if not hasattr(self, '_instances_by_id'):
+            self._instances_by_id = {user.pk: user for user in self.instance}
+        return self._instances_by_id
+
+    def run_child_validation(self, data):
+        instance = None
+        if self.instance is not None:
+            try:
+                instance = self.instances_by_id[int(data['id'])]
+            except (KeyError, TypeError, ValueError):
+                raise serializers.ValidationError({"id": "Unknown user."})
+
+        self.child.instance = instance
+        self.child.initial_data = data
+        validated = super().run_child_validation(data)
+        if instance is not None:
+            validated['id'] = instance.pk
+        return validated
+
+    def to_internal_value(self, data):
+        rows = super().to_internal_value(data)
+
+        rows_by_email = {}
+        for index, row in enumerate(rows):
+            if row.get('email'):
+                rows_by_email.setdefault(row['email'].lower(), []).append(index)
+
+        errors = {}
+        for indexes in rows_by_email.values():
+            if len(indexes) > 1:
+                for index in indexes:
+                    errors[index] = {"email": ["This email address is duplicated in the payload."]}
+
+        taken = self.child.Meta.model.objects.email_owners(rows_by_email)
+        for email, user_id in taken.items():
+            for index in rows_by_email[email]:
+                if rows[index].get('id') != user_id:
+                    errors[index] = {"email": ["This email address is already in use."]}
+
+        if errors:
+            if getattr(api_settings, 'LIST_SERIALIZER_ERRORS_AS_DICT', False):
+                raise serializers.ValidationError(errors)
+            raise serializers.ValidationError([errors.get(index, {}) for index in range(len(rows))])
+        return rows
 
+    def create(self, validated_data):
+        users = []
+        for attrs in validated_data:
+            password = attrs.pop('password', None)
+            attrs.pop('password_confirmation', None)
+            user = self.child.Meta.model(**attrs)
+            if password:
+                user.set_password(password)
+            else:
+                user.set_unusable_password()
+            users.append(user)
+
+        # bulk_create sends no post_save signals, so profiles are provisioned
+        # (search documents built, cached unknown logins dropped) here in one batch
+        users = self.child.Meta.model.objects.bulk_create(users, batch_size=self.batch_size)
+        lockout.forget_unknown_users(users)
+        schedule_profile_provisioning(users)
+        schedule_search_sync([user.pk for user in users])
+        return users
 
-class UserSerializer(serializers.ModelSerializer):
+    def update(self, instance, validated_data):
+        users, fields = [], set()
+        for attrs in validated_data:
+            user = self.instances_by_id[attrs.pop('id')]
+            password = attrs.pop('password', None)
+            attrs.pop('password_confirmation', None)
+            for attr, value in attrs.items():
+                setattr(user, attr, value)
+                fields.add(attr)
+            if password:
+                user.set_password(password)
+                fields.add('password')
+            users.append(user)
+
+        if fields:
+            self.child.Meta.model.objects.bulk_update(users, sorted(fields), batch_size=self.batch_size)
+            # bulk_update sends no post_save, which would drop the cached capability bitsets
+            capabilities.invalidate_user(*[user.pk for user in users])
+        if {'email', 'role'} & fields:
+            lockout.forget_unknown_users(users)
+        if SEARCH_USER_FIELDS.intersection(fields):
+            schedule_search_sync([user.pk for user in users])
+        return users
+
+
+
+class UserSerializer(TracedValidationMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=False, style={'input_type': 'password'})
     password_confirmation = serializers.CharField(write_only=True, required=False, style={'input_type': 'password'})
 
     class Meta:
         model = get_user_model()
         fields = ['id', 'first_name', 'last_name', 'role', 'is_active', 'email', 'password', 'password_confirmation']
+        list_serializer_class = UserListSerializer
         extra_kwargs = {
-            'email': {'required': False},
+            # uniqueness is checked in validate(), or once per payload by UserListSerializer
+            'email': {'required': False, 'validators': []},
             'is_active': {'read_only': True, 'required': False},
             'password': {'write_only': True, 'required': False},
             'password_confirmation': {'write_only': True, 'required': False},
@@ -120,11 +266,11 @@ class UserSerializer(serializers.ModelSerializer):
     def validate(self, data):
         user_id = self.instance.id if self.instance else None
 
-        # Validate email
+        # Validate email (many=True payloads are checked in bulk by UserListSerializer)
         email = data.get('email')
-        if email and self.instance and email != self.instance.email:
-            existing_user = get_user_model().objects.exclude(id=user_id).filter(email=email).first()
-            if existing_user:
+        batched = isinstance(self.parent, UserListSerializer)
+        if email and not batched and not (self.instance and email == self.instance.email):
+            if get_user_model().objects.email_owners([email]).get(email.lower(), user_id) != user_id:
                 raise serializers.ValidationError({"email": "This email address is already in use."})
 
         # Validate password
@@ -149,10 +295,17 @@ class UserSerializer(serializers.ModelSerializer):
         password = validated_data.pop('password', None)
         validated_data.pop('password_confirmation', None)
 
-        instance = super().update(instance, validated_data)
+        # single UPDATE touching only the submitted columns
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        update_fields = list(validated_data)
+
         if password:
             instance.set_password(password)
-            instance.save()
+            update_fields.append('password')
+
+        if update_fields:
+            instance.save(update_fields=update_fields)
         return instance
 
 
@@ -0,0 +1,146 @@
+import os
+import threading
+import time
+from pathlib import Path
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from jwt.algorithms import OKPAlgorithm, RSAAlgorithm
+
+
+# Key ring for asymmetric JWT signing (RS256 / EdDSA).
+# JWT_KEYS_DIR holds one `<kid>.pem` private key per key, an `active` file
+# naming the kid used for signing and, during a rotation, a `pending` file
+# holding `<kid> <unix time>`: the new key is published in the JWKS at once and
+# only signs from that time on, once verifiers' cached JWKS have expired.
+# Every key in the directory stays valid for verification and is published in
+# the JWKS, so tokens signed before a rotation keep working until the old key
+# is pruned.
+
+ASYMMETRIC_ALGORITHMS = ('RS256', 'EdDSA')
+ACTIVE_FILE = 'active'
+PENDING_FILE = 'pending'
+
+# seconds between checks of the directory for a rotation; encoding and
+# verifying tokens otherwise only read the loaded key ring
+RELOAD_INTERVAL = 5
+
+_keyring = None
+_keyring_source = None
+_checked_at = None
+_lock = threading.Lock()
+
+
+class KeyRing:
+    def __init__(self, active_kid, private_keys, pending=None):
+        for kid in [active_kid, *(pending[:1] if pending else [])]:
+            if kid not in private_keys:
+                raise ImproperlyConfigured(f'JWT key "{kid}" not found in {settings.JWT_KEYS_DIR}.')
+        self.private_keys = private_keys
+        self.pending = pending
+        self.public_keys = {kid: key.public_key() for kid, key in private_keys.items()}
+        self.jwks = {'keys': [_to_jwk(kid, key) for kid, key in sorted(self.public_keys.items())]}
+        self._active_kid = active_kid
+
+    @property
+    def active_kid(self):
+        if self.pending is not None and time.time() >= self.pending[1]:
+            return self.pending[0]
+        return self._active_kid
+
+    @property
+    def signing_key(self):
+        return self.private_keys[self.active_kid]
+
+
+def _to_jwk(kid, public_key):
+    if isinstance(public_key, rsa.RSAPublicKey):
+        jwk, alg = RSAAlgorithm.to_jwk(public_key, as_dict=True), 'RS256'
+    else:
+        jwk, alg = OKPAlgorithm.to_jwk(public_key, as_dict=True), 'EdDSA'
+    return {**jwk, 'kid': kid, 'use': 'sig', 'alg': alg}
+
+
+def read_pending(directory):
+    """Return the scheduled `(kid, activate_at)` in `directory`, or None."""
+    try:
+        kid, activate_at = (Path(directory) / PENDING_FILE).read_text().split()
+    except FileNotFoundError:
+        return None
+    return kid, float(activate_at)
+
+
+def get_keyring():
+    """
+    Return the loaded key ring, re-reading the directory only after it changed
+    (a rotation adds a file and replaces `active` or `pending`, which bumps its
+    mtime). The directory itself is checked at most every RELOAD_INTERVAL.
+    """
+    global _keyring, _keyring_source, _checked_at
+    directory = Path(settings.JWT_KEYS_DIR)
+    now = time.monotonic()
+    if _keyring is not None and _keyring_source[0] == directory and now - _checked_at < RELOAD_INTERVAL:
+        return _keyring
+
+    try:
+        source = (directory, directory.stat().st_mtime_ns)
+    except FileNotFoundError:
+        raise ImproperlyConfigured(f'{directory} does not exist; run `manage.py rotate_jwt_keys` first.')
+
+    with _lock:
+        if _keyring is None or source != _keyring_source:
+            private_keys = {
+                path.stem: serialization.load_pem_private_key(path.read_bytes(), password=None)
+                for path in directory.glob('*.pem')
+            }
+            active_kid = (directory / ACTIVE_FILE).read_text().strip()
+            _keyring, _keyring_source = KeyRing(active_kid, private_keys, read_pending(directory)), source
+        _checked_at = now
+    return _keyring
+
+
+def generate_key(algorithm):
+    if algorithm == 'EdDSA':
+        return ed25519.Ed25519PrivateKey.generate()
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+def _replace(directory, name, content):
+    # atomic switch, so readers never see a half-written file
+    tmp = directory / f'.{name}.tmp'
+    tmp.write_text(content)
+    os.replace(tmp, directory / name)
+
+
+def write_key(kid, key, activate=True, activate_at=None):
+    """
+    Store `key` as `<kid>.pem` (owner-only) and optionally make it the signing
+    key, right away or from the unix time `activate_at`.
+    """
+    directory = Path(settings.JWT_KEYS_DIR)
+    directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+
+    pem = key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption(),
+    )
+    fd = os.open(directory / f'{kid}.pem', os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(pem)
+
+    if activate_at is not None:
+        _replace(directory, PENDING_FILE, f'{kid} {activate_at}')
+    elif activate:
+        activate_key(kid)
+
+
+def activate_key(kid):
+    """Sign with the stored key `kid` from now on, dropping any scheduled activation."""
+    directory = Path(settings.JWT_KEYS_DIR)
+    if not (directory / f'{kid}.pem').is_file():
+        raise ImproperlyConfigured(f'JWT key "{kid}" not found in {directory}.')
+    _replace(directory, ACTIVE_FILE, kid)
+    (directory / PENDING_FILE).unlink(missing_ok=True)
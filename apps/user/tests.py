@@ -1,3 +1,478 @@
-from django.test import TestCase
+import datetime
+import shutil
+import tempfile
+import time
+from unittest import mock
 
-# Create your tests here.
+import jwt
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import transaction
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.api.models import Company
+from apps.api.serializers import compile_serializer
+from apps.user import capabilities, jwt_tokens, lockout, provisioning, purge, signing_keys
+from apps.user.models import CustomerProfile, DriverProfile
+from apps.user.jwt_tokens import REFRESH, decode_token, encode_token, issue_token_pair
+from apps.user.serializers import UserSerializer
+from apps.user.tokens import make_activation_token, make_password_reset_token
+
+
+class CompiledUserSerializerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        company = Company.objects.create(name='Acme')
+        get_user_model().objects.bulk_create([
+            get_user_model()(
+                first_name=f'First {n}', last_name='Last', email=f'{role}.{n}@acme.example',
+                role=role, company=company, is_active=n % 2 == 0,
+            )
+            for role, _label in get_user_model().ROLE_CHOICES
+            for n in range(3)
+        ])
+
+    def test_matches_serializer_for_every_role(self):
+        compiled = compile_serializer(UserSerializer)
+        for role, _label in get_user_model().ROLE_CHOICES:
+            with self.subTest(role=role):
+                queryset = get_user_model().objects.filter(role=role).order_by('id')
+                expected = [dict(row) for row in UserSerializer(queryset, many=True).data]
+                self.assertEqual(len(expected), 3)
+                self.assertEqual(compiled.many_from_rows(queryset.values(*compiled.sources)), expected)
+                self.assertEqual(compiled.many_from_instances(queryset), expected)
+
+
+class UserEmailUniquenessTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(name='Acme')
+        cls.existing = get_user_model().objects.create_user(
+            'Eve', 'Existing', 'Eve@Acme.example', 'pw', role='driver', company=cls.company,
+        )
+
+    def rows(self, *emails):
+        return [
+            {'first_name': 'New', 'last_name': str(n), 'email': email, 'role': 'driver', 'password': 'abcdefgh1'}
+            for n, email in enumerate(emails)
+        ]
+
+    def row_errors(self, serializer):
+        # a list, or a dict of the failing rows with LIST_SERIALIZER_ERRORS_AS_DICT
+        errors = serializer.errors
+        return {index: row for index, row in (errors.items() if isinstance(errors, dict) else enumerate(errors)) if row}
+
+    def test_duplicates_within_payload(self):
+        serializer = UserSerializer(data=self.rows('a@acme.example', 'b@acme.example', 'A@acme.example'), many=True)
+        self.assertFalse(serializer.is_valid())
+        errors = self.row_errors(serializer)
+        self.assertEqual(sorted(errors), [0, 2])
+        self.assertIn('duplicated in the payload', str(errors[0]['email']))
+        self.assertIn('duplicated in the payload', str(errors[2]['email']))
+
+    def test_duplicates_against_database(self):
+        with self.assertNumQueries(1):
+            serializer = UserSerializer(data=self.rows('a@acme.example', 'eve@acme.EXAMPLE'), many=True)
+            self.assertFalse(serializer.is_valid())
+        errors = self.row_errors(serializer)
+        self.assertEqual(list(errors), [1])
+        self.assertIn('already in use', str(errors[1]['email']))
+
+        serializer = UserSerializer(data=self.rows('EVE@acme.example')[0])
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('already in use', str(serializer.errors['email']))
+
+    def test_own_email_is_not_a_duplicate(self):
+        serializer = UserSerializer(self.existing, data={'email': 'eve@acme.example'}, partial=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+
+        payload = [{'id': self.existing.pk, 'email': 'EVE@acme.example'}]
+        serializer = UserSerializer([self.existing], data=payload, many=True, partial=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+
+
+class UserActivationTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'Nia', 'New', 'nia@acme.example', 'pw', role='customer', is_active=False, activation_pending=True,
+        )
+
+    def activate(self, uidb64, token):
+        return APIClient().get(f'/api/users/activate/{uidb64}/{token}/')
+
+    def test_activate_twice(self):
+        uidb64, token = make_activation_token(self.user)
+        self.assertEqual(self.activate(uidb64, token).status_code, 200)
+
+        response = self.activate(uidb64, token)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['message'], 'Account already activated.')
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.is_active)
+        self.assertIsNone(self.user.last_login)
+
+    def test_expired_link(self):
+        issued = time.time() - settings.ACCOUNT_ACTIVATION_TIMEOUT - 1
+        with mock.patch('django.core.signing.time.time', return_value=issued):
+            uidb64, token = make_activation_token(self.user)
+        self.assertEqual(self.activate(uidb64, token).status_code, 400)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+
+    def test_tampered_link(self):
+        uidb64, token = make_activation_token(self.user)
+        other = get_user_model().objects.create_user(
+            'Oli', 'Other', 'oli@acme.example', 'pw', role='customer', is_active=False, activation_pending=True,
+        )
+        other_uidb64, _token = make_activation_token(other)
+
+        for link in ((uidb64, token[:-1] + ('A' if token[-1] != 'A' else 'B')), (other_uidb64, token)):
+            with self.subTest(link=link):
+                self.assertEqual(self.activate(*link).status_code, 400)
+        self.assertFalse(get_user_model().objects.filter(is_active=True).exists())
+
+    def test_deactivated_account(self):
+        deactivated = get_user_model().objects.create_user(
+            'Dee', 'Deactivated', 'dee@acme.example', 'pw', role='customer', is_active=False,
+        )
+        self.assertEqual(self.activate(*make_activation_token(deactivated)).status_code, 400)
+        deactivated.refresh_from_db()
+        self.assertFalse(deactivated.is_active)
+
+    def test_registration_is_pending_until_activated(self):
+        response = APIClient().post('/api/users/register/', {
+            'first_name': 'Reg', 'last_name': 'Istered', 'email': 'reg@acme.example', 'role': 'customer',
+            'password': 'abcdefgh1',
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        user = get_user_model().objects.get(email='reg@acme.example')
+        self.assertTrue(user.activation_pending)
+
+        self.assertEqual(self.activate(*make_activation_token(user)).status_code, 200)
+        user.refresh_from_db()
+        self.assertTrue(user.is_active)
+        self.assertFalse(user.activation_pending)
+
+
+class PurgeUnactivatedUsersTests(TestCase):
+    def test_only_pending_registrations_are_purged(self):
+        User = get_user_model()
+        pending = User.objects.create_user('Pen', 'Ding', 'pen@acme.example', 'pw', role='customer', is_active=False, activation_pending=True)
+        deactivated = User.objects.create_user('Dee', 'Activated', 'dee@acme.example', 'pw', role='customer', is_active=False)
+        activated_by_admin = User.objects.create_user('Adm', 'In', 'adm@acme.example', 'pw', role='customer', is_active=False, activation_pending=True)
+        activated_by_admin.is_active = True
+        activated_by_admin.save(update_fields=['is_active'])
+        activated_by_admin.is_active = False
+        activated_by_admin.save(update_fields=['is_active'])
+        User.objects.update(date_joined=timezone.now() - datetime.timedelta(days=60))
+
+        self.assertEqual(sum(purge.purge_unactivated_users(max_age=60 * 60 * 24 * 30, batch_size=10)), 1)
+        self.assertFalse(User.objects.filter(pk=pending.pk).exists())
+        self.assertEqual(set(User.objects.values_list('pk', flat=True)), {deactivated.pk, activated_by_admin.pk})
+
+    def create_pending(self, count):
+        User = get_user_model()
+        users = [
+            User.objects.create_user('Pen', str(n), f'pen.{n}@acme.example', 'pw', role='customer', is_active=False, activation_pending=True)
+            for n in range(count)
+        ]
+        User.objects.update(date_joined=timezone.now() - datetime.timedelta(days=60))
+        return users
+
+    def test_batches_walk_the_primary_key(self):
+        self.create_pending(5)
+        recent = get_user_model().objects.create_user('New', 'Comer', 'new@acme.example', 'pw', role='customer', is_active=False, activation_pending=True)
+
+        self.assertEqual(list(purge.purge_unactivated_users(max_age=60 * 60 * 24 * 30, batch_size=2)), [2, 2, 1])
+        self.assertEqual(list(get_user_model().objects.values_list('pk', flat=True)), [recent.pk])
+
+    def test_user_activated_mid_run_is_kept(self):
+        users = self.create_pending(4)
+        batches = purge.purge_unactivated_users(max_age=60 * 60 * 24 * 30, batch_size=2)
+        self.assertEqual(next(batches), 2)
+
+        # activated after the purge read its next batch of ids, before the delete
+        atomic = transaction.atomic
+
+        def activate_then_atomic(*args, **kwargs):
+            get_user_model().objects.filter(pk=users[3].pk).update(is_active=True, activation_pending=False)
+            return atomic(*args, **kwargs)
+
+        with mock.patch.object(purge.transaction, 'atomic', activate_then_atomic):
+            self.assertEqual(next(batches), 1)
+        self.assertEqual(list(batches), [])
+        self.assertEqual(list(get_user_model().objects.values_list('pk', flat=True)), [users[3].pk])
+
+
+class ChangePasswordTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'Cal', 'Customer', 'cal@acme.example', 'old-password', role='customer',
+        )
+        self.access, self.refresh = issue_token_pair(self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access}')
+
+    def change(self):
+        return self.client.put('/api/users/me/change_password/', {
+            'old_password': 'old-password', 'new_password': 'new-password', 'confirm_password': 'new-password',
+        }, format='json')
+
+    def test_bearer_token_only(self):
+        response = self.change()
+        self.assertEqual(response.status_code, 200, response.content)
+
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('new-password'))
+        self.assertEqual(self.user.token_version, 1)
+        for token, token_type in ((self.access, 'access'), (self.refresh, REFRESH)):
+            with self.assertRaises(jwt.InvalidTokenError):
+                decode_token(token, token_type)
+        self.assertEqual(decode_token(response.cookies['jwt'].value)['ver'], 1)
+
+    def test_single_write(self):
+        # the user lookup of authentication, then one UPDATE of password and token_version
+        with self.assertNumQueries(2):
+            self.assertEqual(self.change().status_code, 200)
+
+    def test_session_survives_change(self):
+        client = APIClient()
+        client.force_login(self.user)
+        response = client.put('/api/users/me/change_password/', {
+            'old_password': 'old-password', 'new_password': 'new-password', 'confirm_password': 'new-password',
+        }, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        client.cookies.pop('jwt')  # authenticate by the session alone
+        self.assertEqual(client.post('/api/users/logout/').status_code, 200)
+
+    def test_reset_confirm_single_write(self):
+        uidb64, token = make_password_reset_token(self.user)
+        # the link's user, then one UPDATE of password and token_version
+        with self.assertNumQueries(2):
+            response = APIClient().post(
+                f'/api/users/password_reset/confirm/{uidb64}/{token}/',
+                {'new_password1': 'new-password-42', 'new_password2': 'new-password-42'}, format='json',
+            )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('new-password-42'))
+        self.assertEqual(self.user.token_version, 1)
+        with self.assertRaises(jwt.InvalidTokenError):
+            decode_token(self.access)
+
+    def test_wrong_old_password(self):
+        response = self.client.put('/api/users/me/change_password/', {
+            'old_password': 'wrong', 'new_password': 'new-password', 'confirm_password': 'new-password',
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(decode_token(self.access)['user_id'], self.user.pk)
+
+
+class TokenRevocationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user('Cal', 'Customer', 'cal@acme.example', 'pw', role='customer')
+        self.access, self.refresh = issue_token_pair(self.user)
+
+    def test_logout_revokes_bearer_and_body_refresh_token(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access}')
+        response = client.post('/api/users/logout/', {'refresh': self.refresh}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        for token, token_type in ((self.access, 'access'), (self.refresh, REFRESH)):
+            with self.assertRaises(jwt.InvalidTokenError):
+                decode_token(token, token_type)
+        # 403 rather than 401: SessionAuthentication, listed first, sends no WWW-Authenticate challenge
+        self.assertEqual(client.post('/api/users/logout/').status_code, 403)
+
+    def test_refresh_token_is_single_use(self):
+        response = APIClient().post('/api/users/token/refresh/', {'refresh': self.refresh}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(decode_token(response.json()['refresh'], REFRESH)['user_id'], self.user.pk)
+
+        response = APIClient().post('/api/users/token/refresh/', {'refresh': self.refresh}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_concurrent_refresh_issues_one_pair(self):
+        # both requests decode the token before either claims it
+        payload = decode_token(self.refresh, REFRESH)
+        with mock.patch('apps.user.views.decode_token', return_value=payload):
+            statuses = [
+                APIClient().post('/api/users/token/refresh/', {'refresh': self.refresh}, format='json').status_code
+                for _ in range(2)
+            ]
+        self.assertEqual(statuses, [200, 401])
+
+    def test_refresh_checks_version_in_database(self):
+        # revoked by another process, whose cache this one does not share
+        get_user_model().objects.filter(pk=self.user.pk).update(token_version=F('token_version') + 1)
+        response = APIClient().post('/api/users/token/refresh/', {'refresh': self.refresh}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+
+class JWTKeyRotationTests(TestCase):
+    def setUp(self):
+        keys = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, keys)
+        key_settings = self.settings(JWT_ALGORITHM='EdDSA', JWT_KEYS_DIR=keys)
+        key_settings.enable()
+        self.addCleanup(key_settings.disable)
+        # every call re-checks the directory, except in test_directory_checked_once_per_interval
+        reload = mock.patch.object(signing_keys, 'RELOAD_INTERVAL', 0)
+        reload.start()
+        self.addCleanup(reload.stop)
+
+    def rotate(self, *args):
+        call_command('rotate_jwt_keys', *args, stdout=mock.Mock())
+
+    def signing_kid(self):
+        return jwt.get_unverified_header(encode_token({'user_id': 1}))['kid']
+
+    def published_kids(self):
+        return {key['kid'] for key in APIClient().get('/.well-known/jwks.json').json()['keys']}
+
+    def test_new_key_is_published_before_it_signs(self):
+        self.rotate()
+        first = self.signing_kid()
+        old_token = encode_token({'user_id': 1})
+
+        self.rotate()
+        second, _ = signing_keys.read_pending(settings.JWT_KEYS_DIR)
+        self.assertEqual(self.published_kids(), {first, second})
+        self.assertEqual(self.signing_kid(), first)
+        with self.assertRaises(CommandError):
+            self.rotate()
+
+        with mock.patch.object(signing_keys.time, 'time', return_value=time.time() + settings.JWKS_MAX_AGE):
+            self.assertEqual(self.signing_kid(), second)
+            # tokens signed before the switch still verify
+            self.assertEqual(jwt_tokens._verify(old_token)['user_id'], 1)
+
+    def test_activate(self):
+        self.rotate()
+        self.rotate('--no-activate')
+        kid = (self.published_kids() - {self.signing_kid()}).pop()
+
+        self.rotate('--activate', kid)
+        self.assertEqual(self.signing_kid(), kid)
+        with self.assertRaises(CommandError):
+            self.rotate('--activate', 'unknown')
+
+    def test_directory_checked_once_per_interval(self):
+        self.rotate()
+        self.rotate('--no-activate')
+        first = self.signing_kid()
+        kid = (self.published_kids() - {first}).pop()
+
+        with mock.patch.object(signing_keys, 'RELOAD_INTERVAL', 60):
+            signing_keys.get_keyring()
+            self.rotate('--activate', kid)
+            self.assertEqual(self.signing_kid(), first)
+            with mock.patch.object(signing_keys.time, 'monotonic', return_value=time.monotonic() + 60):
+                self.assertEqual(self.signing_kid(), kid)
+
+@override_settings(PROFILE_PROVISIONING_DEFERRED=True)
+class ProfileProvisioningTests(TestCase):
+    def create(self, email, role):
+        return get_user_model().objects.create_user('Pat', 'Profile', email, 'pw', role=role)
+
+    def test_provisioned_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            driver = self.create('driver@acme.example', 'driver')
+            customer = self.create('customer@acme.example', 'customer')
+            self.assertFalse(DriverProfile.objects.exists())
+        flushes = [callback for callback in callbacks if getattr(callback, 'func', None) is provisioning._flush]
+        self.assertEqual(len(flushes), 1)  # one flush for the block
+        self.assertTrue(DriverProfile.objects.filter(user=driver).exists())
+        self.assertTrue(CustomerProfile.objects.filter(user=customer).exists())
+
+    def test_not_provisioned_after_rollback(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self.create('driver@acme.example', 'driver')
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            # may reuse the rolled back user's pk
+            customer = self.create('customer@acme.example', 'customer')
+        self.assertFalse(DriverProfile.objects.exists())
+        self.assertEqual(list(CustomerProfile.objects.values_list('user_id', flat=True)), [customer.pk])
+
+
+class UnknownLoginEmailTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def login(self, email):
+        return APIClient().post('/api/users/login/', {'email': email, 'password': 'abcdefgh1', 'role': 'driver'}, format='json')
+
+    def test_registration_forgets_unknown_email(self):
+        self.assertEqual(self.login('dan@acme.example').status_code, 400)
+        self.assertTrue(lockout.is_known_unknown('dan@acme.example', 'driver'))
+
+        get_user_model().objects.create_user('Dan', 'Driver', 'dan@acme.example', 'abcdefgh1', role='driver')
+        self.assertEqual(self.login('dan@acme.example').status_code, 200)
+
+    def test_bulk_create_forgets_unknown_emails(self):
+        for email in ('a@acme.example', 'b@acme.example'):
+            self.login(email)
+        rows = [
+            {'first_name': 'New', 'last_name': 'Driver', 'email': email, 'role': 'driver', 'password': 'abcdefgh1'}
+            for email in ('a@acme.example', 'b@acme.example')
+        ]
+        serializer = UserSerializer(data=rows, many=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        serializer.save()
+        self.assertFalse(lockout.is_known_unknown('a@acme.example', 'driver'))
+        self.assertEqual(self.login('b@acme.example').status_code, 200)
+
+
+class LoginClientIPTests(TestCase):
+    def request(self, forwarded_for=None):
+        meta = {'REMOTE_ADDR': '10.0.0.2'}
+        if forwarded_for is not None:
+            meta['HTTP_X_FORWARDED_FOR'] = forwarded_for
+        return mock.Mock(META=meta)
+
+    def test_without_trusted_proxies_forwarded_for_is_ignored(self):
+        self.assertEqual(lockout.client_ip(self.request('203.0.113.7')), '10.0.0.2')
+
+    @override_settings(TRUSTED_PROXY_HOPS=1)
+    def test_one_proxy(self):
+        # the client controls everything left of what the proxy appended
+        self.assertEqual(lockout.client_ip(self.request('198.51.100.1, 203.0.113.7')), '203.0.113.7')
+        self.assertEqual(lockout.client_ip(self.request()), '10.0.0.2')
+
+    @override_settings(TRUSTED_PROXY_HOPS=2)
+    def test_two_proxies(self):
+        self.assertEqual(lockout.client_ip(self.request('198.51.100.1, 203.0.113.7, 10.0.0.1')), '203.0.113.7')
+        self.assertEqual(lockout.client_ip(self.request('203.0.113.7')), '10.0.0.2')
+
+
+class BulkUpdateCapabilitiesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_bulk_update_invalidates_capabilities(self):
+        users = [
+            get_user_model().objects.create_user('Dee', str(n), f'dee.{n}@acme.example', 'pw', role='dispatcher')
+            for n in range(2)
+        ]
+        before = [capabilities.get_capabilities(user) for user in users]
+
+        payload = [{'id': user.pk, 'role': 'accountant'} for user in users]
+        serializer = UserSerializer(users, data=payload, many=True, partial=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        serializer.save()
+
+        for user, bits in zip(get_user_model().objects.filter(pk__in=[user.pk for user in users]).order_by('pk'), before):
+            self.assertEqual(capabilities.get_capabilities(user), capabilities.compute_capabilities(user))
+            self.assertNotEqual(capabilities.get_capabilities(user), bits)
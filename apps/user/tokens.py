@@ -0,0 +1,67 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.core import signing
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
+
+
+ACTIVATION_SALT = 'apps.user.activation'
+PASSWORD_RESET_SALT = 'apps.user.password_reset'
+
+
+def _load(uidb64, token, salt, max_age):
+    """
+    Verify the signature and age of a link token without touching the database.
+    Returns the signed payload, or None for tampered, expired or mismatched links.
+    """
+    try:
+        payload = signing.loads(token, salt=salt, max_age=max_age)
+        uid = urlsafe_base64_decode(uidb64).decode()
+    except (signing.BadSignature, TypeError, ValueError, UnicodeDecodeError):
+        return None
+
+    if not isinstance(payload, list) or str(payload[0]) != uid:
+        return None
+    return payload
+
+
+def make_activation_token(user):
+    """Return the (uidb64, token) pair for an account activation link."""
+    uidb64 = urlsafe_base64_encode(force_bytes(user.pk))
+    return uidb64, signing.dumps([user.pk], salt=ACTIVATION_SALT)
+
+
+def read_activation_token(uidb64, token):
+    """Return the user id carried by a valid activation link, or None."""
+    payload = _load(uidb64, token, ACTIVATION_SALT, settings.ACCOUNT_ACTIVATION_TIMEOUT)
+    return payload[0] if payload else None
+
+
+def make_password_reset_token(user):
+    """
+    Return the (uidb64, token) pair for a password reset link.
+    The signed payload wraps a `default_token_generator` token, so the link
+    stops working once the password (or last login) changes.
+    """
+    uidb64 = urlsafe_base64_encode(force_bytes(user.pk))
+    return uidb64, signing.dumps([user.pk, default_token_generator.make_token(user)], salt=PASSWORD_RESET_SALT)
+
+
+def get_password_reset_user(uidb64, token):
+    """Return the user a valid password reset link belongs to, or None."""
+    payload = _load(uidb64, token, PASSWORD_RESET_SALT, settings.PASSWORD_RESET_TIMEOUT)
+    if payload is None or len(payload) != 2:
+        return None
+
+    UserModel = get_user_model()
+    # only the columns default_token_generator hashes, the names the password
+    # similarity validator compares against and the token version bumped on
+    # reset (avoids deferred loads)
+    user = UserModel.objects.only(
+        'pk', 'password', 'last_login', UserModel.get_email_field_name(), 'first_name', 'last_name', 'token_version'
+    ).filter(pk=payload[0]).first()
+
+    if user is None or not default_token_generator.check_token(user, payload[1]):
+        return None
+    return user
@@ -1,18 +1,22 @@
 from django.urls import include, path
-from rest_framework_nested.routers import SimpleRouter
-from rest_framework_nested.routers import NestedDefaultRouter
+from rest_framework.routers import SimpleRouter
 from .views import (
     UserRegistrationView,
     UserActivateView,
     UserPasswordResetView,
     UserPasswordResetConfirmView,
     UserLoginView, 
+    LoginLockoutMetricsView,
+    TokenRefreshView,
     UserLogoutView, 
     ChangePasswordView,
+    DriverCheckInView,
+    CompanyUserViewSet,
 )
 
 # Set up the main router for staff members
 router = SimpleRouter()
+router.register('company_users', CompanyUserViewSet, basename='company_users')
 
 
 
@@ -24,7 +28,10 @@ urlpatterns = [
     path('password_reset/', UserPasswordResetView.as_view(), name='password_reset'),
     path('password_reset/confirm/<uidb64>/<token>/', UserPasswordResetConfirmView.as_view(), name='password_reset_confirm'),
     path('login/', UserLoginView.as_view(), name='login'),
+    path('login/metrics/', LoginLockoutMetricsView.as_view(), name='login_metrics'),
+    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('logout/', UserLogoutView.as_view(), name='logout'),
     path('me/change_password/', ChangePasswordView.as_view(), name='change_user_password'),
+    path('me/check_in/', DriverCheckInView.as_view(), name='driver_check_in'),
     # 
 ]
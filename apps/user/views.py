@@ -1,33 +1,40 @@
-import jwt, datetime
+import jwt
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 from django.core.mail import EmailMessage
 from django.shortcuts import get_object_or_404
-from django.utils.encoding import force_bytes
-from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.contrib.auth import login, logout, get_user_model, update_session_auth_hash
-from django.contrib.auth.tokens import default_token_generator
 from django.contrib.auth.forms import SetPasswordForm
+from django.utils import timezone
 
 from rest_framework import status, generics, viewsets, mixins
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from rest_framework.exceptions import AuthenticationFailed
 
-from .utils import get_user_from_token
+from apps.api.mixins import CompiledListMixin
+from apps.api.tracing import span
+from . import lockout
+from .jwt_tokens import ACCESS, REFRESH, claim_token, decode_token, issue_token_pair, revoke_token, revoke_all_tokens
+from .tokens import make_activation_token, read_activation_token, make_password_reset_token, get_password_reset_user
+from .utils import set_jwt_cookies
 from .models import (
     DispatcherProfile, WarehouseStaffProfile, DriverProfile, CustomerProfile, AccountantProfile
 )
-from .permissions import IsCompanyAdmin
+from .permissions import IsCompanyAdmin, IsDriver
 from .serializers import (
     LoginSerializer,
     UserLogoutSerializer,
+    TokenRefreshSerializer,
+    JWKSSerializer,
+    LoginLockoutMetricsSerializer,
     UserPasswordResetSerializer,
     UserPasswordResetConfirmSerializer,
     UserSerializer,
     ChangePasswordSerializer,
+    DriverCheckInSerializer,
 )
 
 
@@ -36,23 +43,18 @@ from .serializers import (
 class UserRegistrationView(generics.GenericAPIView):
     serializer_class = UserSerializer
     permission_classes = [AllowAny]
+    idempotency_exempt = True
     
     def post(self, request, *args, **kwargs):
         serializer = self.serializer_class(data=request.data)
         
         if serializer.is_valid():
-            user_email = serializer.validated_data['email']
+            # email uniqueness is already checked by UserSerializer.validate;
+            # the account is created inactive in a single INSERT
+            user = serializer.save(is_active=False, activation_pending=True)
             
-            if get_user_model().objects.filter(email=user_email).exists():
-                return Response({"message": "This email is already registered."}, status=status.HTTP_400_BAD_REQUEST)
-
-            user = serializer.save()
-            user.is_active = False
-            user.save()
-            
-            # Generate a token for email verification
-            token = default_token_generator.make_token(user)
-            uidb64 = urlsafe_base64_encode(force_bytes(user.pk))
+            # Generate a signed, expiring token for email verification
+            uidb64, token = make_activation_token(user)
             
             # Construct activation URL
             activation_url = f"{settings.FRONTEND_PUBLIC_URL}/account/activate/{uidb64}/{token}/"
@@ -64,7 +66,8 @@ class UserRegistrationView(generics.GenericAPIView):
                 from_email=settings.EMAIL_HOST_USER, 
                 to=[user.email],
             )
-            message.send()
+            with span('email.send', subject='activation'):
+                message.send()
                 
             return Response({
                 'message': 'Registration successful. Please check your email to activate your account.',
@@ -81,22 +84,22 @@ class UserActivateView(APIView):
     
     def get(self, request, uidb64, token):
         """Verify the activation token and activate the user's account"""
-        try:
-            # Decode the user ID from the URL-safe base64 encoding
-            uid = urlsafe_base64_decode(uidb64).decode('utf-8')
-            user = get_user_model().objects.get(pk=uid)
-        except (TypeError, ValueError, OverflowError, get_user_model().DoesNotExist) as e:
-            return Response({'message': 'Invalid activation link or user not found.'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        if default_token_generator.check_token(user, token):
-            if user.is_active:
-                return Response({'message': 'Account already activated.'}, status=status.HTTP_400_BAD_REQUEST)
-            
-            user.is_active = True
-            user.save()
+        # Forged or expired links are rejected from the signature alone, without a DB hit
+        uid = read_activation_token(uidb64, token)
+        if uid is None:
+            return Response({'message': 'Invalid activation link.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Single conditional UPDATE; an account that has already logged in, or was
+        # deactivated by an admin, can't be (re-)activated by an old link
+        activated = get_user_model().objects.filter(
+            pk=uid, activation_pending=True, is_active=False, last_login__isnull=True,
+        ).update(is_active=True, activation_pending=False)
+        if activated:
             return Response({'message': 'Your account has been activated successfully.'}, status=status.HTTP_200_OK)
-        
-        return Response({'message': 'Invalid activation link.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if get_user_model().objects.filter(pk=uid, is_active=True).exists():
+            return Response({'message': 'Account already activated.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'message': 'Invalid activation link or user not found.'}, status=status.HTTP_400_BAD_REQUEST)
     
     
 
@@ -105,6 +108,7 @@ class UserActivateView(APIView):
 class UserPasswordResetView(generics.GenericAPIView):
     serializer_class = UserPasswordResetSerializer
     permission_classes = [AllowAny]
+    idempotency_exempt = True
     
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -114,8 +118,7 @@ class UserPasswordResetView(generics.GenericAPIView):
             
             if user:
                 # Generate token and URL for password reset
-                token = default_token_generator.make_token(user)
-                uidb64 = urlsafe_base64_encode(force_bytes(user.pk))
+                uidb64, token = make_password_reset_token(user)
                     
                 # Construct password-reset URL
                 password_reset_url = f"{settings.FRONTEND_PUBLIC_URL}/client/password_reset/confirm/{uidb64}/{token}/"
@@ -128,7 +131,8 @@ class UserPasswordResetView(generics.GenericAPIView):
                         from_email=settings.EMAIL_HOST_USER, 
                         to=[email],
                     )
-                    message.send()
+                    with span('email.send', subject='password_reset'):
+                        message.send()
                     
                     return Response({'message': 'Password reset link has been sent to your email address.'}, status=status.HTTP_200_OK)
                 except Exception as e:
@@ -146,20 +150,18 @@ class UserPasswordResetView(generics.GenericAPIView):
 class UserPasswordResetConfirmView(generics.GenericAPIView):
     serializer_class = UserPasswordResetConfirmSerializer
     permission_classes = [AllowAny]
+    idempotency_exempt = True
 
     def post(self, request, uidb64, token):
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
-            try:
-                uid = urlsafe_base64_decode(uidb64).decode()
-                user = get_user_model().objects.get(pk=uid)
-            except (TypeError, ValueError, OverflowError, get_user_model().DoesNotExist):
-                user = None
+            user = get_password_reset_user(uidb64, token)
 
-            if user is not None and default_token_generator.check_token(user, token):
+            if user is not None:
                 form = SetPasswordForm(user, request.data)
                 if form.is_valid():
-                    form.save()
+                    form.save(commit=False)
+                    revoke_all_tokens(user, update_fields=['password'])
                     return Response({"message": "Your password has been reset successfully."}, status=status.HTTP_200_OK)
                 else:
                     return Response(form.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -173,50 +175,88 @@ class UserPasswordResetConfirmView(generics.GenericAPIView):
 class UserLoginView(generics.GenericAPIView):
     serializer_class = LoginSerializer
     permission_classes = [AllowAny]
+    idempotency_exempt = True  # credentials and tokens are never replayed (see IdempotencyMiddleware)
     
     def post(self, request, *args, **kwargs):
-        serializer = self.serializer_class(data=request.data)
+        serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
             validated_data = serializer.validated_data
             user = validated_data['user']
             message = validated_data['message']
 
-            # Generate JWT token
-            token = self.generate_jwt_token(user)
+            # Generate a short-lived access token and a refresh token
+            access_token, refresh_token = issue_token_pair(user)
             login(request, user)
-            response = Response(status=status.HTTP_200_OK)
-            
-            # Set JWT in an HttpOnly cookie
-            response.set_cookie(
-                key='jwt', 
-                value=token,  # Use the actual token here
-                httponly=False,  # JavaScript can't access this cookie
-                secure=True,  # Use this in production (ensures HTTPS-only)
-                samesite='Lax'  # Helps mitigate CSRF
-            )
-
-            response.data = {
+            response = Response({
                 "message": message,
-                "token": token
-            }
-            return response
+                "token": access_token,
+                "refresh": refresh_token,
+            }, status=status.HTTP_200_OK)
+            return set_jwt_cookies(response, access_token, refresh_token)
 
         # If serializer is invalid, return errors
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-    
-    def generate_jwt_token(self, user):
-        """Generates JWT token with user information"""
-        payload = {
-            'user_id': user.id,
-            'exp': datetime.datetime.utcnow() + datetime.timedelta(days=7),  # Token expires after 7 days
-            'iat': datetime.datetime.utcnow()  # Issued at
-        }
 
-        # Encode the JWT token
-        token = jwt.encode(payload, settings.SECRET_KEY, algorithm='HS256')
 
-        # Return the token as a string
-        return token
+
+# Token Refresh View
+class TokenRefreshView(generics.GenericAPIView):
+    """Exchange a refresh token (body or cookie) for a new token pair; the old refresh token is revoked"""
+    serializer_class = TokenRefreshSerializer
+    permission_classes = [AllowAny]
+    idempotency_exempt = True
+
+    def post(self, request, *args, **kwargs):
+        token = request.data.get('refresh') or request.COOKIES.get('jwt_refresh')
+        if not token:
+            return Response({'message': 'Refresh token not provided.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            payload = decode_token(token, REFRESH)
+        except jwt.InvalidTokenError:
+            return Response({'message': 'Invalid or expired refresh token.'}, status=status.HTTP_401_UNAUTHORIZED)
+
+        user = get_user_model().objects.only('id', 'is_active', 'token_version').filter(pk=payload['user_id']).first()
+        # the version is checked against the row too: the cached one may be stale
+        # in another process (e.g. with a per-process cache)
+        if user is None or not user.is_active or payload.get('ver') != user.token_version:
+            return Response({'message': 'Invalid or expired refresh token.'}, status=status.HTTP_401_UNAUTHORIZED)
+
+        # rotate: a refresh token can be used only once, so concurrent
+        # requests with the same token get one new pair between them
+        if not claim_token(payload):
+            return Response({'message': 'Invalid or expired refresh token.'}, status=status.HTTP_401_UNAUTHORIZED)
+        access_token, refresh_token = issue_token_pair(user)
+        response = Response({'token': access_token, 'refresh': refresh_token}, status=status.HTTP_200_OK)
+        return set_jwt_cookies(response, access_token, refresh_token)
+
+
+
+# JWKS View
+class JWKSView(generics.GenericAPIView):
+    """Public keys for verifying tokens offline (RS256 / EdDSA signing only)"""
+    serializer_class = JWKSSerializer
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def get(self, request):
+        if settings.JWT_ALGORITHM == 'HS256':
+            return Response({'keys': []}, status=status.HTTP_200_OK)
+
+        from .signing_keys import get_keyring
+        response = Response(get_keyring().jwks, status=status.HTTP_200_OK)
+        response['Cache-Control'] = f'public, max-age={settings.JWKS_MAX_AGE}'
+        return response
+
+
+
+class LoginLockoutMetricsView(generics.GenericAPIView):
+    """Login failure and lockout counters, for monitoring"""
+    serializer_class = LoginLockoutMetricsSerializer
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(lockout.get_metrics(), status=status.HTTP_200_OK)
 
 
 
@@ -224,11 +264,30 @@ class UserLoginView(generics.GenericAPIView):
 class UserLogoutView(generics.GenericAPIView):
     serializer_class = UserLogoutSerializer
     permission_classes = [IsAuthenticated]  # Only authenticated users can log out
+    idempotency_exempt = True
 
     def post(self, request, *args, **kwargs):
+        # Revoke the presented tokens so a copied token stops working too:
+        # the access token that authenticated this request, and the refresh
+        # token from the body or cookie
+        if isinstance(request.auth, dict):
+            revoke_token(request.auth)
+        presented = (
+            (request.COOKIES.get('jwt'), ACCESS),
+            (request.data.get('refresh'), REFRESH),
+            (request.COOKIES.get('jwt_refresh'), REFRESH),
+        )
+        for token, token_type in presented:
+            if token:
+                try:
+                    revoke_token(decode_token(token, token_type))
+                except jwt.InvalidTokenError:
+                    pass
+
         response = Response(status=status.HTTP_200_OK) 
-        # Delete the JWT cookie
+        # Delete the JWT cookies
         response.delete_cookie('jwt') 
+        response.delete_cookie('jwt_refresh')
         # This will end the session
         logout(request)
         response.data = {
@@ -243,26 +302,54 @@ class UserLogoutView(generics.GenericAPIView):
 class ChangePasswordView(generics.UpdateAPIView):
     serializer_class = ChangePasswordSerializer
     permission_classes = [IsAuthenticated]
+    idempotency_exempt = True
 
     def get_object(self):
-        """Retrieve the user object using the JWT token."""
-        return get_user_from_token(self.request)
+        """The authenticated user, whether by Bearer header, jwt cookie or session."""
+        return self.request.user
 
     def update(self, request, *args, **kwargs):
         """Handle password change logic."""
         user = self.get_object()
-        if isinstance(user, Response):  # Check if session expired and handle response
-            return user
 
         serializer = self.serializer_class(data=request.data, context={'request': request})
         if serializer.is_valid():
             # Set new password and update session
             user.set_password(serializer.validated_data['new_password'])
-            user.save()
-            update_session_auth_hash(request, user)  # ✅ Ensure session is updated here too
-            return Response({"message": "Password updated successfully"}, status=status.HTTP_200_OK)
+            # One UPDATE saves the password and invalidates every outstanding token
+            revoke_all_tokens(user, update_fields=['password'])
+            if request.session.session_key:  # token-only clients have no session to keep
+                update_session_auth_hash(request, user)  # ✅ Ensure session is updated here too
+
+            # Hand this client a fresh pair
+            access_token, refresh_token = issue_token_pair(user)
+            response = Response({"message": "Password updated successfully"}, status=status.HTTP_200_OK)
+            return set_jwt_cookies(response, access_token, refresh_token)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 
+
+class DriverCheckInView(generics.GenericAPIView):
+    """A driver reports their position; dispatch only considers drivers who checked in recently."""
+    serializer_class = DriverCheckInSerializer
+    permission_classes = [IsDriver]
+
+    def post(self, request, *args, **kwargs):
+        profile = get_object_or_404(DriverProfile, user=request.user)
+        serializer = self.get_serializer(profile, data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save(last_check_in=timezone.now())
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+
+
+class CompanyUserViewSet(CompiledListMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
+    """Lists the users of the requesting company admin's company."""
+    serializer_class = UserSerializer
+    permission_classes = [IsCompanyAdmin]
+
+    def get_queryset(self):
+        return get_user_model().objects.filter(company_id=self.request.user.company_id).order_by('id')
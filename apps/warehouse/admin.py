@@ -0,0 +1,60 @@
+from django.contrib import admin
+
+from . import roster
+from .models import Shift, Warehouse, StockLevel, StockMovement
+
+
+@admin.register(Warehouse)
+class WarehouseAdmin(admin.ModelAdmin):
+    list_display = ('code', 'name', 'company', 'timezone', 'is_active', 'created_at')
+    search_fields = ('code', 'name', 'company__name')
+    list_filter = ('is_active', 'company')
+    ordering = ('company__name', 'code')
+    readonly_fields = ('created_at',)
+
+
+@admin.register(StockLevel)
+class StockLevelAdmin(admin.ModelAdmin):
+    list_display = ('sku', 'warehouse', 'on_hand', 'updated_at')
+    search_fields = ('sku', 'warehouse__code')
+    list_filter = ('warehouse',)
+    ordering = ('warehouse', 'sku')
+    list_select_related = ('warehouse',)
+    # levels only change through receive / pick, so they stay in step with the ledger
+    readonly_fields = ('warehouse', 'sku', 'on_hand', 'updated_at')
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'kind', 'sku', 'quantity', 'warehouse', 'reference', 'created_by', 'assigned_to')
+    search_fields = ('sku', 'reference', 'warehouse__code')
+    list_filter = ('kind', 'warehouse')
+    ordering = ('-created_at',)
+    list_select_related = ('warehouse', 'created_by', 'assigned_to__user')
+
+    # append-only ledger
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Shift)
+class ShiftAdmin(admin.ModelAdmin):
+    list_display = ('staff', 'warehouse', 'weekday', 'start_time', 'end_time')
+    search_fields = ('staff__user__first_name', 'staff__user__last_name', 'warehouse__code')
+    list_filter = ('weekday', 'warehouse')
+    ordering = ('warehouse', 'start_minute')
+    list_select_related = ('staff__user', 'warehouse')
+    raw_id_fields = ('staff',)
+
+    def save_model(self, request, obj, form, change):
+        roster.save_shift(obj)  # keeps the on-duty index in step
+
@@ -0,0 +1,140 @@
+import collections
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Now
+
+from .models import StockLevel, StockMovement
+
+
+# Stock changes are applied as `UPDATE ... SET on_hand = on_hand + CASE sku ...`
+# statements, a few hundred SKUs each, so a request with thousands of lines
+# costs a handful of queries, and concurrent receives/picks of the same SKU
+# never lose an update: each row is incremented in the database, under its
+# row lock only for the length of the short transaction. The rows are locked
+# first with SELECT ... FOR UPDATE in SKU order (an UPDATE locks them in
+# whatever order it scans them), so two requests lock shared rows in the same
+# order and can't deadlock; picks also check the levels they read, and
+# receives that the levels stay within the column's range.
+
+# largest quantity a line or a stock level can hold (IntegerField, int4)
+MAX_QUANTITY = 2 ** 31 - 1
+
+
+class InsufficientStock(Exception):
+    def __init__(self, shortages):
+        super().__init__(f'Insufficient stock for {len(shortages)} SKU(s)')
+        self.shortages = shortages  # {sku: missing quantity}
+
+
+class StockLimitExceeded(Exception):
+    def __init__(self, excess):
+        super().__init__(f'Stock above {MAX_QUANTITY} for {len(excess)} SKU(s)')
+        self.excess = excess  # {sku: quantity above MAX_QUANTITY}
+
+
+def _totals(lines):
+    totals = collections.Counter()
+    for sku, quantity in lines:
+        totals[sku] += quantity
+    return dict(sorted(totals.items()))
+
+
+def _chunks(items):
+    items = list(items)
+    size = settings.WAREHOUSE_UPDATE_BATCH_SIZE
+    for start in range(0, len(items), size):
+        yield dict(items[start:start + size])
+
+
+def _delta(chunk, sign):
+    return Case(
+        *[When(sku=sku, then=Value(sign * quantity)) for sku, quantity in chunk.items()],
+        output_field=IntegerField(),
+    )
+
+
+def _lock(warehouse, chunk):
+    """Lock the chunk's stock rows in SKU order and return their levels."""
+    rows = StockLevel.objects.filter(warehouse=warehouse, sku__in=list(chunk)).order_by('sku')
+    if connection.features.has_select_for_update:
+        rows = rows.select_for_update()
+    else:
+        # SQLite: writing first takes the database write lock, so the levels
+        # read next can't change (reading first could not upgrade to writing)
+        rows.update(updated_at=Now())
+    return dict(rows.values_list('sku', 'on_hand'))
+
+
+def _record(warehouse, lines, kind, sign, user, reference, assigned_to=None):
+    StockMovement.objects.bulk_create(
+        [
+            StockMovement(
+                warehouse=warehouse, sku=sku, quantity=sign * quantity,
+                kind=kind, reference=reference, created_by=user, assigned_to_id=assigned_to,
+            )
+            for sku, quantity in lines
+        ],
+        batch_size=1000,
+    )
+
+
+def receive(warehouse, lines, user=None, reference=''):
+    """
+    Add stock for `lines` ((sku, quantity) pairs) and record them in the
+    ledger. All or nothing: raises StockLimitExceeded, changing nothing, when
+    any level would pass MAX_QUANTITY.
+    """
+    totals = _totals(lines)
+    with transaction.atomic():
+        # make sure every SKU has a row to increment
+        StockLevel.objects.bulk_create(
+            [StockLevel(warehouse=warehouse, sku=sku) for sku in totals],
+            ignore_conflicts=True,
+            batch_size=1000,
+        )
+        excess = {}
+        for chunk in _chunks(totals.items()):
+            levels = _lock(warehouse, chunk)
+            excess.update({
+                sku: levels[sku] + quantity - MAX_QUANTITY
+                for sku, quantity in chunk.items()
+                if levels[sku] + quantity > MAX_QUANTITY
+            })
+        if excess:
+            raise StockLimitExceeded(excess)
+
+        for chunk in _chunks(totals.items()):
+            StockLevel.objects.filter(warehouse=warehouse, sku__in=list(chunk)).update(
+                on_hand=F('on_hand') + _delta(chunk, 1), updated_at=Now(),
+            )
+        _record(warehouse, lines, 'receive', 1, user, reference)
+
+
+def pick(warehouse, lines, user=None, reference='', assigned_to=None):
+    """
+    Remove stock for `lines` and record them in the ledger, assigned to the
+    `assigned_to` staff profile (pk). All or nothing: raises
+    InsufficientStock, changing nothing, when any SKU would go negative.
+    """
+    totals = _totals(lines)
+    with transaction.atomic():
+        # the shortages reported are the levels seen under the row locks,
+        # which no other pick can change before this one commits or fails
+        shortages = {}
+        for chunk in _chunks(totals.items()):
+            levels = _lock(warehouse, chunk)
+            shortages.update({
+                sku: quantity - levels.get(sku, 0)
+                for sku, quantity in chunk.items()
+                if levels.get(sku, 0) < quantity
+            })
+        if shortages:
+            raise InsufficientStock(shortages)
+
+        for chunk in _chunks(totals.items()):
+            StockLevel.objects.filter(warehouse=warehouse, sku__in=list(chunk)).update(
+                on_hand=F('on_hand') + _delta(chunk, -1), updated_at=Now(),
+            )
+        _record(warehouse, lines, 'pick', -1, user, reference, assigned_to)
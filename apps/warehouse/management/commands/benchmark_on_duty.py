@@ -0,0 +1,88 @@
+import datetime
+import random
+import statistics
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from apps.api.models import Company
+from apps.user.models import WarehouseStaffProfile
+from apps.warehouse import roster
+from apps.warehouse.models import Shift, ShiftBucket, Warehouse
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure the "who is on shift at warehouse X" query (ms) over a throw-away company '
+        'of synthetic staff working five 8-hour shifts a week each.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--staff', type=int, default=20000)
+        parser.add_argument('--warehouses', type=int, default=20)
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        User = get_user_model()
+        company = Company.objects.create(name=f'roster-benchmark-{uuid.uuid4().hex[:12]}')
+        try:
+            start = time.perf_counter()
+            warehouses = Warehouse.objects.bulk_create([
+                Warehouse(company=company, code=f'W{n:03d}', name=f'Warehouse {n}')
+                for n in range(options['warehouses'])
+            ])
+            for offset in range(0, options['staff'], 5000):
+                users = []
+                for n in range(offset, min(offset + 5000, options['staff'])):
+                    user = User(
+                        first_name='Staff', last_name=str(n), email=f'staff.{n}@{company.pk}.example',
+                        role='warehouse_staff', company=company,
+                    )
+                    user.set_unusable_password()
+                    users.append(user)
+                profiles = WarehouseStaffProfile.objects.bulk_create([
+                    WarehouseStaffProfile(user=user, warehouse_code='-') for user in User.objects.bulk_create(users)
+                ])
+                shifts = []
+                for profile in profiles:
+                    warehouse, hour = rng.choice(warehouses), rng.choice((6, 14, 22))
+                    for weekday in rng.sample(range(7), 5):
+                        shifts.append(Shift(
+                            staff=profile, warehouse=warehouse, weekday=weekday,
+                            start_time=datetime.time(hour), end_time=datetime.time((hour + 8) % 24),
+                        ))
+                for shift in shifts:
+                    roster._prepare(shift)
+                roster._index(Shift.objects.bulk_create(shifts, batch_size=5000))
+            self.stdout.write(
+                f"{options['staff']} staff, {Shift.objects.filter(warehouse__company=company).count()} shifts, "
+                f"{ShiftBucket.objects.filter(warehouse__company=company).count()} buckets "
+                f"created in {time.perf_counter() - start:.1f} s"
+            )
+            if connection.vendor == 'postgresql':
+                # freshly loaded rows have no planner statistics yet
+                with connection.cursor() as cursor:
+                    cursor.execute(f'ANALYZE {ShiftBucket._meta.db_table}')
+
+            timings, found = [], []
+            now = timezone.now()
+            for _ in range(options['queries']):
+                warehouse = rng.choice(warehouses)
+                at = now + datetime.timedelta(minutes=rng.randrange(roster.WEEK))
+                start = time.perf_counter()
+                found.append(len(list(roster.on_duty(warehouse, at).values_list('pk', flat=True))))
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            self.stdout.write(
+                f'on duty ({statistics.mean(found):.0f} staff on average): p50 {statistics.median(timings):.2f} ms, '
+                f'p95 {timings[int(len(timings) * 0.95) - 1]:.2f} ms, max {timings[-1]:.2f} ms'
+            )
+        finally:
+            User.objects.filter(company=company).delete()
+            company.delete()
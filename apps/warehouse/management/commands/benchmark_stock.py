@@ -0,0 +1,92 @@
+import collections
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection
+from django.db.models import Sum
+
+from apps.api.models import Company
+from apps.warehouse import inventory
+from apps.warehouse.models import StockLevel, StockMovement, Warehouse
+
+
+INITIAL_STOCK = 1_000_000
+
+
+class Command(BaseCommand):
+    help = (
+        'Run concurrent receives and picks against a throw-away warehouse, then check '
+        'that every stock level equals the expected total and the ledger (no lost updates).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help='Concurrent pickers/receivers.')
+        parser.add_argument('--operations', type=int, default=50, help='Receive/pick batches per thread.')
+        parser.add_argument('--lines', type=int, default=200, help='Lines per batch.')
+        parser.add_argument('--skus', type=int, default=50, help='Distinct SKUs (fewer means more contention).')
+
+    def handle(self, *args, **options):
+        company = Company.objects.create(name=f'stock-benchmark-{uuid.uuid4().hex[:12]}')
+        try:
+            warehouse = Warehouse.objects.create(company=company, code='BENCH', name='Benchmark')
+            skus = [f'SKU-{n:05d}' for n in range(options['skus'])]
+            inventory.receive(warehouse, [(sku, INITIAL_STOCK) for sku in skus])
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['threads']) as executor:
+                results = list(executor.map(
+                    lambda seed: self.worker(warehouse, skus, options['operations'], options['lines'], seed),
+                    range(options['threads']),
+                ))
+            elapsed = time.perf_counter() - start
+
+            expected = collections.Counter({sku: INITIAL_STOCK for sku in skus})
+            failed = 0
+            for deltas, failures in results:
+                expected.update(deltas)
+                failed += failures
+            self.report(warehouse, skus, expected, failed, elapsed, options)
+        finally:
+            company.delete()
+
+    def worker(self, warehouse, skus, operations, lines, seed):
+        rng = random.Random(seed)
+        deltas, failures = collections.Counter(), 0
+        try:
+            for n in range(operations):
+                batch = [(rng.choice(skus), rng.randint(1, 5)) for _ in range(lines)]
+                picking = n % 2
+                try:
+                    if picking:
+                        inventory.pick(warehouse, batch)
+                    else:
+                        inventory.receive(warehouse, batch)
+                except (inventory.InsufficientStock, DatabaseError):
+                    failures += 1  # rolled back as a whole, so expect no change
+                    continue
+                for sku, quantity in batch:
+                    deltas[sku] += -quantity if picking else quantity
+        finally:
+            connection.close()
+        return deltas, failures
+
+    def report(self, warehouse, skus, expected, failed, elapsed, options):
+        levels = dict(StockLevel.objects.filter(warehouse=warehouse).values_list('sku', 'on_hand'))
+        ledger = dict(
+            StockMovement.objects.filter(warehouse=warehouse)
+            .values('sku').annotate(total=Sum('quantity')).values_list('sku', 'total')
+        )
+        lost = [sku for sku in skus if not levels[sku] == ledger[sku] == expected[sku]]
+
+        batches = options['threads'] * options['operations']
+        self.stdout.write(
+            f'{batches} batches ({batches * options["lines"]} lines) on {options["threads"]} threads '
+            f'in {elapsed:.2f} s: {batches / elapsed:.1f} batches/s, '
+            f'{batches * options["lines"] / elapsed:.0f} lines/s, {failed} failed'
+        )
+        if lost:
+            raise CommandError(f'Lost updates on {len(lost)} SKU(s): {", ".join(lost[:10])}')
+        self.stdout.write(self.style.SUCCESS(f'No lost updates: all {len(skus)} SKUs match the expected totals and the ledger.'))
@@ -0,0 +1,81 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:50
+
+import apps.warehouse.models
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0006_user_unactivated_index'),
+        ('warehouse', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Shift',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField(choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')])),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+                ('start_minute', models.PositiveIntegerField(editable=False)),
+                ('end_minute', models.PositiveIntegerField(editable=False)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ShiftBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.PositiveSmallIntegerField()),
+                ('start_minute', models.PositiveIntegerField()),
+                ('end_minute', models.PositiveIntegerField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='stockmovement',
+            name='assigned_to',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='assigned_movements', to='user.warehousestaffprofile'),
+        ),
+        migrations.AddField(
+            model_name='warehouse',
+            name='timezone',
+            field=models.CharField(default='UTC', max_length=64, validators=[apps.warehouse.models.validate_timezone]),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['assigned_to', 'created_at'], name='stockmovement_assignee'),
+        ),
+        migrations.AddField(
+            model_name='shift',
+            name='staff',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shifts', to='user.warehousestaffprofile'),
+        ),
+        migrations.AddField(
+            model_name='shift',
+            name='warehouse',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shifts', to='warehouse.warehouse'),
+        ),
+        migrations.AddField(
+            model_name='shiftbucket',
+            name='shift',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='buckets', to='warehouse.shift'),
+        ),
+        migrations.AddField(
+            model_name='shiftbucket',
+            name='staff',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='user.warehousestaffprofile'),
+        ),
+        migrations.AddField(
+            model_name='shiftbucket',
+            name='warehouse',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='warehouse.warehouse'),
+        ),
+        migrations.AddIndex(
+            model_name='shiftbucket',
+            index=models.Index(fields=['warehouse', 'hour'], name='shiftbucket_lookup'),
+        ),
+    ]
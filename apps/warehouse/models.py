@@ -0,0 +1,137 @@
+import zoneinfo
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import models
+
+from apps.api.models import Company
+from apps.user.models import WarehouseStaffProfile
+
+
+def validate_timezone(value):
+    try:
+        zoneinfo.ZoneInfo(value)
+    except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+        raise ValidationError(f'Unknown time zone "{value}".')
+
+
+class Warehouse(models.Model):
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='warehouses')
+    code = models.CharField(max_length=50)
+    name = models.CharField(max_length=255)
+    address = models.TextField(blank=True)
+    # IANA time zone the warehouse's shifts are scheduled in
+    timezone = models.CharField(max_length=64, default='UTC', validators=[validate_timezone])
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['company', 'code'], name='warehouse_unique_code_per_company'),
+        ]
+
+    def __str__(self):
+        return f"{self.code} - {self.name}"
+
+
+
+class StockLevel(models.Model):
+    """
+    Current on-hand quantity of a SKU in a warehouse. Only ever changed with
+    `F('on_hand') + n` updates (see inventory.py), never read-modify-write.
+    """
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, related_name='stock_levels')
+    sku = models.CharField(max_length=64)
+    on_hand = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['warehouse', 'sku'], name='stocklevel_unique_sku_per_warehouse'),
+        ]
+
+    def __str__(self):
+        return f"{self.sku} @ {self.warehouse.code}: {self.on_hand}"
+
+
+
+class StockMovement(models.Model):
+    """Append-only ledger: one row per received, picked or adjusted line."""
+    KIND_CHOICES = [
+        ("receive", "Receive"),
+        ("pick", "Pick"),
+        ("adjust", "Adjust"),
+    ]
+
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, related_name='movements')
+    sku = models.CharField(max_length=64)
+    quantity = models.IntegerField()  # signed: picks are negative
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    reference = models.CharField(max_length=100, blank=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='stock_movements'
+    )
+    # picks are routed to a staff member on shift (see roster.pick_assignee)
+    assigned_to = models.ForeignKey(
+        WarehouseStaffProfile, on_delete=models.SET_NULL, null=True, blank=True, related_name='assigned_movements'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['warehouse', 'sku', 'created_at'], name='stockmovement_sku_history'),
+            models.Index(fields=['assigned_to', 'created_at'], name='stockmovement_assignee'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.quantity} x {self.sku}"
+
+
+
+class Shift(models.Model):
+    """
+    A weekly recurring shift of a staff member at a warehouse, in the
+    warehouse's time zone. An end time at or before the start time ends the
+    next day. Saved through roster.py, which keeps its ShiftBucket rows.
+    """
+    WEEKDAY_CHOICES = [
+        (0, "Monday"),
+        (1, "Tuesday"),
+        (2, "Wednesday"),
+        (3, "Thursday"),
+        (4, "Friday"),
+        (5, "Saturday"),
+        (6, "Sunday"),
+    ]
+
+    staff = models.ForeignKey(WarehouseStaffProfile, on_delete=models.CASCADE, related_name='shifts')
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, related_name='shifts')
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAY_CHOICES)
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    # minutes since Monday 00:00 (derived); the end passes 10080 for a shift running into next week
+    start_minute = models.PositiveIntegerField(editable=False)
+    end_minute = models.PositiveIntegerField(editable=False)
+
+    def __str__(self):
+        return f"{self.get_weekday_display()} {self.start_time:%H:%M}-{self.end_time:%H:%M} @ {self.warehouse_id}"
+
+
+
+class ShiftBucket(models.Model):
+    """
+    One row per hour of the week a shift overlaps, so "who is on shift at
+    warehouse X now" is an index lookup on (warehouse, hour) instead of a
+    scan of every shift. Carries the shift's bounds for the exact check.
+    """
+    shift = models.ForeignKey(Shift, on_delete=models.CASCADE, related_name='buckets')
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, related_name='+')
+    staff = models.ForeignKey(WarehouseStaffProfile, on_delete=models.CASCADE, related_name='+')
+    hour = models.PositiveSmallIntegerField()  # hour of the week, 0 = Monday 00:00-01:00
+    start_minute = models.PositiveIntegerField()
+    end_minute = models.PositiveIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['warehouse', 'hour'], name='shiftbucket_lookup'),
+        ]
@@ -0,0 +1,114 @@
+import datetime
+import zoneinfo
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from apps.user.models import WarehouseStaffProfile
+from .models import Shift, ShiftBucket, StockMovement
+
+
+# Shifts are weekly intervals in minutes since Monday 00:00 (warehouse local
+# time). Each is also stored as one ShiftBucket row per hour of the week it
+# overlaps, so finding who is on shift at an instant reads the handful of
+# bucket rows of that hour, via the (warehouse, hour) index, however many
+# staff and shifts there are; the bucket's copy of the shift bounds settles
+# the minutes within the hour.
+
+DAY = 24 * 60
+WEEK = 7 * DAY
+
+
+def shift_minutes(weekday, start_time, end_time):
+    """(start, end) minutes since Monday 00:00; end > start, past WEEK for shifts running into next week."""
+    start = start_time.hour * 60 + start_time.minute
+    length = end_time.hour * 60 + end_time.minute - start
+    if length <= 0:  # ends the next day
+        length += DAY
+    start += weekday * DAY
+    return start, start + length
+
+
+def shift_hours(start_minute, end_minute):
+    """Hours of the week (0-167) the interval overlaps."""
+    return sorted({hour % (WEEK // 60) for hour in range(start_minute // 60, (end_minute - 1) // 60 + 1)})
+
+
+def week_minute(warehouse, at=None):
+    """Minutes since Monday 00:00 in the warehouse's time zone at `at` (default now; naive means local)."""
+    zone = zoneinfo.ZoneInfo(warehouse.timezone)
+    at = at or timezone.now()
+    local = at.replace(tzinfo=zone) if timezone.is_naive(at) else timezone.localtime(at, zone)
+    return local.weekday() * DAY + local.hour * 60 + local.minute
+
+
+def _prepare(shift):
+    shift.start_minute, shift.end_minute = shift_minutes(shift.weekday, shift.start_time, shift.end_time)
+
+
+def _index(shifts):
+    ShiftBucket.objects.filter(shift__in=shifts).delete()
+    ShiftBucket.objects.bulk_create(
+        [
+            ShiftBucket(
+                shift=shift, warehouse_id=shift.warehouse_id, staff_id=shift.staff_id, hour=hour,
+                start_minute=shift.start_minute, end_minute=shift.end_minute,
+            )
+            for shift in shifts
+            for hour in shift_hours(shift.start_minute, shift.end_minute)
+        ],
+        batch_size=1000,
+    )
+
+
+def save_shift(shift):
+    """Save a new or changed shift along with its buckets."""
+    _prepare(shift)
+    with transaction.atomic():
+        shift.save()
+        _index([shift])
+    return shift
+
+
+def replace_roster(staff, shifts):
+    """Replace every shift of `staff` with `shifts` (unsaved), in one transaction."""
+    for shift in shifts:
+        shift.staff = staff
+        _prepare(shift)
+    with transaction.atomic():
+        Shift.objects.filter(staff=staff).delete()  # buckets cascade
+        created = Shift.objects.bulk_create(shifts)
+        _index(created)
+    return created
+
+
+def on_duty(warehouse, at=None):
+    """Active staff on shift at `warehouse` at `at` (default now)."""
+    minute = week_minute(warehouse, at)
+    # a shift that started last week (Sunday night) holds the minute one week later
+    covering = ShiftBucket.objects.filter(warehouse=warehouse, hour=minute // 60).filter(
+        Q(start_minute__lte=minute, end_minute__gt=minute)
+        | Q(start_minute__lte=minute + WEEK, end_minute__gt=minute + WEEK)
+    )
+    return WarehouseStaffProfile.objects.filter(
+        pk__in=covering.values('staff_id'), is_active=True, user__is_active=True,
+    )
+
+
+def pick_assignee(warehouse, at=None):
+    """
+    The staff member on shift to route a pick to: the one with the fewest
+    pick lines assigned within WAREHOUSE_PICK_BALANCE_WINDOW seconds, or
+    None when no one is on shift.
+    """
+    staff_ids = list(on_duty(warehouse, at).values_list('pk', flat=True))
+    if not staff_ids:
+        return None
+    since = (at or timezone.now()) - datetime.timedelta(seconds=settings.WAREHOUSE_PICK_BALANCE_WINDOW)
+    load = dict(
+        StockMovement.objects.filter(assigned_to__in=staff_ids, kind='pick', created_at__gte=since)
+        .values('assigned_to').annotate(lines=Count('pk')).values_list('assigned_to', 'lines')
+    )
+    return min(staff_ids, key=lambda pk: (load.get(pk, 0), pk))
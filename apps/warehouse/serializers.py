@@ -0,0 +1,109 @@
+from django.conf import settings
+from rest_framework import serializers
+
+from apps.user.models import WarehouseStaffProfile
+from . import roster
+from .inventory import MAX_QUANTITY
+from .models import Shift, StockLevel, Warehouse
+
+
+class StockLinesField(serializers.Field):
+    """
+    A list of {"sku": str, "quantity": int from 1 to MAX_QUANTITY} objects, validated in one
+    plain loop: nested serializers cost far too much per line for the
+    thousands of lines a bulk request can carry. Returns (sku, quantity) pairs.
+    """
+    default_error_messages = {
+        'not_a_list': 'Expected a non-empty list of lines.',
+        'too_many': 'At most {max_lines} lines per request.',
+        'invalid': (
+            'Line {index}: expected {{"sku": <string up to 64 characters>, '
+            '"quantity": <integer from 1 to {max_quantity}>}}.'
+        ),
+    }
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list) or not data:
+            self.fail('not_a_list')
+        if len(data) > settings.WAREHOUSE_MAX_LINES:
+            self.fail('too_many', max_lines=settings.WAREHOUSE_MAX_LINES)
+
+        lines = []
+        for index, line in enumerate(data):
+            try:
+                sku, quantity = line['sku'], line['quantity']
+            except (TypeError, KeyError):
+                self.fail('invalid', index=index, max_quantity=MAX_QUANTITY)
+            if (
+                not isinstance(sku, str) or not 0 < len(sku) <= 64
+                or type(quantity) is not int or not 0 < quantity <= MAX_QUANTITY
+            ):
+                self.fail('invalid', index=index, max_quantity=MAX_QUANTITY)
+            lines.append((sku, quantity))
+        return lines
+
+    def to_representation(self, value):
+        return [{'sku': sku, 'quantity': quantity} for sku, quantity in value]
+
+
+class StockBatchSerializer(serializers.Serializer):
+    reference = serializers.CharField(max_length=100, required=False, allow_blank=True, default='')
+    lines = StockLinesField()
+
+
+class WarehouseSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Warehouse
+        fields = ['id', 'code', 'name', 'address', 'timezone', 'is_active', 'created_at']
+        read_only_fields = ['id', 'created_at']
+
+
+class StockLevelSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = StockLevel
+        fields = ['sku', 'on_hand', 'updated_at']
+
+
+class RosterShiftSerializer(serializers.ModelSerializer):
+    """A shift of a roster; only warehouses of the requesting user's company are accepted."""
+    class Meta:
+        model = Shift
+        fields = ['warehouse', 'weekday', 'start_time', 'end_time']
+
+    def validate_warehouse(self, warehouse):
+        if warehouse.company_id != self.context['request'].user.company_id:
+            raise serializers.ValidationError('Unknown warehouse.')
+        return warehouse
+
+
+def _validate_staff(serializer, staff):
+    if staff.user.company_id != serializer.context['request'].user.company_id:
+        raise serializers.ValidationError('Unknown staff member.')
+    return staff
+
+
+class ShiftSerializer(RosterShiftSerializer):
+    staff = serializers.PrimaryKeyRelatedField(queryset=WarehouseStaffProfile.objects.select_related('user'))
+
+    class Meta(RosterShiftSerializer.Meta):
+        fields = ['id', 'staff', *RosterShiftSerializer.Meta.fields]
+        read_only_fields = ['id']
+
+    validate_staff = _validate_staff
+
+    def create(self, validated_data):
+        return roster.save_shift(Shift(**validated_data))
+
+    def update(self, instance, validated_data):
+        for name, value in validated_data.items():
+            setattr(instance, name, value)
+        return roster.save_shift(instance)
+
+
+class RosterSerializer(serializers.Serializer):
+    """The complete weekly roster of one staff member, replacing their current shifts."""
+    staff = serializers.PrimaryKeyRelatedField(queryset=WarehouseStaffProfile.objects.select_related('user'))
+    shifts = RosterShiftSerializer(many=True, max_length=settings.WAREHOUSE_MAX_SHIFTS)
+
+    validate_staff = _validate_staff
+
@@ -0,0 +1,151 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.api.models import Company
+from apps.user.models import WarehouseStaffProfile
+from apps.warehouse import inventory, roster
+from apps.warehouse.models import Shift, StockLevel, StockMovement, Warehouse
+from apps.warehouse.serializers import StockBatchSerializer
+
+
+def levels(warehouse):
+    return dict(StockLevel.objects.filter(warehouse=warehouse).values_list('sku', 'on_hand'))
+
+
+class InventoryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(name='Acme')
+        cls.warehouse = Warehouse.objects.create(company=cls.company, code='W1', name='Main')
+        cls.admin = get_user_model().objects.create_user(
+            'Ada', 'Admin', 'ada@acme.example', 'pw', role='company_admin', company=cls.company,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_receive_and_pick(self):
+        inventory.receive(self.warehouse, [('A', 5), ('B', 2), ('A', 1)])
+        inventory.pick(self.warehouse, [('A', 4), ('B', 2)])
+        self.assertEqual(levels(self.warehouse), {'A': 2, 'B': 0})
+        self.assertEqual(StockMovement.objects.filter(kind='pick').count(), 2)
+
+    def test_oversell_picks_nothing(self):
+        inventory.receive(self.warehouse, [('A', 5), ('B', 1)])
+        with self.assertRaises(inventory.InsufficientStock) as raised:
+            # duplicate lines count together; C has no stock row at all
+            inventory.pick(self.warehouse, [('A', 3), ('B', 1), ('A', 3), ('C', 2)])
+        self.assertEqual(raised.exception.shortages, {'A': 1, 'C': 2})
+        self.assertEqual(levels(self.warehouse), {'A': 5, 'B': 1})
+        self.assertFalse(StockMovement.objects.filter(kind='pick').exists())
+
+    def test_receive_within_column_range(self):
+        inventory.receive(self.warehouse, [('A', inventory.MAX_QUANTITY - 1)])
+        with self.assertRaises(inventory.StockLimitExceeded) as raised:
+            inventory.receive(self.warehouse, [('A', 1), ('B', 1), ('A', 1)])
+        self.assertEqual(raised.exception.excess, {'A': 1})
+        self.assertEqual(levels(self.warehouse), {'A': inventory.MAX_QUANTITY - 1})
+
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.post(
+            f'/api/warehouse/warehouses/{self.warehouse.pk}/receive/', {'lines': [{'sku': 'A', 'quantity': 2}]}, format='json',
+        )
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['excess'], {'A': 1})
+
+    def test_line_quantity_bounds(self):
+        for quantity in (0, -1, inventory.MAX_QUANTITY + 1, 1.5, True, '3'):
+            serializer = StockBatchSerializer(data={'lines': [{'sku': 'A', 'quantity': quantity}]})
+            self.assertFalse(serializer.is_valid(), quantity)
+        serializer = StockBatchSerializer(data={'lines': [{'sku': 'A', 'quantity': inventory.MAX_QUANTITY}]})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+
+
+class RosterTests(TestCase):
+    # 2026-10-19 is a Monday
+    MONDAY = datetime.date(2026, 10, 19)
+
+    @classmethod
+    def setUpTestData(cls):
+        company = Company.objects.create(name='Acme')
+        cls.warehouse = Warehouse.objects.create(company=company, code='W1', name='Main', timezone='Europe/Berlin')
+        # created here: profiles are provisioned once the transaction commits
+        cls.staff = [
+            WarehouseStaffProfile.objects.create(
+                user=get_user_model().objects.create_user(
+                    'Wes', str(n), f'wes.{n}@acme.example', 'pw', role='warehouse_staff', company=company,
+                ),
+                warehouse_code='W1', warehouse=cls.warehouse,
+            )
+            for n in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def at(self, days, hour, minute=0):
+        """Warehouse local time, `days` after Monday 2026-10-19."""
+        return datetime.datetime.combine(self.MONDAY + datetime.timedelta(days=days), datetime.time(hour, minute))
+
+    def shift(self, staff, weekday, start, end):
+        return roster.save_shift(Shift(
+            staff=staff, warehouse=self.warehouse, weekday=weekday,
+            start_time=datetime.time(*start), end_time=datetime.time(*end),
+        ))
+
+    def on_duty(self, at):
+        return set(roster.on_duty(self.warehouse, at))
+
+    def test_overnight_shift(self):
+        self.shift(self.staff[0], 2, (22, 0), (6, 0))  # Wednesday night
+        self.assertEqual(self.on_duty(self.at(2, 21, 59)), set())
+        self.assertEqual(self.on_duty(self.at(2, 22)), {self.staff[0]})
+        self.assertEqual(self.on_duty(self.at(3, 5, 59)), {self.staff[0]})
+        self.assertEqual(self.on_duty(self.at(3, 6)), set())
+
+    def test_sunday_night_shift_wraps_into_monday(self):
+        self.shift(self.staff[0], 6, (20, 0), (4, 30))
+        self.assertEqual(self.on_duty(self.at(6, 23)), {self.staff[0]})
+        self.assertEqual(self.on_duty(self.at(0, 0)), {self.staff[0]})
+        self.assertEqual(self.on_duty(self.at(7, 4, 29)), {self.staff[0]})
+        self.assertEqual(self.on_duty(self.at(0, 4, 30)), set())
+
+    def test_time_zone(self):
+        self.shift(self.staff[0], 0, (9, 0), (17, 0))
+        # 08:30 UTC is 10:30 in Berlin (CEST)
+        self.assertEqual(self.on_duty(datetime.datetime(2026, 10, 19, 8, 30, tzinfo=datetime.timezone.utc)), {self.staff[0]})
+        self.assertEqual(self.on_duty(datetime.datetime(2026, 10, 19, 15, 30, tzinfo=datetime.timezone.utc)), set())
+
+    def test_inactive_staff_are_not_on_duty(self):
+        self.shift(self.staff[0], 0, (9, 0), (17, 0))
+        self.shift(self.staff[1], 0, (9, 0), (17, 0))
+        get_user_model().objects.filter(pk=self.staff[1].user_id).update(is_active=False)
+        self.assertEqual(self.on_duty(self.at(0, 12)), {self.staff[0]})
+
+    def test_pick_assignee_balances_recent_picks(self):
+        self.assertIsNone(roster.pick_assignee(self.warehouse))
+        # around the clock, so whoever is asked now is on shift
+        for staff in self.staff[:2]:
+            roster.replace_roster(staff, [
+                Shift(warehouse=self.warehouse, weekday=weekday, start_time=datetime.time(0), end_time=datetime.time(0))
+                for weekday in range(7)
+            ])
+
+        inventory.receive(self.warehouse, [('A', 100)])
+        first, second = self.staff[:2]
+        self.assertEqual(roster.pick_assignee(self.warehouse), first.pk)  # tie: lowest pk
+        inventory.pick(self.warehouse, [('A', 1), ('A', 1)], assigned_to=first.pk)
+        self.assertEqual(roster.pick_assignee(self.warehouse), second.pk)
+        inventory.pick(self.warehouse, [('A', 1)], assigned_to=second.pk)
+        self.assertEqual(roster.pick_assignee(self.warehouse), second.pk)
+
+        # picks outside the balance window no longer count
+        StockMovement.objects.filter(assigned_to=first).update(
+            created_at=datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc),
+        )
+        self.assertEqual(roster.pick_assignee(self.warehouse), first.pk)
@@ -0,0 +1,13 @@
+from django.urls import include, path
+from rest_framework.routers import SimpleRouter
+
+from .views import ShiftViewSet, WarehouseViewSet
+
+router = SimpleRouter()
+router.register('warehouses', WarehouseViewSet, basename='warehouses')
+router.register('shifts', ShiftViewSet, basename='shifts')
+
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
@@ -0,0 +1,160 @@
+from django.utils.dateparse import parse_datetime
+from rest_framework import mixins, permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from apps.api.mixins import CompiledListMixin
+from apps.api.serializers import compile_serializer
+from apps.user.permissions import IsCompanyAdmin, IsDispatcher, IsWarehouseStaff
+from . import inventory, roster
+from .models import Shift, StockLevel, Warehouse
+from .serializers import (
+    RosterSerializer, ShiftSerializer, StockBatchSerializer, StockLevelSerializer, WarehouseSerializer,
+)
+
+
+class WarehouseViewSet(CompiledListMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Warehouses of the requesting user's company, their stock levels, the staff
+    on shift, and bulk receive / pick of stock lines. Picks are assigned to a
+    staff member on shift.
+    """
+    serializer_class = WarehouseSerializer
+
+    def get_permissions(self):
+        if self.action == 'on_duty':
+            permission_classes = [IsWarehouseStaff | IsDispatcher | IsCompanyAdmin]
+        else:
+            permission_classes = [IsWarehouseStaff | IsCompanyAdmin]
+        return [permission() for permission in permission_classes]
+
+    def get_queryset(self):
+        return Warehouse.objects.filter(company_id=self.request.user.company_id).order_by('code')
+
+    def get_serializer_class(self):
+        if self.action in ('receive', 'pick'):
+            return StockBatchSerializer
+        return super().get_serializer_class()
+
+    @action(detail=True, methods=['get'])
+    def stock(self, request, pk=None):
+        compiled = compile_serializer(StockLevelSerializer)
+        warehouse = self.get_object()
+        queryset = StockLevel.objects.filter(warehouse=warehouse).order_by('sku').values(*compiled.sources)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(compiled.many_from_rows(page))
+        return Response(compiled.many_from_rows(queryset))
+
+    @action(detail=True, methods=['get'])
+    def on_duty(self, request, pk=None):
+        """Staff on shift now, or at `?at=` (ISO 8601; without an offset, in the warehouse's time zone)."""
+        warehouse = self.get_object()
+        at = None
+        if 'at' in request.query_params:
+            try:
+                at = parse_datetime(request.query_params['at'])
+            except ValueError:
+                pass
+            if at is None:
+                return Response({'at': ['Expected an ISO 8601 date and time.']}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = roster.on_duty(warehouse, at).order_by('pk').values(
+            'id', 'user_id', 'user__first_name', 'user__last_name', 'phone',
+        )
+
+        def staff(rows):
+            return [
+                {
+                    'id': row['id'],
+                    'user': row['user_id'],
+                    'name': f"{row['user__first_name']} {row['user__last_name']}",
+                    'phone': row['phone'],
+                }
+                for row in rows
+            ]
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(staff(page))
+        return Response(staff(queryset))
+
+    @action(detail=True, methods=['post'])
+    def receive(self, request, pk=None):
+        warehouse, data = self._get_batch()
+        try:
+            inventory.receive(warehouse, data['lines'], user=request.user, reference=data['reference'])
+        except inventory.StockLimitExceeded as exc:
+            return Response({
+                'message': f'Stock levels are limited to {inventory.MAX_QUANTITY}; nothing was received.',
+                'excess': exc.excess,
+            }, status=status.HTTP_409_CONFLICT)
+        return Response({
+            'message': f"Received {len(data['lines'])} line(s).",
+            'reference': data['reference'],
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['post'])
+    def pick(self, request, pk=None):
+        warehouse, data = self._get_batch()
+        assignee = roster.pick_assignee(warehouse)
+        try:
+            inventory.pick(
+                warehouse, data['lines'], user=request.user, reference=data['reference'], assigned_to=assignee,
+            )
+        except inventory.InsufficientStock as exc:
+            return Response({
+                'message': 'Insufficient stock; nothing was picked.',
+                'shortages': exc.shortages,
+            }, status=status.HTTP_409_CONFLICT)
+        return Response({
+            'message': f"Picked {len(data['lines'])} line(s).",
+            'reference': data['reference'],
+            'assigned_to': assignee,  # staff profile on shift; null when no one is
+        }, status=status.HTTP_200_OK)
+
+    def _get_batch(self):
+        warehouse = self.get_object()
+        serializer = self.get_serializer(data=self.request.data)
+        serializer.is_valid(raise_exception=True)
+        return warehouse, serializer.validated_data
+
+
+class ShiftViewSet(CompiledListMixin, viewsets.ModelViewSet):
+    """
+    Weekly shifts of the company's warehouse staff, filterable by `?warehouse=`
+    and `?staff=`. `PUT roster/` replaces all shifts of one staff member.
+    """
+    serializer_class = ShiftSerializer
+
+    def get_permissions(self):
+        if self.request.method in permissions.SAFE_METHODS:
+            permission_classes = [IsWarehouseStaff | IsCompanyAdmin]
+        else:
+            permission_classes = [IsCompanyAdmin]
+        return [permission() for permission in permission_classes]
+
+    def get_queryset(self):
+        queryset = Shift.objects.filter(warehouse__company_id=getattr(self.request.user, 'company_id', None))
+        for name in ('warehouse', 'staff'):
+            value = self.request.query_params.get(name)
+            if value and value.isdigit():
+                queryset = queryset.filter(**{f'{name}_id': value})
+        return queryset.order_by('staff_id', 'start_minute')
+
+    def get_serializer_class(self):
+        if self.action == 'roster':
+            return RosterSerializer
+        return super().get_serializer_class()
+
+    @action(detail=False, methods=['put'])
+    def roster(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        shifts = roster.replace_roster(
+            serializer.validated_data['staff'],
+            [Shift(**shift) for shift in serializer.validated_data['shifts']],
+        )
+        return Response(ShiftSerializer(shifts, many=True).data, status=status.HTTP_200_OK)
+
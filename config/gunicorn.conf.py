@@ -0,0 +1,61 @@
+"""
+Gunicorn configuration for production (`python manage.py runprod`).
+
+Every value can be overridden from the environment / .env:
+
+    GUNICORN_BIND               address to listen on (0.0.0.0:8000)
+    GUNICORN_WORKERS            worker processes (2 x CPU cores + 1)
+    GUNICORN_THREADS            threads per worker (4); >1 uses the gthread worker
+    GUNICORN_MAX_REQUESTS       recycle a worker after this many requests (2000)
+    GUNICORN_MAX_REQUESTS_JITTER  random extra requests, so workers don't recycle together (200)
+    GUNICORN_TIMEOUT            seconds before a silent worker is killed and replaced (30)
+    GUNICORN_GRACEFUL_TIMEOUT   seconds workers get to finish requests on reload/shutdown (30)
+    GUNICORN_KEEPALIVE          seconds to keep idle connections open (5)
+
+Reloading: `kill -HUP <master pid>` restarts the workers gracefully with
+re-read configuration. The application is preloaded in the master, so
+deploying new code needs a new master: `kill -USR2 <master pid>` starts one
+next to the old, then `kill -QUIT <old master pid>` once it's up.
+"""
+
+import gc
+import multiprocessing
+
+# gunicorn treats module-level names as settings, and `config` is one of them
+import decouple
+
+
+bind = decouple.config('GUNICORN_BIND', default='0.0.0.0:8000')
+
+workers = decouple.config('GUNICORN_WORKERS', default=multiprocessing.cpu_count() * 2 + 1, cast=int)
+threads = decouple.config('GUNICORN_THREADS', default=4, cast=int)
+worker_class = 'gthread' if threads > 1 else 'sync'
+
+# Import Django and the project once in the master; forked workers share those
+# pages copy-on-write instead of each importing everything again
+preload_app = True
+
+max_requests = decouple.config('GUNICORN_MAX_REQUESTS', default=2000, cast=int)
+max_requests_jitter = decouple.config('GUNICORN_MAX_REQUESTS_JITTER', default=200, cast=int)
+
+timeout = decouple.config('GUNICORN_TIMEOUT', default=30, cast=int)
+graceful_timeout = decouple.config('GUNICORN_GRACEFUL_TIMEOUT', default=30, cast=int)
+keepalive = decouple.config('GUNICORN_KEEPALIVE', default=5, cast=int)
+
+pidfile = decouple.config('GUNICORN_PIDFILE', default=None)
+
+# Requests are already logged (with latency) by RequestLoggingMiddleware
+accesslog = None
+errorlog = '-'
+
+
+def when_ready(server):
+    # Move everything imported so far out of the garbage collector's reach, so
+    # collections in the workers don't write to (and un-share) those pages.
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # Nothing should have connected while preloading, but never share a socket
+    from django.db import connections
+    connections.close_all()
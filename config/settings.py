@@ -1,5 +1,7 @@
 import os
+from decimal import Decimal
 from pathlib import Path
+from corsheaders.defaults import default_headers
 from decouple import config, Csv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -35,6 +37,10 @@ CORS_ORIGIN_WHITELIST = config(
     cast=Csv()
 )
 
+# Idempotency-Key may be sent cross-origin; replays are marked Idempotent-Replayed
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+CORS_EXPOSE_HEADERS = ['Idempotent-Replayed']
+
 
 # Application definition
 
@@ -46,6 +52,9 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     
+    # SearchDocument.vector (SearchVectorField), lookups and the GIN index
+    'django.contrib.postgres',
+
     # third party apps
     'corsheaders',
     'rest_framework',
@@ -54,19 +63,31 @@ INSTALLED_APPS = [
     # local apps
     'apps.api',
     'apps.user',
+    'apps.warehouse',
+    'apps.shipment',
+    'apps.invoicing',
+    'apps.search',
 ]
 
 MIDDLEWARE = [
+    # request id / user / latency on every log record; first so latency covers the whole stack
+    'apps.api.middleware.RequestLoggingMiddleware',
+    # opt-in tracing spans and sampling profiles (TRACING_* / PROFILING_* below)
+    'apps.api.middleware.TracingMiddleware',
     # including corsmiddleware
     'corsheaders.middleware.CorsMiddleware',
     #
     'django.middleware.security.SecurityMiddleware',
+    # serves STATIC_URL itself, before sessions and auth run
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # Idempotency-Key replay for mutating API requests (IDEMPOTENCY_* below)
+    'apps.api.middleware.IdempotencyMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -130,6 +151,43 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing
+# PASSWORD_HASHER picks the preferred algorithm: pbkdf2, argon2 (needs argon2-cffi) or scrypt.
+# Hashes made with the other algorithms keep verifying and are upgraded on the next login.
+PASSWORD_HASHER = config('PASSWORD_HASHER', default='pbkdf2')
+
+_PASSWORD_HASHER_CLASSES = {
+    'pbkdf2': 'apps.user.hashers.PBKDF2PasswordHasher',
+    'argon2': 'apps.user.hashers.Argon2PasswordHasher',
+    'scrypt': 'apps.user.hashers.ScryptPasswordHasher',
+}
+
+PASSWORD_HASHERS = [_PASSWORD_HASHER_CLASSES[PASSWORD_HASHER]] + [
+    path for name, path in _PASSWORD_HASHER_CLASSES.items() if name != PASSWORD_HASHER
+] + [
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+
+# Cost parameters (0 iterations keeps Django's PBKDF2 default)
+PASSWORD_PBKDF2_ITERATIONS = config('PASSWORD_PBKDF2_ITERATIONS', default=0, cast=int)
+PASSWORD_ARGON2_TIME_COST = config('PASSWORD_ARGON2_TIME_COST', default=2, cast=int)
+PASSWORD_ARGON2_MEMORY_COST = config('PASSWORD_ARGON2_MEMORY_COST', default=102400, cast=int)  # KiB
+PASSWORD_ARGON2_PARALLELISM = config('PASSWORD_ARGON2_PARALLELISM', default=8, cast=int)
+PASSWORD_SCRYPT_WORK_FACTOR = config('PASSWORD_SCRYPT_WORK_FACTOR', default=2 ** 14, cast=int)
+PASSWORD_SCRYPT_BLOCK_SIZE = config('PASSWORD_SCRYPT_BLOCK_SIZE', default=8, cast=int)
+PASSWORD_SCRYPT_PARALLELISM = config('PASSWORD_SCRYPT_PARALLELISM', default=5, cast=int)
+
+# Processes used for hashing so web workers stay responsive (0 hashes in the request thread)
+PASSWORD_HASHING_WORKERS = config('PASSWORD_HASHING_WORKERS', default=0, cast=int)
+
+# Settings used by spawned worker processes (hashing pool and other process pools)
+WORKER_SETTINGS_MODULE = config('WORKER_SETTINGS_MODULE', default='config.settings_lean')
+
+# Cold start budget for django.setup() (best of N runs), checked by `manage.py benchmark_startup`
+STARTUP_TIME_TARGET_MS = config('STARTUP_TIME_TARGET_MS', default=500, cast=int)
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -155,16 +213,186 @@ STATICFILES_DIRS = (
 # Directory where static files will be collected
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 
+# collectstatic writes content-hashed names plus .gz / .br variants; WhiteNoise
+# serves the hashed files with `Cache-Control: public, max-age=315360000, immutable`
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+    # invoice documents: outside MEDIA_ROOT, served only by InvoiceViewSet.document
+    'invoices': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        'OPTIONS': {'location': config('PRIVATE_MEDIA_ROOT', default=os.path.join(BASE_DIR, 'private_media'))},
+    },
+}
+# Cache lifetime (seconds) for static files without a hash in their name
+WHITENOISE_MAX_AGE = config('WHITENOISE_MAX_AGE', default=60 * 60, cast=int)
+
 
 # Media files (user-uploaded content)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+MEDIA_MAX_AGE = config('MEDIA_MAX_AGE', default=60 * 60 * 24, cast=int)
+# Let nginx send media files: set to an `internal` location aliased to MEDIA_ROOT, e.g. /protected-media/
+MEDIA_ACCEL_REDIRECT_PREFIX = config('MEDIA_ACCEL_REDIRECT_PREFIX', default='')
 
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+# JWT signing: HS256 (SECRET_KEY), or RS256 / EdDSA with the key ring in JWT_KEYS_DIR
+# so other services can verify tokens offline from the JWKS endpoint
+JWT_ALGORITHM = config('JWT_ALGORITHM', default='HS256')
+JWT_KEYS_DIR = config('JWT_KEYS_DIR', default=os.path.join(BASE_DIR, 'keys'))
+JWKS_MAX_AGE = config('JWKS_MAX_AGE', default=60 * 60 * 24, cast=int)
+
+# JWT lifetimes (seconds)
+JWT_ACCESS_TOKEN_LIFETIME = config('JWT_ACCESS_TOKEN_LIFETIME', default=60 * 15, cast=int)
+JWT_REFRESH_TOKEN_LIFETIME = config('JWT_REFRESH_TOKEN_LIFETIME', default=60 * 60 * 24 * 7, cast=int)
+
+# Django permissions ('app_label.codename') folded into the cached capability bitset
+CAPABILITY_PERMISSIONS = config('CAPABILITY_PERMISSIONS', default='', cast=Csv())
+CAPABILITY_CACHE_TIMEOUT = config('CAPABILITY_CACHE_TIMEOUT', default=60 * 60, cast=int)
+
+# Lifetime (seconds) of signed account activation and password reset links
+ACCOUNT_ACTIVATION_TIMEOUT = config('ACCOUNT_ACTIVATION_TIMEOUT', default=60 * 60 * 24 * 3, cast=int)
+PASSWORD_RESET_TIMEOUT = config('PASSWORD_RESET_TIMEOUT', default=60 * 60 * 24, cast=int)
+
+# purge_unactivated_users: minimum age (seconds) of a never-activated registration,
+# users deleted per transaction, and pause (seconds) between transactions
+UNACTIVATED_USER_MAX_AGE = config('UNACTIVATED_USER_MAX_AGE', default=60 * 60 * 24 * 30, cast=int)
+UNACTIVATED_USER_PURGE_BATCH_SIZE = config('UNACTIVATED_USER_PURGE_BATCH_SIZE', default=500, cast=int)
+UNACTIVATED_USER_PURGE_PAUSE = config('UNACTIVATED_USER_PURGE_PAUSE', default=0.05, cast=float)
+
+# Create role profiles after the user's transaction commits, batched per transaction
+PROFILE_PROVISIONING_DEFERRED = config('PROFILE_PROVISIONING_DEFERRED', default=True, cast=bool)
+
+# Bulk stock receive / pick: max lines per request, and SKUs per UPDATE statement
+WAREHOUSE_MAX_LINES = config('WAREHOUSE_MAX_LINES', default=10000, cast=int)
+WAREHOUSE_UPDATE_BATCH_SIZE = config('WAREHOUSE_UPDATE_BATCH_SIZE', default=500, cast=int)
+
+# Shift rosters: max shifts per staff roster, and the window (seconds) over which
+# picks are balanced between the staff on shift
+WAREHOUSE_MAX_SHIFTS = config('WAREHOUSE_MAX_SHIFTS', default=100, cast=int)
+WAREHOUSE_PICK_BALANCE_WINDOW = config('WAREHOUSE_PICK_BALANCE_WINDOW', default=60 * 60 * 8, cast=int)
+
+# Bulk shipment status scans: max scans per request
+SHIPMENT_MAX_SCANS = config('SHIPMENT_MAX_SCANS', default=10000, cast=int)
+
+# Month-end invoicing: tax rate on the discounted subtotal, volume discount tiers
+# as "min_shipments:rate" pairs (e.g. "100:0.05,500:0.10"), rows fetched per
+# cursor round trip, customers per transaction, document rendering processes
+INVOICE_TAX_RATE = config('INVOICE_TAX_RATE', default='0.00', cast=Decimal)
+INVOICE_VOLUME_DISCOUNTS = [
+    (int(min_shipments), Decimal(rate))
+    for min_shipments, rate in (tier.split(':') for tier in config('INVOICE_VOLUME_DISCOUNTS', default='', cast=Csv()))
+]
+INVOICE_FETCH_SIZE = config('INVOICE_FETCH_SIZE', default=2000, cast=int)
+INVOICE_BATCH_SIZE = config('INVOICE_BATCH_SIZE', default=200, cast=int)
+INVOICE_RENDER_WORKERS = config('INVOICE_RENDER_WORKERS', default=os.cpu_count() or 1, cast=int)
+INVOICE_MAX_APPROVALS = config('INVOICE_MAX_APPROVALS', default=1000, cast=int)
+
+# Automatic dispatch of pickups to drivers: drivers must have checked in within
+# DISPATCH_CHECK_IN_MAX_AGE seconds, pickups farther than DISPATCH_MAX_DISTANCE_KM
+# from every driver stay unassigned (0: no limit), regions of up to
+# DISPATCH_REGION_SIZE pickups are solved independently, across
+# DISPATCH_WORKERS processes (0: inline)
+DISPATCH_CHECK_IN_MAX_AGE = config('DISPATCH_CHECK_IN_MAX_AGE', default=60 * 60, cast=int)
+DISPATCH_MAX_DISTANCE_KM = config('DISPATCH_MAX_DISTANCE_KM', default=150, cast=float)
+DISPATCH_REGION_SIZE = config('DISPATCH_REGION_SIZE', default=5000, cast=int)
+DISPATCH_LOCAL_SEARCH_ROUNDS = config('DISPATCH_LOCAL_SEARCH_ROUNDS', default=3, cast=int)
+DISPATCH_WORKERS = config('DISPATCH_WORKERS', default=0, cast=int)
+DISPATCH_MAX_JOBS = config('DISPATCH_MAX_JOBS', default=50000, cast=int)
+
+# User / profile search: 'postgres' (full-text, GIN-indexed), 'memory' (per-process
+# prefix index, for SQLite and tests) or 'auto' (by database vendor)
+SEARCH_BACKEND = config('SEARCH_BACKEND', default='auto')
+SEARCH_MIN_QUERY_LENGTH = config('SEARCH_MIN_QUERY_LENGTH', default=2, cast=int)
+SEARCH_MAX_PAGE_SIZE = config('SEARCH_MAX_PAGE_SIZE', default=100, cast=int)
+SEARCH_MAX_CANDIDATES = config('SEARCH_MAX_CANDIDATES', default=1000, cast=int)  # matches ranked per query (postgres)
+SEARCH_ADMIN_MAX_RESULTS = config('SEARCH_ADMIN_MAX_RESULTS', default=1000, cast=int)
+
+# Company teardown (run_teardowns): rows deleted per transaction, pause (seconds)
+# between transactions, and heartbeat age (seconds) after which a running job is resumed
+TEARDOWN_BATCH_SIZE = config('TEARDOWN_BATCH_SIZE', default=1000, cast=int)
+TEARDOWN_PAUSE = config('TEARDOWN_PAUSE', default=0.0, cast=float)
+TEARDOWN_STALE_AFTER = config('TEARDOWN_STALE_AFTER', default=60 * 5, cast=int)
+
+# Cache (login lockouts, token revocation and other shared counters); use a shared
+# backend such as django.core.cache.backends.redis.RedisCache when running more than
+# one process (`check --deploy` fails otherwise, api.E001)
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default=''),
+    }
+}
+
+# Idempotency-Key: how long (seconds) responses are kept for replay, the lock held
+# while the first request runs, and the largest response body kept
+IDEMPOTENCY_TTL = config('IDEMPOTENCY_TTL', default=60 * 60 * 24, cast=int)
+IDEMPOTENCY_LOCK_TIMEOUT = config('IDEMPOTENCY_LOCK_TIMEOUT', default=60, cast=int)
+IDEMPOTENCY_MAX_RESPONSE_BYTES = config('IDEMPOTENCY_MAX_RESPONSE_BYTES', default=1024 * 1024, cast=int)
+
+# Login lockout: failures per account (email + role) and per IP within the window
+LOGIN_FAILURE_LIMIT = config('LOGIN_FAILURE_LIMIT', default=5, cast=int)
+LOGIN_IP_FAILURE_LIMIT = config('LOGIN_IP_FAILURE_LIMIT', default=50, cast=int)
+LOGIN_FAILURE_WINDOW = config('LOGIN_FAILURE_WINDOW', default=60 * 15, cast=int)
+LOGIN_LOCKOUT_SECONDS = config('LOGIN_LOCKOUT_SECONDS', default=60 * 15, cast=int)
+LOGIN_UNKNOWN_EMAIL_CACHE_SECONDS = config('LOGIN_UNKNOWN_EMAIL_CACHE_SECONDS', default=60 * 5, cast=int)
+# Reverse proxies in front of the app that append to X-Forwarded-For (nginx, load
+# balancer); the client IP is read from the header only when this is set
+TRUSTED_PROXY_HOPS = config('TRUSTED_PROXY_HOPS', default=0, cast=int)
+
+# Logging: JSON lines written by a background thread (request threads only enqueue);
+# high-frequency events such as auth failures are sampled
+LOG_LEVEL = config('LOG_LEVEL', default='INFO')
+LOG_FILE = config('LOG_FILE', default='')
+LOG_AUTH_FAILURE_SAMPLE_RATE = config('LOG_AUTH_FAILURE_SAMPLE_RATE', default=0.1, cast=float)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'request_context': {'()': 'apps.api.logs.RequestContextFilter'},
+        'sampling': {
+            '()': 'apps.api.logs.SamplingFilter',
+            'rates': {'auth_failure': LOG_AUTH_FAILURE_SAMPLE_RATE},
+        },
+    },
+    'handlers': {
+        'queue': {
+            '()': 'apps.api.logs.QueueListenerHandler',
+            'filename': LOG_FILE or None,
+            'filters': ['sampling', 'request_context'],
+        },
+    },
+    'root': {'handlers': ['queue'], 'level': LOG_LEVEL},
+    'loggers': {
+        'django': {'handlers': ['queue'], 'level': LOG_LEVEL, 'propagate': False},
+    },
+}
+
+# Request tracing: spans (hashing, ORM, email, validation, templates) appended as
+# JSON lines to TRACE_FILE, in OpenTelemetry's format when its SDK is installed
+TRACING_ENABLED = config('TRACING_ENABLED', default=False, cast=bool)
+TRACING_SAMPLE_RATE = config('TRACING_SAMPLE_RATE', default=1.0, cast=float)
+TRACING_SERVICE_NAME = config('TRACING_SERVICE_NAME', default='logicore-api')
+TRACE_FILE = config('TRACE_FILE', default=os.path.join(BASE_DIR, 'traces.jsonl'))
+# allow clients to request tracing / profiling with X-Trace: 1 and X-Profile: 1;
+# off unless set explicitly, whatever DEBUG is (the headers cost server time)
+TRACING_HEADERS_ENABLED = config('TRACING_HEADERS_ENABLED', default=False, cast=bool)
+
+# Sampling profiler: folded stacks (flamegraph.pl / speedscope) of slow requests
+PROFILING_ENABLED = config('PROFILING_ENABLED', default=False, cast=bool)
+PROFILING_INTERVAL_MS = config('PROFILING_INTERVAL_MS', default=5, cast=int)
+PROFILING_SLOW_REQUEST_MS = config('PROFILING_SLOW_REQUEST_MS', default=500, cast=int)
+PROFILING_DIR = config('PROFILING_DIR', default=os.path.join(BASE_DIR, 'profiles'))
+
 # Email settings
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST= config('EMAIL_HOST')
@@ -177,6 +405,18 @@ EMAIL_USE_TLS= config('EMAIL_USE_TLS')
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',  # This handles CSRF
+        'apps.user.authentication.JWTAuthentication',  # Bearer header or the jwt cookie
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+        'apps.api.renderers.MessagePackRenderer',  # compact binary format for high-volume clients
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+        'apps.api.parsers.MessagePackParser',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         # 'rest_framework.permissions.IsAuthenticated',
@@ -190,7 +430,10 @@ REST_FRAMEWORK = {
 # 
 SPECTACULAR_SETTINGS = {
     'TITLE': 'LogiCore API',
-    'DESCRIPTION': 'The LogiCore API empowers developers to seamlessly integrate logistics functionality into their own systems and applications. Designed for scalability and flexibility, our RESTful API provides secure access to all major modules of the LogiCore platform — including Orders, Shipments, Fleet, Warehouses, Drivers, Customers, Invoicing, and more.',
+    'DESCRIPTION': 'The LogiCore API empowers developers to seamlessly integrate logistics functionality into their own systems and applications. Designed for scalability and flexibility, our RESTful API provides secure access to all major modules of the LogiCore platform — including Orders, Shipments, Fleet, Warehouses, Drivers, Customers, Invoicing, and more.'
+        '\n\nEvery endpoint also speaks MessagePack (`application/msgpack`), a compact binary encoding of the same '
+        'data: send `Accept: application/msgpack` or `?format=msgpack` to receive it, and '
+        '`Content-Type: application/msgpack` to send a request body in it. JSON remains the default.',
     'VERSION': '1.0.0',
     'SERVE_INCLUDE_SCHEMA': False,
     'SCHEMA_PATH_PREFIX': '/api',
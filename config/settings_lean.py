@@ -0,0 +1,42 @@
+"""
+Lean settings for worker processes and batch management commands.
+
+Same as config.settings, minus the apps only the web UI needs (admin,
+messages, API schema generation), so `django.setup()` imports less:
+
+    DJANGO_SETTINGS_MODULE=config.settings_lean python manage.py <command> --skip-checks
+
+--skip-checks also avoids importing the URLconf and Pillow for the system
+checks. Measure with `python manage.py benchmark_startup`.
+"""
+
+from .settings import *  # noqa: F401,F403
+from .settings import INSTALLED_APPS, MIDDLEWARE, REST_FRAMEWORK, TEMPLATES
+
+
+_WEB_ONLY_APPS = ('django.contrib.admin', 'django.contrib.messages', 'drf_spectacular')
+
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in _WEB_ONLY_APPS]
+
+MIDDLEWARE = [
+    middleware for middleware in MIDDLEWARE
+    if middleware != 'django.contrib.messages.middleware.MessageMiddleware'
+]
+
+TEMPLATES = [
+    {
+        **TEMPLATES[0],
+        'OPTIONS': {
+            **TEMPLATES[0]['OPTIONS'],
+            'context_processors': [
+                processor for processor in TEMPLATES[0]['OPTIONS']['context_processors']
+                if processor != 'django.contrib.messages.context_processors.messages'
+            ],
+        },
+    },
+]
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    'DEFAULT_SCHEMA_CLASS': 'rest_framework.schemas.openapi.AutoSchema',
+}
@@ -1,36 +1,55 @@
-from django.contrib import admin
-from django.urls import include, path
+import re
+
+from django.apps import apps
+from django.urls import include, path, re_path
 from django.conf import settings
-from django.conf.urls.static import static
-from django.contrib.staticfiles.urls import staticfiles_urlpatterns
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
 
+from apps.api.views import serve_media
+from apps.user.views import JWKSView
 from .views import home, page_not_found
 
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
     path('', home, name='home'),
     # 
     path('api/users/', include('apps.user.urls')),
-    # 
-    path('api/schema/file', SpectacularAPIView.as_view(), name='schema'),
-    path('api/schema/swagger-ui/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
-    path('api/schema/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
+    path('api/warehouse/', include('apps.warehouse.urls')),
+    path('api/shipments/', include('apps.shipment.urls')),
+    path('api/invoicing/', include('apps.invoicing.urls')),
+    path('api/search/', include('apps.search.urls')),
+    path('.well-known/jwks.json', JWKSView.as_view(), name='jwks'),
 ]
 
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
-urlpatterns += staticfiles_urlpatterns()
-if not settings.DEBUG:
-    urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
+# The admin and the schema views are heavy imports; the lean settings profile
+# (config.settings_lean) leaves them out
+if apps.is_installed('django.contrib.admin'):
+    from django.contrib import admin
+
+    urlpatterns.append(path('admin/', admin.site.urls))
+
+    # Configure Admin Title
+    admin.site.site_header = "LogiCore API | Admin"
+    admin.site.index_title = "Management"
+
+if apps.is_installed('drf_spectacular'):
+    from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
+
+    urlpatterns += [
+        path('api/schema/file', SpectacularAPIView.as_view(), name='schema'),
+        path('api/schema/swagger-ui/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
+        path('api/schema/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
+    ]
+
+# Static files are served by WhiteNoiseMiddleware (hashed, precompressed, cached
+# forever), before URL routing. Uploads are not public: outside DEBUG, MEDIA_ROOT
+# is never served as a whole (invoices have their own company-scoped view)
+if settings.DEBUG:
+    urlpatterns.append(
+        re_path(r'^%s(?P<path>.*)$' % re.escape(settings.MEDIA_URL.lstrip('/')), serve_media, name='media'),
+    )
 
 
 # Set the custom 404 handler
 handler404 = page_not_found
 if settings.DEBUG:
     handler404 = page_not_found
-
-
-# Configure Admin Title
-admin.site.site_header = "LogiCore API | Admin"
-admin.site.index_title = "Management"
\ No newline at end of file
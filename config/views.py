@@ -1,8 +1,11 @@
 from django.shortcuts import render
 
+from apps.api.tracing import span
+
 
 def home(request):
-    return render(request, 'index.html')
+    with span('template.render', template='index.html'):
+        return render(request, 'index.html')
 
 
 